@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark vectorized batch categorization
+
+Categorizes the same synthetic backlog with the per-event path and the
+NumPy batch path at several sizes (default 10k, 100k and 1M events), in
+batches like a replay would feed them, and checks the results (category,
+importance, key info and session of every event, and the final context
+window) are identical. Part of the backlog arrives already categorized
+(and sometimes scored), the way the capture sources queue events.
+"""
+
+import sys
+import gc
+import time
+import random
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench_pattern_engine import make_events, PATTERNS_FILE
+from process.categorizer import ActivityCategorizer
+from process.batch_categorizer import np
+
+BATCH = 50000
+
+# Categories the capture sources set before queueing
+PRECATEGORIZED = ['testing', 'git_commit', 'feature_start', 'code_created', 'file_change',
+                  'bulk_change', 'shell_command']
+
+
+def make_backlog(n: int) -> list:
+    """Mixed events with errors, fixes, external merges and long commands sprinkled in"""
+    rng = random.Random(n)
+    events = make_events(n)
+    for event in events:
+        roll = rng.random()
+        if roll < 0.03:
+            event['is_error'] = True
+        elif roll < 0.05:
+            event['fixes_error'] = True
+        elif roll < 0.06:
+            event['external_commits'] = [{'author': 'teammate'}]
+        if rng.random() < 0.01:
+            event['data']['message'] = 'BREAKING: drop the v1 API, see docs'
+        if rng.random() < 0.3:
+            event['category'] = rng.choice(PRECATEGORIZED)
+            if rng.random() < 0.3:
+                event['importance'] = rng.randint(1, 10)
+            if event['category'] == 'git_commit' and rng.random() < 0.2:
+                event['data']['message'] = 'WIP: halfway there'
+    return events
+
+
+def run(n: int, vectorized: bool) -> tuple:
+    """(seconds, compact results) for categorizing n events"""
+    events = make_backlog(n)
+    categorizer = ActivityCategorizer(PATTERNS_FILE)
+    gc.collect()
+    start = time.perf_counter()
+    for offset in range(0, n, BATCH):
+        categorizer.categorize_batch(events[offset:offset + BATCH], vectorized=vectorized)
+    elapsed = time.perf_counter() - start
+
+    results = [(e['category'], e['importance'], e.get('subcategory'), e['key_info'], e.get('session'))
+               for e in events]
+    window = [(e['category'], e['timestamp']) for e in categorizer.context_window]
+    return elapsed, (results, window)
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or [10000, 100000, 1000000]
+
+    print("⏱️  Batch Categorization Benchmark")
+    print("=" * 68)
+    if np is None:
+        print("❌ NumPy is not installed; only the per-event path is available")
+        sys.exit(1)
+
+    print(f"{'Events':>10}  {'Per-event':>12}  {'Vectorized':>12}  {'Speedup':>8}  Identical")
+    ok = True
+    for n in sizes:
+        per_event, expected = run(n, vectorized=False)
+        vectorized, actual = run(n, vectorized=True)
+        same = expected == actual
+        ok = ok and same
+        print(f"{n:>10,}  {per_event:>11.2f}s  {vectorized:>11.2f}s  "
+              f"{per_event / vectorized:>7.1f}x  {'yes' if same else 'NO'}")
+        del expected, actual
+        gc.collect()
+
+    print("\n" + "=" * 68)
+    print("✅ Vectorized results identical" if ok else "❌ Vectorized results differ")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
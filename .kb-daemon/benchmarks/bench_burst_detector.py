@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Event storm test for the file watcher
+
+Writes a few hundred files into one watched project at once (like a branch
+switch or a code generator) and checks that the watcher queues a single
+bulk_change for it, with every write counted, and that the daemon
+attributes that event to the project that was written to rather than to
+the workspace around it. A lone edit afterwards must still be queued on
+its own.
+"""
+
+import sys
+import time
+import tempfile
+from pathlib import Path
+from queue import Queue, Empty
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from capture.file_watcher import FileWatcher
+from capture.project_detector import ProjectDetector
+from kb_daemon import KBDaemon
+
+
+def drain(queue: Queue, timeout: float):
+    """Everything queued until the queue stays empty for `timeout` seconds"""
+    events = []
+    while True:
+        try:
+            events.append(queue.get(timeout=timeout))
+        except Empty:
+            return events
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+    print("🌪️  File Event Storm")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Path(tmp) / "DEV"
+        project = workspace / "storm-app"
+        (project / ".git").mkdir(parents=True)
+        (project / "src").mkdir()
+        (project / "README.md").write_text("# storm-app\n")
+        (project / "package.json").write_text('{"name": "storm-app"}\n')
+
+        queue = Queue()
+        watcher = FileWatcher(queue, {'reconcile_on_start': False, 'burst_quiet_seconds': 1.0},
+                              Path(tmp))
+        watcher.watch_paths = [project]
+        watcher.start()
+        time.sleep(0.5)
+
+        start = time.perf_counter()
+        for i in range(files):
+            (project / "src" / f"module_{i}.py").write_text(f"VALUE = {i}\n")
+        written = time.perf_counter() - start
+
+        events = drain(queue, 4.0)
+        bulk = [e for e in events if e['type'] == 'bulk_change']
+        print(f"Wrote {files} files in {written * 1000:.0f}ms; queued {len(events)} events, "
+              f"{len(bulk)} bulk_change")
+        ok = len(bulk) == 1 and len(events) == 1 and bulk[0]['data']['files_changed'] >= files
+
+        if bulk:
+            detector = ProjectDetector(Path(tmp), {})
+            directory = KBDaemon._event_directory(bulk[0]['data'])
+            attributed = detector.detect_project(Path(directory))
+            print(f"bulk_change: {bulk[0]['data']['files_changed']} changes, "
+                  f"attributed to {attributed['name']} ({attributed['path']})")
+            ok &= attributed['path'] == str(project.resolve())
+
+        (project / "src" / "main.py").write_text("print('hi')\n")
+        single = drain(queue, 3.0)
+        print(f"Lone edit afterwards: {[e['type'] for e in single]}")
+        ok &= len(single) == 1 and single[0]['type'] != 'bulk_change'
+
+        watcher.stop()
+
+    print("\n" + "=" * 60)
+    print("✅ Storm test passed" if ok else "❌ Storm test failed")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-command classification cost
+
+Compares the original ShellMonitor checks (up to 13 uncompiled re.search
+calls plus repeated substring scans) with the compiled CommandClassifier
+built from config/patterns.yml.
+"""
+
+import re
+import sys
+import time
+import random
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from capture.command_classifier import CommandClassifier
+
+COMMANDS = [
+    ('npm', 'install react'), ('npm', 'test'), ('npm', 'run build'),
+    ('yarn', 'add lodash'), ('pip', 'uninstall requests'), ('cargo', 'test --release'),
+    ('pytest', '-x tests/test_api.py'), ('git', 'status'), ('git', 'commit -m "fix parser"'),
+    ('git', 'push origin main'), ('git', 'rebase -i HEAD~3'), ('docker', 'build -t app .'),
+    ('docker', 'run --rm app'), ('kubectl', 'apply -f deploy.yml'), ('kubectl', 'get pods'),
+    ('terraform', 'apply'), ('make', ''), ('ls', '-la'), ('cd', 'src'), ('cat', 'README.md'),
+    ('vim', 'main.py'), ('python', 'manage.py migrate'), ('curl', 'https://example.com/api'),
+]
+
+
+def legacy_classify(command: str, args: str, duration: float):
+    """The checks ShellMonitor ran before the classifier"""
+    full_command = f"{command} {args}"
+
+    important = False
+    for pattern in [r'install', r'add', r'remove', r'update', r'upgrade',
+                    r'build', r'test', r'deploy', r'push', r'pull',
+                    r'merge', r'rebase', r'commit']:
+        if re.search(pattern, full_command, re.IGNORECASE):
+            important = True
+            break
+    if duration > 5:
+        important = True
+
+    category = 'shell_command'
+    if command in ['npm', 'yarn', 'pnpm', 'pip', 'cargo']:
+        if any(x in args for x in ['install', 'add']):
+            category = 'dependency_add'
+        elif any(x in args for x in ['remove', 'uninstall']):
+            category = 'dependency_remove'
+        elif 'test' in args:
+            category = 'testing'
+        elif 'build' in args:
+            category = 'building'
+    elif command in ['pytest', 'jest', 'mocha'] or 'test' in full_command:
+        category = 'testing'
+    elif command == 'docker':
+        if 'build' in args:
+            category = 'docker_build'
+        elif 'run' in args:
+            category = 'docker_run'
+        elif 'compose' in args:
+            category = 'docker_compose'
+    elif command == 'git':
+        git_subcmd = args.split()[0] if args else ''
+        category = f'git_{git_subcmd}' if git_subcmd else 'git'
+    elif command == 'kubectl':
+        if 'apply' in args:
+            category = 'deploy'
+        elif 'get' in args:
+            category = 'inspect'
+
+    importance = 5
+    if any(x in full_command for x in ['deploy', 'apply', 'push', 'merge', 'install']):
+        importance = 8
+    if any(x in full_command for x in ['test', 'build', 'commit']):
+        importance = 6
+    if duration > 30:
+        importance += 1
+    if duration > 60:
+        importance += 1
+
+    return {'category': category, 'importance': min(importance, 10), 'important': important}
+
+
+def measure(classify, samples) -> float:
+    """Seconds per classification"""
+    start = time.perf_counter()
+    for command, args, duration in samples:
+        classify(command, args, duration)
+    return (time.perf_counter() - start) / len(samples)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print("⏱️  Command Classification Benchmark")
+    print("=" * 60)
+
+    random.seed(0)
+    samples = [(*random.choice(COMMANDS), random.choice([0.2, 3, 45])) for _ in range(count)]
+    classifier = CommandClassifier(Path(__file__).parent.parent / "config" / "patterns.yml")
+
+    # Warm up the regex cache so the legacy path isn't penalised for compiling
+    measure(legacy_classify, samples[:1000])
+    measure(classifier.classify, samples[:1000])
+
+    legacy = measure(legacy_classify, samples)
+    compiled = measure(classifier.classify, samples)
+
+    print(f"Commands classified: {count}")
+    print(f"  Legacy checks:       {legacy * 1e6:8.2f}µs per command")
+    print(f"  CommandClassifier:   {compiled * 1e6:8.2f}µs per command")
+    print(f"  Speedup:             {legacy / compiled:8.1f}x")
+
+    # Where the two disagree (patterns.yml levels are new information)
+    differences = 0
+    for command, args in COMMANDS:
+        old = legacy_classify(command, args, 0)
+        new = classifier.classify(command, args, 0)
+        if old != new:
+            differences += 1
+            print(f"  ~ {command} {args}: {old} -> {new}")
+    print(f"Commands classified differently: {differences}/{len(COMMANDS)}")
+
+    print("\n" + "=" * 60)
+    print("✅ Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
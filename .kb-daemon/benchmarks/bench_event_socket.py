@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Latency test for the event socket
+
+Starts an EventSocketListener and measures the time from send_event() to
+the routed event, then has concurrent producers send batches to check that
+every event arrives whole. Stops the listener and checks that send_event
+falls back to the capture file and that the git event source backfills
+from it. When socat or nc is installed, also runs a real post-commit hook
+against the listener.
+"""
+
+import sys
+import json
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from queue import Queue, Empty
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from capture.event_socket import EventSocketListener, send_event
+from capture.git_hooks import GitHooks
+from capture.git_event_source import GitEventSource
+
+
+def start_listener(socket_path: Path, routed: Queue) -> EventSocketListener:
+    """Run a listener that records when each event was routed"""
+    listener = EventSocketListener(socket_path, lambda e: routed.put((time.perf_counter(), e)))
+    threading.Thread(target=listener.start, daemon=True).start()
+    deadline = time.time() + 5
+    while not socket_path.exists() and time.time() < deadline:
+        time.sleep(0.01)
+    return listener
+
+
+def measure_latency(socket_path: Path, fallback: Path, routed: Queue, count: int):
+    """Send-to-route latencies in milliseconds, one event at a time"""
+    latencies = []
+    for i in range(count):
+        sent = time.perf_counter()
+        send_event(socket_path, {'type': 'shell_command', 'data': {'command': f'echo {i}'}}, fallback)
+        arrived, _ = routed.get(timeout=5)
+        latencies.append((arrived - sent) * 1000)
+    return sorted(latencies)
+
+
+def concurrent_senders(socket_path: Path, fallback: Path, routed: Queue,
+                       producers: int, batches: int) -> int:
+    """Events that arrived intact from concurrent batch producers"""
+    def produce(p):
+        for b in range(batches):
+            events = [{'type': 'shell_command', 'data': {'command': 'x' * 200, 'producer': p,
+                                                         'batch': b, 'i': i}} for i in range(10)]
+            send_event(socket_path, events, fallback)
+
+    threads = [threading.Thread(target=produce, args=(p,)) for p in range(producers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    intact = 0
+    try:
+        while True:
+            _, event = routed.get(timeout=1)
+            intact += event['data']['command'] == 'x' * 200
+    except Empty:
+        pass
+    return intact
+
+
+def run_hook(base_path: Path, socket_path: Path, routed: Queue):
+    """Commit with the generated post-commit hook; (socket event, file lines)"""
+    hooks = GitHooks(Queue(), {}, base_path)
+    hooks_dir = base_path / "hooks"
+    hooks_dir.mkdir()
+    hooks._create_post_commit_hook(hooks_dir)
+
+    repo = base_path / "repo"
+    repo.mkdir()
+    git = ['git', '-C', str(repo), '-c', 'user.email=bench@example.com', '-c', 'user.name=Bench']
+    subprocess.run(git + ['init', '-q'], check=True)
+    subprocess.run(git + ['config', 'core.hooksPath', str(hooks_dir)], check=True)
+    (repo / "app.py").write_text("print('hi')\n")
+    subprocess.run(git + ['add', 'app.py'], check=True)
+    subprocess.run(git + ['commit', '-q', '-m', 'feat: hi'], check=True)
+
+    try:
+        _, event = routed.get(timeout=5)
+    except Empty:
+        event = None
+    events_file = base_path / "capture" / "git_events.jsonl"
+    lines = events_file.read_text().splitlines() if events_file.exists() else []
+    return event, lines
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    print("⏱️  Event Socket Latency")
+    print("=" * 60)
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        base_path = Path(tmp)
+        (base_path / "capture").mkdir()
+        socket_path = base_path / "capture" / "kb.sock"
+        fallback = base_path / "capture" / "shell_events.jsonl"
+
+        routed = Queue()
+        listener = start_listener(socket_path, routed)
+
+        latencies = measure_latency(socket_path, fallback, routed, count)
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[int(len(latencies) * 0.99)]
+        print(f"send_event -> routed ({count} events): p50 {p50:.3f}ms, p99 {p99:.3f}ms")
+        ok &= p50 < 1.0
+
+        producers, batches = 8, 100
+        intact = concurrent_senders(socket_path, fallback, routed, producers, batches)
+        expected = producers * batches * 10
+        print(f"Concurrent producers: {intact}/{expected} events arrived intact")
+        ok &= intact == expected and not fallback.exists()
+
+        if shutil.which('socat') or shutil.which('nc'):
+            event, lines = run_hook(base_path, socket_path, routed)
+            print(f"post-commit hook via socket: "
+                  f"{event['type'] if event else 'nothing received'}, {len(lines)} lines in the file")
+            ok &= event is not None and event['type'] == 'git_commit' and not lines
+        else:
+            print("post-commit hook via socket: skipped (no socat or nc)")
+
+        listener.stop()
+        time.sleep(0.1)
+
+        # Daemon down: producers fall back to the file, and the source backfills
+        git_events = base_path / "capture" / "git_events.jsonl"
+        git_events.unlink(missing_ok=True)
+        delivered = send_event(socket_path, {'type': 'git_checkout', 'timestamp': '2026-01-01T00:00:00Z',
+                                             'data': {'prev_head': 'a' * 40, 'new_head': 'b' * 40,
+                                                      'branch': 'main', 'repo': tmp}}, git_events)
+        queue = Queue()
+        source = GitEventSource(queue, GitHooks(Queue(), {}, base_path), base_path)
+        thread = threading.Thread(target=source.start, daemon=True)
+        thread.start()
+        try:
+            backfilled = queue.get(timeout=10)
+        except Empty:
+            backfilled = None
+        source.stop()
+        thread.join(timeout=10)
+        print(f"Listener stopped: sent over socket={delivered}, "
+              f"backfilled from file={backfilled is not None}")
+        ok &= not delivered and backfilled is not None
+
+    print("\n" + "=" * 60)
+    print("✅ Latency test passed" if ok else "❌ Latency test failed")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Throughput test for GitEventSource
+
+Appends thousands of synthetic hook events to git_events.jsonl, measures
+how fast they reach the capture queue and checks they arrive in file
+order, then restarts the source to check that the persisted offset
+prevents any replay.
+"""
+
+import sys
+import json
+import time
+import random
+import tempfile
+import threading
+from pathlib import Path
+from queue import Queue, Empty
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from capture.git_hooks import GitHooks
+from capture.git_event_source import GitEventSource
+
+
+def synthetic_event(i: int, repo: str) -> dict:
+    """A commit, checkout or (fast-forward) merge event as the hooks write them"""
+    timestamp = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    kind = random.choice(['git_commit', 'git_commit', 'git_checkout', 'git_merge'])
+    if kind == 'git_commit':
+        data = {'hash': f'{i:040x}', 'message': f'feat: change {i}', 'branch': 'main',
+                'commit_type': 'feature', 'files_changed': 'src/app.py\ntests/test_app.py'}
+    elif kind == 'git_checkout':
+        data = {'prev_head': f'{i:040x}', 'new_head': f'{i + 1:040x}', 'branch': f'feature/{i}'}
+    else:
+        data = {'branch': 'main', 'head_before': f'{i:040x}', 'head_after': f'{i + 1:040x}',
+                'commits_merged': ''}
+    data['repo'] = repo
+    data['seq'] = i
+    return {'type': kind, 'timestamp': timestamp, 'data': data}
+
+
+def run_source(base_path: Path, expected: int, timeout: float = 60.0):
+    """Run a source until `expected` events arrive (or the timeout passes)"""
+    queue = Queue()
+    source = GitEventSource(queue, GitHooks(Queue(), {}, base_path), base_path)
+    thread = threading.Thread(target=source.start, daemon=True)
+
+    received = []
+    start = time.perf_counter()
+    thread.start()
+    deadline = start + timeout
+    while len(received) < expected and time.perf_counter() < deadline:
+        try:
+            received.append(queue.get(timeout=0.5))
+        except Empty:
+            if expected == 0:
+                break
+    elapsed = time.perf_counter() - start
+
+    source.stop()
+    thread.join(timeout=10)
+    return received, elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    print("⏱️  Git Event Source Throughput")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_path = Path(tmp)
+        (base_path / "capture").mkdir()
+        events_file = base_path / "capture" / "git_events.jsonl"
+
+        random.seed(0)
+        with open(events_file, 'w') as f:
+            for i in range(count):
+                f.write(json.dumps(synthetic_event(i, tmp), separators=(',', ':')) + '\n')
+
+        received, elapsed = run_source(base_path, count)
+        categories = {}
+        for event in received:
+            categories[event.get('category')] = categories.get(event.get('category'), 0) + 1
+
+        print(f"Events written:  {count}")
+        print(f"Events received: {len(received)} in {elapsed:.2f}s "
+              f"({len(received) / elapsed:,.0f} events/s)")
+        print(f"By category: {categories}")
+
+        missing_dir = sum(1 for e in received if e['data'].get('working_dir') != tmp)
+        print(f"Events without working_dir: {missing_dir}")
+        in_order = [e['data'].get('seq') for e in received] == list(range(count))
+        print(f"Queued in file order: {'yes' if in_order else 'NO'}")
+
+        replayed, _ = run_source(base_path, 0, timeout=2.0)
+        print(f"Replayed after restart: {len(replayed)}")
+
+        ok = len(received) == count and not replayed and not missing_dir and in_order
+
+    print("\n" + "=" * 60)
+    print("✅ Throughput test passed" if ok else "❌ Throughput test failed")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Benchmark git hook overhead
+
+Compares the previous post-commit and post-merge hooks (which fork git
+rev-parse, log, branch, diff-tree, rev-list and date before emitting) with
+the current ones from GitHooks, which read HEAD with builtins and append a
+single line. Then runs real commits, a merge and a checkout with the current
+hooks installed and checks that the daemon-side enrichment fills in what the
+hooks leave out.
+"""
+
+import sys
+import json
+import tempfile
+import subprocess
+from pathlib import Path
+from queue import Queue
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from capture.git_hooks import GitHooks
+
+# The hooks as generated before the deferred-enrichment rewrite
+LEGACY_PRELUDE = r'''export KB_CAPTURE_DIR="{capture_dir}"
+KB_SOCKET="$KB_CAPTURE_DIR/kb.sock"
+
+kb_json_escape() {
+    local s=$1
+    s=${s//\\/\\\\}
+    s=${s//\"/\\\"}
+    s=${s//$'\n'/\\n}
+    s=${s//$'\t'/\\t}
+    s=${s//$'\r'/\\r}
+    REPLY=$s
+}
+
+kb_emit() {
+    if [ -S "$KB_SOCKET" ]; then
+        if command -v socat > /dev/null 2>&1; then
+            printf '%s\n' "$1" | socat -u - "UNIX-SENDTO:$KB_SOCKET" 2>/dev/null && return
+        elif command -v nc > /dev/null 2>&1; then
+            printf '%s\n' "$1" | nc -U -u -w0 "$KB_SOCKET" 2>/dev/null && return
+        fi
+    fi
+    printf '%s\n' "$1" >> "$KB_CAPTURE_DIR/git_events.jsonl"
+}
+'''
+
+LEGACY_POST_COMMIT = '#!/bin/bash\n' + LEGACY_PRELUDE + r'''
+COMMIT_HASH=$(git rev-parse HEAD)
+COMMIT_MSG=$(git log -1 --pretty=%B)
+BRANCH=$(git branch --show-current)
+CHANGED_FILES=$(git diff-tree --no-commit-id --name-only -r HEAD)
+
+COMMIT_TYPE="general"
+if [[ "$COMMIT_MSG" =~ ^fix:|^bugfix: ]]; then
+    COMMIT_TYPE="bugfix"
+elif [[ "$COMMIT_MSG" =~ ^feat:|^feature: ]]; then
+    COMMIT_TYPE="feature"
+fi
+
+kb_json_escape "$COMMIT_MSG"; J_MSG=$REPLY
+kb_json_escape "$BRANCH"; J_BRANCH=$REPLY
+kb_json_escape "$CHANGED_FILES"; J_FILES=$REPLY
+kb_json_escape "$PWD"; J_REPO=$REPLY
+printf -v EVENT_JSON '{"type":"git_commit","timestamp":"%s","data":{"hash":"%s","message":"%s","branch":"%s","commit_type":"%s","files_changed":"%s","repo":"%s"}}' \
+    "$(date -u +"%Y-%m-%dT%H:%M:%SZ")" "$COMMIT_HASH" "$J_MSG" "$J_BRANCH" "$COMMIT_TYPE" "$J_FILES" "$J_REPO"
+kb_emit "$EVENT_JSON"
+'''
+
+LEGACY_POST_MERGE = '#!/bin/bash\n' + LEGACY_PRELUDE + r'''
+BRANCH=$(git branch --show-current)
+HEAD_BEFORE=$1
+HEAD_AFTER=$(git rev-parse HEAD)
+NEW_COMMITS=$(git rev-list $HEAD_BEFORE..$HEAD_AFTER)
+
+kb_json_escape "$BRANCH"; J_BRANCH=$REPLY
+kb_json_escape "$NEW_COMMITS"; J_COMMITS=$REPLY
+kb_json_escape "$PWD"; J_REPO=$REPLY
+printf -v EVENT_JSON '{"type":"git_merge","timestamp":"%s","data":{"branch":"%s","head_before":"%s","head_after":"%s","commits_merged":"%s","repo":"%s"}}' \
+    "$(date -u +"%Y-%m-%dT%H:%M:%SZ")" "$J_BRANCH" "$HEAD_BEFORE" "$HEAD_AFTER" "$J_COMMITS" "$J_REPO"
+kb_emit "$EVENT_JSON"
+'''
+
+# Prints seconds per run of a hook, each run in a fresh bash as git does
+TIMING_LOOP = '''
+start=$EPOCHREALTIME
+for ((i = 0; i < {runs}; i++)); do bash {hook} {args}; done
+end=$EPOCHREALTIME
+echo "$start $end"
+'''
+
+
+def git(repo: Path, *args, **kwargs) -> str:
+    """Run git quietly in a repo and return stdout"""
+    env = {'GIT_AUTHOR_NAME': 'Other', 'GIT_AUTHOR_EMAIL': 'other@example.com',
+           'GIT_COMMITTER_NAME': 'Other', 'GIT_COMMITTER_EMAIL': 'other@example.com',
+           'HOME': str(repo.parent), 'PATH': '/usr/bin:/bin:/usr/local/bin'}
+    env.update(kwargs.pop('env', {}))
+    return subprocess.run(['git', *args], cwd=repo, capture_output=True, text=True,
+                          check=True, env=env, **kwargs).stdout.strip()
+
+
+def make_repo(repo: Path, commits: int):
+    """A repo whose main branch has a feature branch merged `commits` ahead"""
+    repo.mkdir()
+    git(repo, 'init', '-q', '-b', 'main')
+    git(repo, 'config', 'user.email', 'me@example.com')
+    (repo / 'README').write_text('init\n')
+    git(repo, 'add', '.')
+    git(repo, 'commit', '-q', '-m', 'init')
+    git(repo, 'checkout', '-q', '-b', 'feature/upstream')
+    for i in range(commits):
+        (repo / f'module_{i % 10}.py').write_text(f'VALUE = {i}\n')
+        git(repo, 'add', '.')
+        git(repo, 'commit', '-q', '-m', f'feat: change {i}')
+    git(repo, 'checkout', '-q', 'main')
+
+
+def time_hook(repo: Path, hook: Path, args: str, runs: int) -> float:
+    """Seconds per run of a hook script inside the repo"""
+    script = TIMING_LOOP.format(runs=runs, hook=hook, args=args)
+    out = subprocess.run(['bash', '--norc', '-c', script], cwd=repo,
+                         capture_output=True, text=True, check=True).stdout.split()
+    return (float(out[-1]) - float(out[-2])) / runs
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    print("⏱️  Git Hook Overhead Benchmark")
+    print("=" * 60)
+    print(f"Runs per measurement: {runs}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_path = Path(tmp) / "kb"
+        capture_dir = base_path / "capture"
+        capture_dir.mkdir(parents=True)
+        hooks_dir = Path(tmp) / "hooks"
+        hooks_dir.mkdir()
+
+        git_hooks = GitHooks(Queue(), {'merge_tracking': {'max_commits': 500}}, base_path)
+        git_hooks._create_post_commit_hook(hooks_dir)
+        git_hooks._create_post_merge_hook(hooks_dir)
+        git_hooks._create_post_checkout_hook(hooks_dir)
+
+        legacy_dir = Path(tmp) / "legacy"
+        legacy_dir.mkdir()
+        for name, content in [('post-commit', LEGACY_POST_COMMIT), ('post-merge', LEGACY_POST_MERGE)]:
+            (legacy_dir / name).write_text(content.replace('{capture_dir}', str(capture_dir)))
+        empty_hook = Path(tmp) / "empty"
+        empty_hook.write_text('#!/bin/bash\n')
+
+        repo = Path(tmp) / "repo"
+        make_repo(repo, 300)
+        before = git(repo, 'rev-parse', 'HEAD')
+        git(repo, 'merge', '-q', 'feature/upstream')
+
+        # The legacy post-merge gets the pre-merge HEAD (what it meant to
+        # read) so it walks the same 300-commit range the daemon now walks
+        cases = [
+            ('post-commit', legacy_dir / 'post-commit', hooks_dir / 'post-commit', '', ''),
+            ('post-merge', legacy_dir / 'post-merge', hooks_dir / 'post-merge', before, '0'),
+        ]
+
+        bare = time_hook(repo, empty_hook, '', runs)
+        print(f"\nEmpty hook (bash startup): {bare * 1e3:.2f}ms")
+        print(f"\n{'hook':<14}{'legacy':>12}{'current':>12}{'speedup':>10}")
+        print("-" * 48)
+        for name, legacy, current, legacy_args, current_args in cases:
+            old = time_hook(repo, legacy, legacy_args, runs) - bare
+            new = time_hook(repo, current, current_args, runs) - bare
+            print(f"{name:<14}{old * 1e3:>10.2f}ms{new * 1e3:>10.2f}ms{old / max(new, 1e-6):>9.0f}x")
+
+        # Real git operations with the current hooks installed
+        events_file = capture_dir / "git_events.jsonl"
+        events_file.unlink()
+        git(repo, 'config', 'core.hooksPath', str(hooks_dir))
+        git(repo, 'reset', '-q', '--hard', before)
+        (repo / 'app.py').write_text('print("hi")\n')
+        git(repo, 'add', '.')
+        git(repo, 'commit', '-q', '-m', 'fix: greet')
+        git(repo, 'merge', '-q', '--no-edit', 'feature/upstream')
+        git(repo, 'checkout', '-q', 'feature/upstream')
+
+        print("\nEnriched events from real git operations:")
+        ok = True
+        for line in events_file.read_text().splitlines():
+            event = git_hooks.process_git_event(json.loads(line), cwd=str(repo))
+            data = event['data']
+            if event['type'] == 'git_commit':
+                summary = f"{data['message']!r} [{data['commit_type']}] files={data['files_changed']!r}"
+                ok &= data['commit_type'] == 'bugfix' and data['files_changed'] == 'app.py'
+            elif event['type'] == 'git_merge':
+                summary = f"{len(event['external_commits'])} external commits on {data['branch']}"
+                ok &= len(event['external_commits']) >= 300 and data['branch'] == 'main'
+            else:
+                summary = f"branch={data['branch']} ({event['category']})"
+                ok &= event['category'] == 'feature_start'
+            print(f"  {event['type']:<14}{event['timestamp']}  {summary}")
+
+    print("\n" + "=" * 60)
+    print("✅ Benchmark complete" if ok else "❌ Enrichment check failed")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark category detection throughput
+
+Compares the original ActivityCategorizer matching (str(event).lower() per
+detection pattern, keyword substring scans, str(e) over the context window
+for multiple_test_runs; branch, commit, file and URL patterns ignored) with
+the compiled PatternEngine, which evaluates every family against one
+projection of the event.
+"""
+
+import sys
+import time
+import random
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from process.categorizer import ActivityCategorizer
+from process.event_text import EventText
+
+PATTERNS_FILE = Path(__file__).parent.parent / "config" / "patterns.yml"
+
+COMMANDS = [
+    'npm install react', 'npm test', 'npm run build', 'pytest -x tests/test_api.py',
+    'git status', 'git push origin main', 'docker build -t app .', 'ls -la', 'cd src',
+    'cat README.md', 'python manage.py migrate', 'curl https://docs.python.org/3/',
+    'cargo build --release', 'kubectl get pods', 'make', 'vim src/main.py',
+]
+MESSAGES = [
+    'fix: handle empty config', 'feat: add export command', 'refactor: split parser',
+    'Update README', 'WIP', 'cleanup: remove dead code', 'Fix TypeError in loader',
+]
+BRANCHES = ['main', 'feature/export', 'fix/config', 'refactor/parser', 'dev']
+FILES = [
+    'src/app.py', 'src/app.test.ts', 'tests/test_api.py', 'package.json', 'docs/index.md',
+    'src/__tests__/util.js', 'docker-compose.yml', '.env.local', 'lib/core.rs',
+]
+
+
+def make_events(n: int, seed: int = 7) -> list:
+    """A mix of shell commands, commits and file changes"""
+    rng = random.Random(seed)
+    events = []
+    for i in range(n):
+        kind = rng.random()
+        timestamp = f"2024-05-01T10:{(i // 60) % 60:02d}:{i % 60:02d}Z"
+        if kind < 0.6:
+            cmdline = rng.choice(COMMANDS)
+            command, _, args = cmdline.partition(' ')
+            events.append({'type': 'shell_command', 'timestamp': timestamp, 'data': {
+                'cmdline': cmdline, 'command': command, 'args': args,
+                'exit_code': 1 if rng.random() < 0.1 else 0,
+                'duration': rng.randint(0, 120), 'working_dir': '/Users/me/DEV/app'}})
+        elif kind < 0.75:
+            events.append({'type': 'git_commit', 'timestamp': timestamp, 'data': {
+                'hash': f'{i:040x}', 'message': rng.choice(MESSAGES),
+                'branch': rng.choice(BRANCHES),
+                'files_changed': '\n'.join(rng.sample(FILES, 3)), 'repo': '/Users/me/DEV/app'}})
+        else:
+            events.append({'type': 'file_change', 'timestamp': timestamp, 'data': {
+                'path': '/Users/me/DEV/app/' + rng.choice(FILES), 'event_type': 'modified',
+                'is_directory': False}})
+    return events
+
+
+class LegacyMatcher:
+    """Category detection as ActivityCategorizer did it before the engine"""
+
+    def __init__(self, patterns: dict):
+        self.patterns = patterns
+        self.context_window = []
+
+    def determine(self, event: dict) -> str:
+        self.context_window.append(event)
+        if len(self.context_window) > 50:
+            self.context_window.pop(0)
+        for category, pattern_def in self.patterns['detection_patterns'].items():
+            if self._matches_pattern(event, pattern_def):
+                return category
+        return 'general'
+
+    def _matches_pattern(self, event: dict, pattern_def: dict) -> bool:
+        event_str = str(event).lower()
+        for keyword in pattern_def.get('keywords', []):
+            if keyword.lower() in event_str:
+                return True
+        data = event.get('data', {})
+        for indicator in pattern_def.get('indicators', []):
+            if indicator == 'error_in_output' and data.get('exit_code', 0) != 0:
+                return True
+            elif indicator == 'multiple_test_runs':
+                test_runs = [e for e in self.context_window[-5:] if 'test' in str(e).lower()]
+                if len(test_runs) >= 2:
+                    return True
+        return False
+
+
+def timed(label: str, count: int, fn) -> float:
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34}{elapsed * 1000:>9.1f} ms  {count / elapsed:>12,.0f} events/s")
+    return result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    print("⏱️  Pattern Engine Benchmark")
+    print("=" * 72)
+    events = make_events(n)
+    categorizer = ActivityCategorizer(PATTERNS_FILE)
+    engine = categorizer.engine
+    print(f"Events: {n:,}  Categories: {len(engine.categories)}\n")
+
+    legacy = LegacyMatcher(categorizer.patterns)
+    timed("Legacy matching", n, lambda: [legacy.determine(e) for e in events])
+
+    fields = timed("Projection (EventText)", n, lambda: [EventText(e) for e in events])
+    timed("Engine, patterns only", n, lambda: [engine.match_rank(f) for f in fields])
+
+    fresh = make_events(n)
+    timed("categorize_batch (full)", n, lambda: categorizer.categorize_batch(fresh))
+
+    # Every family now contributes: count hits per family-backed category
+    counts = {}
+    for event in fresh:
+        counts[event['category']] = counts.get(event['category'], 0) + 1
+    print("\nCategories: " + ", ".join(f"{k} {v}" for k, v in sorted(counts.items())))
+
+    print("\n" + "=" * 72)
+    ok = all(counts.get(c) for c in ('debugging', 'learning', 'feature_development',
+                                     'refactoring', 'bugfix', 'configuration'))
+    print("✅ Every pattern family matched" if ok else "❌ Some pattern family never matched")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-command overhead of the generated shell wrapper
+
+Compares the legacy alias wrapper (forks date, cat, rm and pwd for every
+command) with the current preexec/precmd hooks from
+ShellMonitor.render_shell_wrapper, which buffer events in the shell and
+flush them in batches.
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from capture.shell_monitor import ShellMonitor
+
+# The wrapper as generated before the builtin-only rewrite
+LEGACY_WRAPPER = r'''#!/bin/bash
+export KB_CAPTURE_DIR="{capture_dir}"
+
+kb_capture_command() {
+    local cmd="$1"
+    shift
+    local args="$@"
+    local start_time=$(date +%s)
+    local working_dir=$(pwd)
+    command "$cmd" "$args"
+    local exit_code=$?
+    local end_time=$(date +%s)
+    local duration=$((end_time - start_time))
+    cat > /tmp/kb_event_$$.json <<EOF
+{
+    "type": "shell_command",
+    "timestamp": "$(date -u +"%Y-%m-%dT%H:%M:%SZ")",
+    "data": {
+        "command": "$cmd",
+        "args": "$args",
+        "exit_code": $exit_code,
+        "duration": $duration,
+        "working_dir": "$working_dir"
+    }
+}
+EOF
+    cat /tmp/kb_event_$$.json >> "$KB_CAPTURE_DIR/shell_events.jsonl"
+    rm /tmp/kb_event_$$.json
+    return $exit_code
+}
+'''
+
+# Prints total seconds for N runs of the given command
+TIMING_LOOP = '''
+{setup}
+start=$EPOCHREALTIME
+for ((i = 0; i < {runs}; i++)); do {command}; done
+end=$EPOCHREALTIME
+echo "$start $end"
+# Write out the last partial batch
+if type kb_flush > /dev/null 2>&1; then kb_flush; fi
+'''
+
+
+def time_loop(shell: str, setup: str, command: str, runs: int) -> float:
+    """Run a command N times inside one shell and return seconds per run"""
+    script = TIMING_LOOP.format(setup=setup, runs=runs, command=command)
+    args = [shell, '-f', '-c', script] if shell.endswith('zsh') else [shell, '--norc', '-c', script]
+    result = subprocess.run(args, capture_output=True, text=True, check=True)
+    start, end = result.stdout.split()[-2:]
+    return (float(end.replace(',', '.')) - float(start.replace(',', '.'))) / runs
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    print("⏱️  Shell Wrapper Overhead Benchmark")
+    print("=" * 60)
+    print(f"Runs per measurement: {runs}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        capture_dir = Path(tmp) / "capture"
+        capture_dir.mkdir()
+
+        legacy = Path(tmp) / "legacy_wrapper.sh"
+        legacy.write_text(LEGACY_WRAPPER.replace('{capture_dir}', str(capture_dir)))
+        current = Path(tmp) / "shell_wrapper.sh"
+        current.write_text(ShellMonitor.render_shell_wrapper(capture_dir))
+
+        # The hook pair is what an interactive shell runs around each command line
+        legacy_cmd = 'kb_capture_command true'
+        hooks_cmd = "kb_command_start 'true'; command true; kb_command_end $?"
+
+        cases = [('bash', 'legacy', legacy, legacy_cmd), ('bash', 'current', current, hooks_cmd)]
+        zsh = shutil.which('zsh')
+        if zsh:
+            cases.append((zsh, 'current', current, hooks_cmd))
+        else:
+            print("(zsh not found, skipping zsh measurement)")
+
+        print(f"\n{'shell':<8}{'wrapper':<10}{'bare':>12}{'wrapped':>12}{'overhead':>12}")
+        print("-" * 54)
+        for shell, label, wrapper, command in cases:
+            setup = 'zmodload zsh/datetime' if shell.endswith('zsh') else ''
+            bare = time_loop(shell, setup, 'command true', runs)
+            wrapped = time_loop(shell, f'{setup}\nsource {wrapper}', command, runs)
+            print(f"{os.path.basename(shell):<8}{label:<10}"
+                  f"{bare * 1e6:>10.1f}µs{wrapped * 1e6:>10.1f}µs{(wrapped - bare) * 1e6:>10.1f}µs")
+
+        lines = sum(1 for _ in open(capture_dir / "shell_events.jsonl"))
+        print(f"\nLines written: {lines}")
+
+    print("\n" + "=" * 60)
+    print("✅ Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
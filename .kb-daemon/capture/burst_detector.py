@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Burst Detector - Collapses file change storms into a single bulk event
+
+Branch switches, dependency installs and code generators can touch
+thousands of files a second. Each event is held for one window: once a
+project's event rate crosses the threshold, the held events and everything
+after them are aggregated, and a single `bulk_change` event is emitted
+after the storm goes quiet. Events still held when their window passes
+without a storm are released to be queued one by one.
+"""
+
+import random
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class BurstDetector:
+    """Per-project rate tracking with an aggregate mode for event storms"""
+
+    def __init__(self, threshold: int = 50, window_seconds: float = 1.0,
+                 quiet_seconds: float = 2.0, sample_size: int = 20):
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self.quiet_seconds = quiet_seconds
+        self.sample_size = sample_size
+
+        self.lock = threading.Lock()
+        self.held = {}    # project -> deque of (time, event) within the last window
+        self.bursts = {}  # project -> aggregate state while in aggregate mode
+
+    def offer(self, project: str, event: Dict, now: Optional[float] = None) -> List[Dict]:
+        """
+        Record an event for a project.
+        Returns the project's held events whose window has passed without a
+        storm; they (and only they) should be queued individually.
+        """
+        now = now if now is not None else time.time()
+
+        with self.lock:
+            burst = self.bursts.get(project)
+            if burst is not None:
+                self._add_to_burst(burst, event, now)
+                return []
+
+            held = self.held.setdefault(project, deque())
+            held.append((now, event))
+            ready = self._release(held, now)
+
+            if len(held) >= self.threshold:
+                # Rate crossed the threshold: the held events start the burst
+                burst = self._new_burst(held[0][0])
+                for held_time, held_event in held:
+                    self._add_to_burst(burst, held_event, held_time)
+                self.bursts[project] = burst
+                del self.held[project]
+
+            return ready
+
+    def release_held(self, now: Optional[float] = None, force: bool = False) -> List[Dict]:
+        """Held events whose window has passed (all of them with force)"""
+        now = now if now is not None else time.time()
+        ready = []
+
+        with self.lock:
+            for project, held in list(self.held.items()):
+                if force:
+                    ready.extend(event for _, event in held)
+                    held.clear()
+                else:
+                    ready.extend(self._release(held, now))
+                if not held:
+                    del self.held[project]
+
+        return ready
+
+    def flush_expired(self, now: Optional[float] = None, force: bool = False) -> List[Dict]:
+        """Close bursts that have gone quiet and return their bulk events"""
+        now = now if now is not None else time.time()
+        closed = []
+
+        with self.lock:
+            for project, burst in list(self.bursts.items()):
+                if force or now - burst['last_event'] >= self.quiet_seconds:
+                    del self.bursts[project]
+                    closed.append(self._bulk_event(project, burst))
+
+        return closed
+
+    def active_projects(self) -> List[str]:
+        """Projects currently in aggregate mode"""
+        with self.lock:
+            return list(self.bursts)
+
+    def _release(self, held: deque, now: float) -> List[Dict]:
+        """Pop held events too old to be part of a burst that includes now"""
+        ready = []
+        while held and now - held[0][0] > self.window_seconds:
+            ready.append(held.popleft()[1])
+        return ready
+
+    def _new_burst(self, now: float) -> Dict:
+        """Fresh aggregate state"""
+        return {
+            'started': now,
+            'last_event': now,
+            'total': 0,
+            'max_importance': 0,
+            'by_category': Counter(),
+            'by_extension': Counter(),
+            'sample_paths': []
+        }
+
+    def _add_to_burst(self, burst: Dict, event: Dict, now: float):
+        """Fold one event into the aggregate"""
+        burst['last_event'] = now
+        burst['total'] += 1
+        burst['max_importance'] = max(burst['max_importance'], event.get('importance', 0))
+        burst['by_category'][event.get('category', 'unknown')] += 1
+
+        path = event.get('data', {}).get('path', '')
+        burst['by_extension'][Path(path).suffix or '(none)'] += 1
+
+        # Reservoir sampling keeps a uniform sample in fixed memory
+        sample = burst['sample_paths']
+        if len(sample) < self.sample_size:
+            sample.append(path)
+        else:
+            slot = random.randrange(burst['total'])
+            if slot < self.sample_size:
+                sample[slot] = path
+
+    def _bulk_event(self, project: str, burst: Dict) -> Dict:
+        """Build the single event that stands in for a whole burst"""
+        return {
+            'type': 'bulk_change',
+            'timestamp': datetime.utcfromtimestamp(burst['started']).isoformat() + 'Z',
+            'category': 'bulk_change',
+            'importance': max(burst['max_importance'], 5),
+            'data': {
+                'path': project,
+                'is_directory': True,
+                'files_changed': burst['total'],
+                'duration': round(burst['last_event'] - burst['started'], 3),
+                'by_category': dict(burst['by_category']),
+                'by_extension': dict(burst['by_extension'].most_common(20)),
+                'sample_paths': sorted(burst['sample_paths'])
+            }
+        }
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Command Classifier - One-pass category and importance for shell commands
+
+Built once from the `command_importance` tables in config/patterns.yml: a
+prefix trie over command tokens resolves specific commands ("npm install",
+"git status"), and a single combined regex finds every keyword the old
+substring checks looked for. The classifier reloads itself when
+patterns.yml changes.
+"""
+
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import yaml
+
+# Base importance for each command_importance level
+LEVEL_IMPORTANCE = {'high': 8, 'medium': 6, 'low': 2}
+
+# Keyword -> the checks it feeds. Matching is by substring, as before.
+KEYWORDS = {
+    'install': {'important', 'high', 'dep_add'},
+    'uninstall': {'important', 'dep_remove'},
+    'add': {'important', 'dep_add'},
+    'remove': {'important', 'dep_remove'},
+    'update': {'important'},
+    'upgrade': {'important'},
+    'build': {'important', 'medium', 'build'},
+    'test': {'important', 'medium', 'test'},
+    'deploy': {'important', 'high'},
+    'push': {'important', 'high'},
+    'pull': {'important'},
+    'merge': {'important', 'high'},
+    'rebase': {'important'},
+    'commit': {'important', 'medium'},
+    'apply': {'high', 'apply'},
+    'run': {'run'},
+    'compose': {'compose'},
+    'get': {'get'},
+}
+
+PACKAGE_MANAGERS = {'npm', 'yarn', 'pnpm', 'pip', 'cargo'}
+TEST_RUNNERS = {'pytest', 'jest', 'mocha'}
+
+
+class CommandClassifier:
+    """Compiled classifier for shell commands"""
+
+    def __init__(self, patterns_file: Path, check_interval: float = 5.0):
+        self.patterns_file = Path(patterns_file)
+        self.check_interval = check_interval
+
+        self.trie = {}
+        self.mtime = None
+        self.last_check = 0.0
+
+        # Longest keywords first so "uninstall" wins over "install"
+        alternation = '|'.join(sorted(map(re.escape, KEYWORDS), key=len, reverse=True))
+        self.keyword_regex = re.compile(alternation)
+
+        self._load()
+
+    def classify(self, command: str, args: str = '', duration: float = 0) -> Dict:
+        """
+        Classify a command in one pass.
+        Returns: {'category': str, 'importance': int, 'important': bool}
+        """
+        self._reload_if_changed()
+
+        full_command = f"{command} {args}".lower()
+        tags = set()
+        for match in self.keyword_regex.finditer(full_command):
+            tags |= KEYWORDS[match.group()]
+
+        level = self._lookup(command, args)
+
+        return {
+            'category': self._category(command, args, tags),
+            'importance': self._importance(level, tags, duration),
+            'important': (level in ('high', 'medium')
+                          or (level is None and 'important' in tags)
+                          or duration > 5)
+        }
+
+    def _category(self, command: str, args: str, tags: set) -> str:
+        """Category from the command and its keyword tags"""
+        if command in PACKAGE_MANAGERS:
+            if 'dep_add' in tags and 'dep_remove' not in tags:
+                return 'dependency_add'
+            if 'dep_remove' in tags:
+                return 'dependency_remove'
+            if 'test' in tags:
+                return 'testing'
+            if 'build' in tags:
+                return 'building'
+            return 'shell_command'
+
+        if command in TEST_RUNNERS or 'test' in tags:
+            return 'testing'
+
+        if command == 'docker':
+            for tag, category in (('build', 'docker_build'), ('run', 'docker_run'),
+                                  ('compose', 'docker_compose')):
+                if tag in tags:
+                    return category
+        elif command == 'git':
+            git_subcmd = args.split()[0] if args else ''
+            return f'git_{git_subcmd}' if git_subcmd else 'git'
+        elif command == 'kubectl':
+            if 'apply' in tags:
+                return 'deploy'
+            if 'get' in tags:
+                return 'inspect'
+
+        return 'shell_command'
+
+    def _importance(self, level: Optional[str], tags: set, duration: float) -> int:
+        """Base importance from patterns.yml or keywords, adjusted for duration"""
+        if level:
+            importance = LEVEL_IMPORTANCE[level]
+        # Medium keywords are checked last in the original rules, so they win
+        elif 'medium' in tags:
+            importance = 6
+        elif 'high' in tags:
+            importance = 8
+        else:
+            importance = 5
+
+        if duration > 30:
+            importance += 1
+        if duration > 60:
+            importance += 1
+
+        return min(importance, 10)
+
+    def _lookup(self, command: str, args: str) -> Optional[str]:
+        """Longest command_importance entry matching the command's tokens"""
+        node = self.trie.get(command)
+        if node is None:
+            return None
+
+        level = node.get(None)
+        for token in args.split():
+            if token.startswith('-'):
+                continue
+            node = node.get(token)
+            if node is None:
+                break
+            level = node.get(None, level)
+        return level
+
+    def _reload_if_changed(self):
+        """Rebuild the trie when patterns.yml changes, checking at most every few seconds"""
+        now = time.time()
+        if now - self.last_check < self.check_interval:
+            return
+        self.last_check = now
+
+        try:
+            mtime = os.stat(self.patterns_file).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self.mtime:
+            self._load()
+
+    def _load(self):
+        """Compile the command_importance tables into a token trie"""
+        try:
+            mtime = os.stat(self.patterns_file).st_mtime_ns
+            with open(self.patterns_file) as f:
+                patterns = yaml.safe_load(f) or {}
+        except (OSError, yaml.YAMLError) as e:
+            # Keep the previous tables while the file is mid-edit
+            print(f"Error loading command patterns: {e}")
+            return
+
+        trie = {}
+        for level, commands in (patterns.get('command_importance') or {}).items():
+            if level not in LEVEL_IMPORTANCE:
+                continue
+            for entry in commands or []:
+                tokens = str(entry).split()
+                if not tokens:
+                    continue
+                node = trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                node[None] = level  # None marks the end of an entry
+
+        self.trie = trie
+        self.mtime = mtime
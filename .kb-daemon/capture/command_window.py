@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Command Window - Time-based sliding window over recent shell commands
+
+Per-category counters are updated as commands enter and leave the window,
+so pattern detection costs O(log n) per command instead of rescanning history.
+Commands expire by their own timestamp, not count or arrival order, and failures are remembered per command
+line and directory, so interleaved terminals don't mask each other's
+errors and fixes.
+"""
+
+import time
+import heapq
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+
+class CommandWindow:
+    """Sliding-window counters and a failure map for shell commands"""
+
+    def __init__(self, window_seconds: float = 600, failure_ttl: float = 3600):
+        self.window_seconds = window_seconds
+        self.failure_ttl = failure_ttl
+
+        self.entries = []  # heap of (timestamp, category, failed)
+        self.counts = Counter()  # category -> commands in the window
+        self.failed_counts = Counter()  # category -> failed commands in the window
+        self.newest = 0.0
+
+        self.failures = {}  # (working_dir, command line) -> failure timestamp
+
+    def add(self, event: Dict) -> Tuple[List[str], bool]:
+        """
+        Record a classified command event.
+        Returns (patterns detected, whether it fixes an earlier failure).
+        """
+        data = event.get('data', {})
+        ts = self._event_time(event)
+        category = event.get('category', 'shell_command')
+        failed = data.get('exit_code', 0) != 0
+
+        heapq.heappush(self.entries, (ts, category, failed))
+        self.counts[category] += 1
+        if failed:
+            self.failed_counts[category] += 1
+
+        self.newest = max(self.newest, ts)
+        self._expire()
+
+        return self._patterns(), self._track_failure(data, ts, failed)
+
+    def _expire(self):
+        """Drop commands older than the window, oldest timestamp first"""
+        cutoff = self.newest - self.window_seconds
+        while self.entries and self.entries[0][0] < cutoff:
+            _, category, failed = heapq.heappop(self.entries)
+            self._decrement(self.counts, category)
+            if failed:
+                self._decrement(self.failed_counts, category)
+
+    def _decrement(self, counter: Counter, key: str):
+        """Decrement a counter, removing keys that reach zero"""
+        counter[key] -= 1
+        if counter[key] <= 0:
+            del counter[key]
+
+    def _patterns(self) -> List[str]:
+        """Patterns visible in the current window, from counters only"""
+        patterns = []
+        if len(self.entries) < 3:
+            return patterns
+
+        # Repeated test runs with at least one failure
+        if self.counts['testing'] >= 3 and self.failed_counts['testing']:
+            patterns.append('debugging_session')
+
+        if self.counts['dependency_add'] + self.counts['dependency_remove'] >= 2:
+            patterns.append('dependency_management')
+
+        if self.counts['building'] and self.counts['testing']:
+            patterns.append('build_test_cycle')
+
+        return patterns
+
+    def _track_failure(self, data: Dict, ts: float, failed: bool) -> bool:
+        """Remember failures; a later success of the same command fixes one"""
+        key = (data.get('working_dir', ''), f"{data.get('command', '')} {data.get('args', '')}".strip())
+
+        if failed:
+            self.failures[key] = ts
+            if len(self.failures) > 1000:
+                self._prune_failures()
+            return False
+
+        failed_at = self.failures.pop(key, None)
+        return failed_at is not None and ts - failed_at <= self.failure_ttl
+
+    def _prune_failures(self):
+        """Forget failures older than the TTL"""
+        cutoff = self.newest - self.failure_ttl
+        for key in [k for k, ts in self.failures.items() if ts < cutoff]:
+            del self.failures[key]
+
+    def _event_time(self, event: Dict) -> float:
+        """Epoch time of an event, falling back to now"""
+        timestamp = event.get('timestamp')
+        if timestamp:
+            try:
+                return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp()
+            except ValueError:
+                pass
+        return time.time()
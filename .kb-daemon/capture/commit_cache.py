@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Commit Metadata Cache - Remembers what git enrichment already looked up
+
+Commits are immutable, so author, message, changed files and line stats
+fetched for one merge stay valid for every later merge, rebase or checkout
+that touches the same commits. Entries are kept in a bounded LRU keyed by
+(repo, hash) and persisted as gzipped JSON with repository paths stored
+once. The user's identity is cached per repository for a short time, since
+user.email can differ between repositories and change while running.
+"""
+
+import gzip
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+class CommitMetadataCache:
+    """Bounded LRU of commit metadata with per-repo identities and hit metrics"""
+
+    FORMAT_VERSION = 2
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 20000,
+                 identity_ttl: float = 300, save_interval: float = 60):
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self.identity_ttl = identity_ttl
+        self.save_interval = save_interval
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()  # one writer of the cache file at a time
+
+        self.entries = OrderedDict()  # (repo, hash) -> metadata dict
+        self.identities = {}  # repo -> (email, fetched at)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.identity_hits = 0
+        self.identity_misses = 0
+
+        self.dirty = False
+        self.last_save = time.time()
+        self._load()
+
+    @staticmethod
+    def entry(email: str, name: str, message: str, files: List[str],
+              insertions: int, deletions: int) -> Dict:
+        """Metadata for one commit; the subject is the message's first line"""
+        return {
+            'author_email': email,
+            'author_name': name,
+            'subject': message.split('\n', 1)[0],
+            'message': message,
+            'files': files,
+            'insertions': insertions,
+            'deletions': deletions
+        }
+
+    def get_many(self, repo: str, hashes: List[str]) -> Tuple[Dict[str, Dict], List[str]]:
+        """Cached metadata for the commits that have it, and the hashes that don't"""
+        found, missing = {}, []
+        with self.lock:
+            for commit_hash in hashes:
+                key = (repo, commit_hash)
+                info = self.entries.get(key)
+                if info is None:
+                    missing.append(commit_hash)
+                else:
+                    self.entries.move_to_end(key)
+                    found[commit_hash] = info
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def put_many(self, repo: str, metadata: Dict[str, Dict]):
+        """Store freshly fetched metadata, evicting the least recently used"""
+        if not metadata:
+            return
+        with self.lock:
+            for commit_hash, info in metadata.items():
+                self.entries[(repo, commit_hash)] = info
+                self.entries.move_to_end((repo, commit_hash))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            self.dirty = True
+
+    def get_identity(self, repo: str) -> Optional[str]:
+        """The user's email for a repo, if looked up recently"""
+        with self.lock:
+            cached = self.identities.get(repo)
+            if cached and time.time() - cached[1] < self.identity_ttl:
+                self.identity_hits += 1
+                return cached[0]
+            self.identity_misses += 1
+            return None
+
+    def set_identity(self, repo: str, email: str):
+        """Remember the user's email for a repo"""
+        with self.lock:
+            self.identities[repo] = (email, time.time())
+
+    def maybe_save(self):
+        """Persist if there are changes and the save interval has passed"""
+        if self.dirty and time.time() - self.last_save >= self.save_interval:
+            self.save()
+
+    def save(self):
+        """Persist entries (oldest first) with each repo path stored once"""
+        if not self.path:
+            return
+        with self.save_lock:
+            self._write()
+
+    def _write(self):
+        """Snapshot under the cache lock, then write and rename atomically"""
+        with self.lock:
+            repos = {}
+            commits = []
+            for (repo, commit_hash), info in self.entries.items():
+                index = repos.setdefault(repo, len(repos))
+                commits.append([index, commit_hash, info['author_email'], info['author_name'],
+                                info['message'], info['files'], info['insertions'],
+                                info['deletions']])
+            payload = {
+                'version': self.FORMAT_VERSION,
+                'repos': list(repos),
+                'commits': commits,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+            self.dirty = False
+            self.last_save = time.time()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.path.with_suffix('.tmp')
+        with gzip.open(tmp_file, 'wt', encoding='utf-8') as f:
+            json.dump(payload, f, separators=(',', ':'))
+        os.replace(tmp_file, self.path)
+
+    def stats(self) -> Dict:
+        """Cache metrics"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            identity_lookups = self.identity_hits + self.identity_misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'identity_hit_rate': (round(self.identity_hits / identity_lookups, 3)
+                                      if identity_lookups else 0.0)
+            }
+
+    def _load(self):
+        """Restore persisted entries; a missing or unreadable file starts empty"""
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError, EOFError):
+            return
+        if payload.get('version') != self.FORMAT_VERSION:
+            return
+
+        repos = payload.get('repos', [])
+        for index, commit_hash, email, name, message, files, insertions, deletions \
+                in payload.get('commits', [])[-self.max_entries:]:
+            self.entries[(repos[index], commit_hash)] = self.entry(
+                email, name, message, files, insertions, deletions
+            )
+        self.hits = payload.get('hits', 0)
+        self.misses = payload.get('misses', 0)
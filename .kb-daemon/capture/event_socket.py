@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Event Socket - Unix datagram ingestion endpoint for hooks and wrappers
+
+Producers send one JSON event (or a newline-separated batch) per datagram,
+so each event arrives whole in a single syscall and can never interleave
+with another terminal's partial line. When the daemon is down the socket
+is gone and producers append to the JSONL capture files instead, which the
+daemon's tailers backfill from on the next start.
+
+The git hooks send with socat or nc when either is installed. The
+interactive shell wrappers keep their fork-free file append, since bash
+and zsh cannot open a datagram socket without forking a helper.
+"""
+
+import os
+import json
+import socket
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Union
+
+# Datagrams larger than this are rejected by some platforms (macOS defaults
+# to 2 KiB); senders fall back to the JSONL file in that case
+MAX_DATAGRAM = 64 * 1024
+
+
+class EventSocketListener:
+    """Receives JSON event datagrams and routes them to capture handlers"""
+
+    def __init__(self, socket_path: Path, route: Callable[[Dict], None]):
+        self.socket_path = Path(socket_path)
+        self.route = route
+        self.running = False
+        self.sock = None
+
+        self.received = 0
+        self.rejected = 0
+
+    def start(self):
+        """Bind the socket and serve until stop() is called"""
+        self._bind()
+        self.running = True
+
+        while self.running:
+            try:
+                payload = self.sock.recv(MAX_DATAGRAM)
+            except socket.timeout:
+                continue
+            except OSError:
+                if self.running:
+                    print("Error receiving on event socket")
+                break
+
+            for event in self._decode(payload):
+                try:
+                    self.route(event)
+                    self.received += 1
+                except Exception as e:
+                    self.rejected += 1
+                    print(f"Error routing socket event: {e}")
+
+        self._close()
+
+    def stop(self):
+        """Stop serving and remove the socket file"""
+        self.running = False
+        self._close()
+
+    def _bind(self):
+        """Create the datagram socket, replacing a stale one"""
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        except OSError:
+            pass
+        self.sock.bind(str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        self.sock.settimeout(1.0)
+
+    def _close(self):
+        """Close the socket and unlink its path"""
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _decode(self, payload: bytes) -> List[Dict]:
+        """A datagram holds one JSON document or one event per line"""
+        text = payload.decode('utf-8', errors='replace').strip()
+        if not text:
+            return []
+
+        try:
+            event = json.loads(text, strict=False)
+            return [event] if isinstance(event, dict) else []
+        except json.JSONDecodeError:
+            pass
+
+        events = []
+        for line in text.splitlines():
+            try:
+                event = json.loads(line, strict=False)
+            except json.JSONDecodeError:
+                self.rejected += 1
+                continue
+            if isinstance(event, dict):
+                events.append(event)
+        return events
+
+
+def send_event(socket_path: Path, events: Union[Dict, List[Dict]], fallback_file: Path) -> bool:
+    """
+    Send events to the daemon in one datagram.
+    Falls back to appending to `fallback_file` when the daemon isn't
+    listening. Returns True if the socket accepted the datagram.
+    """
+    if isinstance(events, dict):
+        events = [events]
+    payload = ''.join(json.dumps(e, separators=(',', ':')) + '\n' for e in events).encode()
+
+    if len(payload) <= MAX_DATAGRAM:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            sock.sendto(payload, str(socket_path))
+            return True
+        except OSError:
+            pass
+        finally:
+            sock.close()
+
+    # O_APPEND keeps each single write whole against concurrent writers
+    fd = os.open(fallback_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, payload)
+    finally:
+        os.close(fd)
+    return False
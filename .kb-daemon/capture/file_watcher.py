@@ -6,12 +6,20 @@ File Watcher - Monitors file system changes for intelligent capture
 import os
 import time
 import threading
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Set, Optional
 from queue import Queue
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler, FileSystemEvent
+from watchdog.events import (
+    FileSystemEventHandler, FileSystemEvent, FileCreatedEvent, FileModifiedEvent,
+    FileDeletedEvent
+)
+
+from capture.reconciler import SnapshotReconciler
+from capture.burst_detector import BurstDetector
+from capture.fingerprint_cache import FingerprintCache
 
 class FileWatcher:
     """Watches file system for relevant changes"""
@@ -21,6 +29,7 @@ class FileWatcher:
         self.config = config
         self.running = False
         self.observer = None
+        self.base_path = base_path or Path.home()
         
         # Paths to watch
         self.watch_paths = self._get_watch_paths()
@@ -35,6 +44,44 @@ class FileWatcher:
         # Track recent changes to detect patterns
         self.recent_changes = []
         
+        # Offline/overflow recovery via persisted snapshots
+        self.reconciler = SnapshotReconciler(
+            self.base_path / "capture" / "snapshots",
+            self._is_ignored_name,
+            max_workers=config.get('reconcile_workers', 8)
+        )
+        self.reconcile_lock = threading.Lock()
+        
+        # Paths the live watcher reported since the last reconcile (True if
+        # the file exists after the event), so a reconcile doesn't report
+        # them as created or deleted again
+        self.live_paths = OrderedDict()
+        self.live_lock = threading.Lock()
+        self.max_live_paths = config.get('reconcile_live_paths', 50000)
+        
+        # inotify queue overflows are dropped silently by watchdog, so an
+        # event storm above this rate is treated as a likely overflow
+        self.overflow_event_rate = config.get('overflow_event_rate', 2000)
+        self._rate_second = 0
+        self._rate_count = 0
+        self._last_event_time = 0.0
+        self._overflow_suspected = False
+        self._restart_at = 0.0  # next attempt to replace a dead observer
+        
+        # Collapse per-project event storms into single bulk_change events
+        self.burst_detector = BurstDetector(
+            threshold=config.get('burst_threshold', 50),
+            window_seconds=config.get('burst_window_seconds', 1.0),
+            quiet_seconds=config.get('burst_quiet_seconds', 2.0),
+            sample_size=config.get('burst_sample_size', 20)
+        )
+        
+        # Sampled fingerprints estimate how much a file changed
+        self.fingerprints = FingerprintCache(
+            max_bytes=int(config.get('fingerprint_cache_mb', 8) * 1024 * 1024)
+        )
+        self.fingerprint_stats_file = self.base_path / "capture" / "fingerprint_stats.json"
+        
     def _get_watch_paths(self) -> List[Path]:
         """Get list of paths to watch"""
         paths = []
@@ -47,7 +94,8 @@ class FileWatcher:
                 if project.is_dir() and not project.name.startswith('.'):
                     paths.append(project)
                     
-        return paths[:5]  # Limit to 5 most recent projects to avoid overwhelming
+        # Limit to the most recent projects to avoid overwhelming
+        return paths[:self.config.get('max_watch_paths', 5)]
         
     def start(self):
         """Start watching file system"""
@@ -56,13 +104,10 @@ class FileWatcher:
             return
             
         self.running = True
-        self.observer = Observer()
-        
-        event_handler = KBFileEventHandler(self)
+        self.observer = self._new_observer()
         
         for path in self.watch_paths:
             if path.exists():
-                self.observer.schedule(event_handler, str(path), recursive=True)
                 print(f"Watching: {path}")
                 
         self.observer.start()
@@ -71,6 +116,28 @@ class FileWatcher:
         pattern_thread = threading.Thread(target=self._detect_patterns, daemon=True)
         pattern_thread.start()
         
+        # Catch up on changes made while the daemon was down. The observer is
+        # already running, so nothing falls between the scan and live events.
+        if self.config.get('reconcile_on_start', True):
+            threading.Thread(target=self.reconcile, args=('startup',), daemon=True).start()
+            
+        # Watch for event storms that may have overflowed the inotify queue
+        overflow_thread = threading.Thread(target=self._watch_overflow, daemon=True)
+        overflow_thread.start()
+        
+        # Emit bulk events once bursts go quiet
+        burst_thread = threading.Thread(target=self._flush_bursts, daemon=True)
+        burst_thread.start()
+        
+    def _new_observer(self) -> Observer:
+        """An observer scheduled on every watched path"""
+        observer = Observer()
+        event_handler = KBFileEventHandler(self)
+        for path in self.watch_paths:
+            if path.exists():
+                observer.schedule(event_handler, str(path), recursive=True)
+        return observer
+        
     def stop(self):
         """Stop watching"""
         self.running = False
@@ -78,23 +145,163 @@ class FileWatcher:
             self.observer.stop()
             self.observer.join()
             
-    def should_ignore(self, path: str) -> bool:
-        """Check if a path should be ignored"""
-        path_obj = Path(path)
+            # Don't lose a burst that was still aggregating, or held events
+            for bulk_event in self.burst_detector.flush_expired(force=True):
+                self.capture_queue.put(bulk_event)
+            for event_data in self.burst_detector.release_held(force=True):
+                self._emit(event_data)
+                
+            # Persist snapshots so the next start only sees offline changes
+            try:
+                with self.reconcile_lock:
+                    self.reconciler.reconcile(self.watch_paths)
+            except Exception as e:
+                print(f"Error saving file snapshots: {e}")
+            self.fingerprints.write_stats(self.fingerprint_stats_file)
+            
+    def reconcile(self, reason: str = 'startup') -> int:
+        """
+        Diff watched projects against their snapshots and emit synthetic
+        change events for anything the live watcher missed
+        """
+        with self.reconcile_lock:
+            # Live events after this point are diffed by the next reconcile
+            with self.live_lock:
+                live, self.live_paths = self.live_paths, OrderedDict()
+            try:
+                results = self.reconciler.reconcile(self.watch_paths)
+            except Exception as e:
+                print(f"Error reconciling file snapshots: {e}")
+                return 0
+                
+        emitted = 0
+        event_classes = {
+            'created': FileCreatedEvent,
+            'modified': FileModifiedEvent,
+            'deleted': FileDeletedEvent
+        }
+        for root, changes in results.items():
+            for event_type, path in changes:
+                reported = live.get(path)
+                if event_type == 'created' and reported:
+                    # Already reported live; only a later change is news,
+                    # and the fingerprint comparison filters the rest
+                    event_type = 'modified'
+                elif event_type == 'deleted' and reported is False:
+                    continue
+                event_class = event_classes.get(event_type)
+                if event_class:
+                    self.process_file_event(event_class(path), synthetic_reason=reason)
+                    emitted += reported is None
+                    
+        if emitted:
+            print(f"Reconciled {emitted} missed file changes ({reason})")
+        return emitted
         
-        # Check each part of the path
-        for part in path_obj.parts:
-            for pattern in self.ignore_patterns:
-                if pattern.startswith('*'):
-                    if part.endswith(pattern[1:]):
-                        return True
-                elif part == pattern:
-                    return True
+    def _watch_overflow(self):
+        """Reconcile once a suspected overflow storm has settled"""
+        while self.running:
+            time.sleep(1)
+            
+            # A dead emitter thread loses every later event: replace it,
+            # then reconcile once for what it missed
+            if self.observer and not self.observer.is_alive() and time.time() >= self._restart_at:
+                if self._restart_observer():
+                    self._overflow_suspected = True
+                else:
+                    self._restart_at = time.time() + 60
                     
+            if self._overflow_suspected and time.time() - self._last_event_time >= 2:
+                self._overflow_suspected = False
+                self.reconcile('overflow')
+                
+    def _restart_observer(self) -> bool:
+        """Start a fresh observer in place of a dead one"""
+        try:
+            observer = self._new_observer()
+            observer.start()
+        except Exception as e:
+            print(f"Error restarting file observer, retrying in 60s: {e}")
+            return False
+            
+        self.observer = observer
+        print("File observer stopped unexpectedly and was restarted")
+        return True
+        
+    def _note_live(self, event: FileSystemEvent):
+        """Record whether a live event left its path(s) existing"""
+        with self.live_lock:
+            if event.event_type == 'moved':
+                self.live_paths[event.src_path] = False
+                self.live_paths[event.dest_path] = True
+                self.live_paths.move_to_end(event.src_path)
+                self.live_paths.move_to_end(event.dest_path)
+            else:
+                self.live_paths[event.src_path] = event.event_type != 'deleted'
+                self.live_paths.move_to_end(event.src_path)
+            while len(self.live_paths) > self.max_live_paths:
+                self.live_paths.popitem(last=False)
+                
+    def _flush_bursts(self):
+        """
+        Queue bulk_change events for settled bursts and release held events.
+        Also publishes the fingerprint cache stats once a minute.
+        """
+        stats_written = 0.0
+        while self.running:
+            time.sleep(0.5)
+            for bulk_event in self.burst_detector.flush_expired():
+                self.capture_queue.put(bulk_event)
+            for event_data in self.burst_detector.release_held():
+                self._emit(event_data)
+            if time.time() - stats_written >= 60:
+                self.fingerprints.write_stats(self.fingerprint_stats_file)
+                stats_written = time.time()
+                
+    def _project_root_for(self, path: str) -> str:
+        """Watched project root that contains a path"""
+        for root in self.watch_paths:
+            root_str = str(root)
+            if path == root_str or path.startswith(root_str + os.sep):
+                return root_str
+        return str(Path(path).parent)
+        
+    def _track_event_rate(self):
+        """Count raw events per second to spot likely inotify overflows"""
+        now = time.time()
+        second = int(now)
+        if second != self._rate_second:
+            self._rate_second = second
+            self._rate_count = 0
+        self._rate_count += 1
+        self._last_event_time = now
+        
+        if self._rate_count > self.overflow_event_rate:
+            self._overflow_suspected = True
+            
+    def _is_ignored_name(self, name: str) -> bool:
+        """Check a single path component against the ignore patterns"""
+        for pattern in self.ignore_patterns:
+            if pattern.startswith('*'):
+                if name.endswith(pattern[1:]):
+                    return True
+            elif name == pattern:
+                return True
+                
         return False
         
-    def process_file_event(self, event: FileSystemEvent):
+    def should_ignore(self, path: str) -> bool:
+        """Check if a path should be ignored"""
+        # Check each part of the path
+        return any(self._is_ignored_name(part) for part in Path(path).parts)
+        
+    def process_file_event(self, event: FileSystemEvent, synthetic_reason: Optional[str] = None):
         """Process a file system event"""
+        if not synthetic_reason:
+            self._track_event_rate()
+            if not event.is_directory:
+                self._note_live(event)
+            
         if self.should_ignore(event.src_path):
             return
             
@@ -108,15 +315,37 @@ class FileWatcher:
                 'is_directory': event.is_directory
             }
         }
+        if synthetic_reason:
+            event_data['data']['synthetic'] = True
+            event_data['data']['reconcile_reason'] = synthetic_reason
         
         # Categorize the event
         category = self._categorize_file_event(event)
         if not category:
             return  # Skip unimportant events
             
+        # Estimate change magnitude; an identical fingerprint means this is a
+        # duplicate notification for a change we already reported
+        magnitude = None
+        if not event.is_directory:
+            change = self.fingerprints.compare(event.src_path)
+            if change:
+                if change['unchanged'] and event.event_type == 'modified':
+                    return
+                magnitude = 1.0 if event.event_type == 'created' else change['magnitude']
+                event_data['data']['size_delta'] = change['size_delta']
+            event_data['data']['change_magnitude'] = magnitude
+            
         event_data['category'] = category
-        event_data['importance'] = self._calculate_file_importance(event, category)
+        event_data['importance'] = self._calculate_file_importance(event, category, magnitude)
         
+        # Events wait out the burst window: a storm folds them into the
+        # project's bulk aggregate, otherwise they are emitted individually
+        for ready in self.burst_detector.offer(self._project_root_for(event.src_path), event_data):
+            self._emit(ready)
+            
+    def _emit(self, event_data: Dict):
+        """Queue a file event that wasn't part of a burst"""
         # Track for pattern detection
         self.recent_changes.append(event_data)
         if len(self.recent_changes) > 100:
@@ -157,7 +386,8 @@ class FileWatcher:
         # Skip other events
         return None
         
-    def _calculate_file_importance(self, event: FileSystemEvent, category: str) -> int:
+    def _calculate_file_importance(self, event: FileSystemEvent, category: str,
+                                   magnitude: Optional[float] = None) -> int:
         """Calculate importance of a file event"""
         importance = 3  # Base
         
@@ -176,7 +406,16 @@ class FileWatcher:
         if path.name in ['package.json', 'requirements.txt', 'Cargo.toml']:
             importance += 2
             
-        return min(importance, 10)
+        # Scale modifications by how much of the file changed
+        if magnitude is not None and event.event_type == 'modified':
+            if magnitude >= 0.7:
+                importance += 2
+            elif magnitude >= 0.3:
+                importance += 1
+            elif magnitude < 0.02:
+                importance -= 1
+                
+        return max(min(importance, 10), 1)
         
     def _detect_patterns(self):
         """Detect patterns in file changes"""
@@ -237,8 +476,9 @@ class KBFileEventHandler(FileSystemEventHandler):
         self.watcher.process_file_event(event)
         
     def on_deleted(self, event):
-        # Generally less important
-        pass
+        # Generally less important; only config and docs deletions are kept
+        # (the fingerprint is discarded when the file can't be read)
+        self.watcher.process_file_event(event)
         
     def on_moved(self, event):
         # Could indicate refactoring
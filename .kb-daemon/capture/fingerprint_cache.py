@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Fingerprint Cache - Cheap change magnitude estimates for watched files
+
+Each entry holds a file's size, mtime and CRCs of a fixed number of small
+blocks sampled at evenly spaced offsets. Comparing a fresh fingerprint with
+the cached one estimates how much of the file changed without reading it
+whole.
+"""
+
+import os
+import sys
+import json
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+class FingerprintCache:
+    """Bounded LRU of file fingerprints with hit/miss metrics"""
+
+    SAMPLE_COUNT = 16
+    SAMPLE_SIZE = 256
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # path -> (size, mtime_ns, packed CRCs)
+        self.bytes_used = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def compare(self, path: str) -> Optional[Dict]:
+        """
+        Fingerprint a file and compare it with the cached version.
+        Returns None if the file can't be read, otherwise:
+        {
+            'unchanged': bool,       # same size, mtime and samples
+            'magnitude': float|None, # 0.0-1.0, None without a baseline
+            'size_delta': int
+        }
+        """
+        fingerprint = self._fingerprint(path)
+        if fingerprint is None:
+            self.discard(path)
+            return None
+
+        with self.lock:
+            previous = self.entries.get(path)
+            if previous is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            self._store(path, fingerprint)
+
+        if previous is None:
+            return {'unchanged': False, 'magnitude': None, 'size_delta': 0}
+
+        return {
+            'unchanged': previous == fingerprint,
+            'magnitude': self._magnitude(previous, fingerprint),
+            'size_delta': fingerprint[0] - previous[0]
+        }
+
+    def discard(self, path: str):
+        """Drop a file from the cache (deleted or unreadable)"""
+        with self.lock:
+            entry = self.entries.pop(path, None)
+            if entry is not None:
+                self.bytes_used -= self._entry_size(path, entry)
+
+    def stats(self) -> Dict:
+        """Cache metrics"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes_used': self.bytes_used,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+    def write_stats(self, stats_file: Path):
+        """Publish stats() for `kb-daemon status` (write, then atomic rename)"""
+        try:
+            stats_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = stats_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(self.stats(), f)
+            os.replace(tmp_file, stats_file)
+        except OSError:
+            pass
+
+    @staticmethod
+    def read_stats(stats_file: Path) -> Optional[Dict]:
+        """Stats last published by the daemon's file watcher"""
+        try:
+            with open(stats_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, path: str, fingerprint: Tuple):
+        """Insert or refresh an entry and evict down to the memory cap"""
+        old = self.entries.pop(path, None)
+        if old is not None:
+            self.bytes_used -= self._entry_size(path, old)
+
+        self.entries[path] = fingerprint
+        self.bytes_used += self._entry_size(path, fingerprint)
+
+        while self.bytes_used > self.max_bytes and self.entries:
+            evicted_path, evicted = self.entries.popitem(last=False)
+            self.bytes_used -= self._entry_size(evicted_path, evicted)
+            self.evictions += 1
+
+    def _entry_size(self, path: str, fingerprint: Tuple) -> int:
+        """Approximate memory held by one entry"""
+        return (sys.getsizeof(path) + sys.getsizeof(fingerprint)
+                + sys.getsizeof(fingerprint[2]) + 64)  # + OrderedDict link overhead
+
+    def _fingerprint(self, path: str) -> Optional[Tuple]:
+        """Size, mtime and sampled block CRCs of a file"""
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return None
+
+        try:
+            st = os.fstat(fd)
+            size = st.st_size
+            crcs = []
+
+            if size <= self.SAMPLE_COUNT * self.SAMPLE_SIZE:
+                # Small file: read it once and split it into equal blocks
+                data = os.pread(fd, size, 0)
+                step = max(1, -(-len(data) // self.SAMPLE_COUNT))
+                for i in range(self.SAMPLE_COUNT):
+                    crcs.append(zlib.crc32(data[i * step:(i + 1) * step]))
+            else:
+                # First and last samples sit exactly on the file's edges
+                span = size - self.SAMPLE_SIZE
+                for i in range(self.SAMPLE_COUNT):
+                    offset = span * i // (self.SAMPLE_COUNT - 1)
+                    crcs.append(zlib.crc32(os.pread(fd, self.SAMPLE_SIZE, offset)))
+
+            return (size, st.st_mtime_ns, struct.pack(f'{self.SAMPLE_COUNT}I', *crcs))
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+
+    def _magnitude(self, old: Tuple, new: Tuple) -> float:
+        """
+        Estimate the changed fraction of a file.
+
+        Blocks are compared by position, so an insertion near the top shifts
+        every later sample and overestimates the change. That errs towards
+        reporting an edit as important rather than dropping it.
+        """
+        if old == new:
+            return 0.0
+
+        size_ratio = abs(new[0] - old[0]) / max(old[0], new[0], 1)
+
+        old_crcs = struct.unpack(f'{self.SAMPLE_COUNT}I', old[2])
+        new_crcs = struct.unpack(f'{self.SAMPLE_COUNT}I', new[2])
+        changed = sum(1 for a, b in zip(old_crcs, new_crcs) if a != b)
+        sample_ratio = changed / self.SAMPLE_COUNT
+
+        return round(max(size_ratio, sample_ratio), 3)
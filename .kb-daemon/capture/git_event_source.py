@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Git Event Source - Feeds git hook events into the capture pipeline
+
+Hooks send events to the daemon socket or, when it isn't listening, append
+them to capture/git_events.jsonl. This source tails that file with a
+persisted offset (rotating it into segments like the shell log) and runs
+GitHooks.process_git_event enrichment, which shells out to git, on a
+worker pool instead of the tailing or socket thread.
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from queue import Queue
+from typing import Dict, List, Optional
+
+from capture.git_hooks import GitHooks
+from capture.log_tailer import LogTailer
+from capture.segmented_log import SegmentedLog
+
+
+class GitEventSource:
+    """Tails git_events.jsonl and enriches git events off the capture thread"""
+
+    def __init__(self, capture_queue: Queue, git_hooks: GitHooks, base_path: Path,
+                 config: Optional[Dict] = None, workers: int = 4):
+        config = config or {}
+        self.capture_queue = capture_queue
+        self.git_hooks = git_hooks
+        self.events_file = Path(base_path) / "capture" / "git_events.jsonl"
+        self.events_file.parent.mkdir(parents=True, exist_ok=True)
+
+        self.segments = SegmentedLog(
+            self.events_file.parent, "git_events",
+            max_bytes=int(config.get('log_segment_mb', 16) * 1024 * 1024),
+            max_age_seconds=config.get('log_segment_max_age_hours', 24) * 3600
+        )
+        self.tailer = LogTailer(
+            self.events_file,
+            Path(base_path) / "capture" / "offsets" / "git_events.json",
+            segments=self.segments
+        )
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='git-enrich')
+        self.tail_done = threading.Event()
+        self.tail_done.set()
+
+        self.processed = 0
+        self.errors = 0
+
+    def start(self):
+        """Tail the git events file until stop() is called"""
+        if not self.events_file.exists():
+            self.events_file.touch()
+        self.tail_done.clear()
+        try:
+            self.tailer.run(self._handle_event_lines)
+        finally:
+            self.tail_done.set()
+
+    def stop(self):
+        """Stop tailing and let queued enrichment finish"""
+        self.tailer.stop()
+        # The tailer may be mid-batch; it must not submit to a closed pool
+        self.tail_done.wait()
+        self.pool.shutdown(wait=True)
+        self.git_hooks.commit_cache.save()
+
+    def ingest_event(self, event: Dict):
+        """Enrich an event received on the socket without blocking the listener"""
+        self.pool.submit(self._enqueue, event)
+
+    def _handle_event_lines(self, lines: List[str]):
+        """
+        Enrich a batch from the file in parallel and queue it in file order.
+        Returns once every event is queued, so the tailer only checkpoints
+        events that actually reached the pipeline.
+        """
+        events = []
+        for line in lines:
+            try:
+                event = json.loads(line, strict=False)
+            except json.JSONDecodeError:
+                continue
+            # Malformed events are skipped so the batch is still accepted
+            if isinstance(event, dict) and isinstance(event.get('data', {}), dict):
+                events.append(event)
+
+        for event in self.pool.map(self._enrich_and_cache, events):
+            self.capture_queue.put(event)
+
+    def _enqueue(self, event: Dict):
+        """Enrich one event and hand it to the pipeline"""
+        self.capture_queue.put(self._enrich_and_cache(event))
+
+    def _enrich_and_cache(self, event: Dict) -> Dict:
+        """Enrich one event, persisting the commit cache when it is due"""
+        event = self.enrich(event)
+        self.git_hooks.commit_cache.maybe_save()
+        return event
+
+    def enrich(self, event: Dict) -> Dict:
+        """Run GitHooks enrichment in the repository the hook fired in"""
+        data = event.setdefault('data', {})
+        repo = data.get('repo')
+        if repo:
+            # Lets the daemon attribute the event to its project
+            data.setdefault('working_dir', repo)
+
+        try:
+            event = self.git_hooks.process_git_event(event, cwd=repo)
+            self.processed += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"Error enriching git event: {e}")
+            event.setdefault('category', 'git')
+            event.setdefault('importance', 5)
+
+        return event
+
+    def stats(self) -> Dict:
+        """Throughput counters and commit cache metrics"""
+        return {'processed': self.processed, 'errors': self.errors,
+                'commit_cache': self.git_hooks.commit_cache.stats()}
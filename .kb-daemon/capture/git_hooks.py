@@ -8,10 +8,41 @@ import json
 import subprocess
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from queue import Queue
 import re
 
+from capture.commit_cache import CommitMetadataCache
+
+# One record per commit: a \x1e, then \x1f-separated hash, commit time,
+# source ref (with --source), author email, author name and message,
+# followed by --numstat lines
+COMMIT_LOG_FORMAT = '%x1e%H%x1f%ct%x1f%S%x1f%ae%x1f%an%x1f%B%x1f'
+
+
+def parse_commit_log(output: str) -> List[Tuple[str, int, str, Dict]]:
+    """(hash, commit time, source ref, metadata) for each commit in a git log"""
+    commits = []
+    for record in output.split('\x1e')[1:]:
+        fields = record.split('\x1f', 6)
+        if len(fields) != 7:
+            continue
+        commit_hash, committed, source, email, name, message, numstat = fields
+        # "added<TAB>deleted<TAB>path" per changed file ("-" for binary files)
+        files, insertions, deletions = [], 0, 0
+        for line in numstat.split('\n'):
+            parts = line.split('\t', 2)
+            if len(parts) != 3:
+                continue
+            files.append(parts[2])
+            insertions += int(parts[0]) if parts[0].isdigit() else 0
+            deletions += int(parts[1]) if parts[1].isdigit() else 0
+        commits.append((commit_hash, int(committed or 0), source, CommitMetadataCache.entry(
+            email, name, message.strip(), files, insertions, deletions
+        )))
+    return commits
+
+
 class GitHooks:
     """Manages git hook integration for intelligent capture"""
     
@@ -20,19 +51,34 @@ class GitHooks:
         self.config = config
         self.base_path = base_path or Path.home()
         self.my_email = self._get_git_email()
+        self.commit_cache = CommitMetadataCache(
+            Path(self.base_path) / "capture" / "commit_cache.json.gz",
+            max_entries=config.get('commit_cache_entries', 20000)
+        )
         
-    def _get_git_email(self) -> str:
-        """Get the user's git email"""
+    def _get_git_email(self, cwd: Optional[str] = None) -> str:
+        """Get the user's git email (for a repository, when cwd is given)"""
         try:
             result = subprocess.run(
                 ['git', 'config', 'user.email'],
                 capture_output=True,
-                text=True
+                text=True,
+                cwd=cwd
             )
             return result.stdout.strip()
         except:
             return ""
     
+    def repo_email(self, cwd: Optional[str] = None) -> str:
+        """The user's email in a repository, cached per repository"""
+        if not cwd:
+            return self.my_email
+        email = self.commit_cache.get_identity(cwd)
+        if email is None:
+            email = self._get_git_email(cwd)
+            self.commit_cache.set_identity(cwd, email)
+        return email
+    
     def install_hooks(self):
         """Install git hooks globally"""
         hooks_dir = Path(__file__).parent.parent / "git-templates" / "hooks"
@@ -51,136 +97,132 @@ class GitHooks:
         
         print("Git hooks installed globally")
         
-    def _create_post_commit_hook(self, hooks_dir: Path):
-        """Create post-commit hook"""
+    def _hook_prelude(self) -> str:
+        """
+        Shared hook setup. Hooks read HEAD from the git dir with builtins
+        and emit one line, and the daemon's GitEventSource fetches message,
+        branch and files afterwards. While the daemon is listening the line
+        goes to its socket (one socat or nc fork); otherwise it is appended
+        to the capture file without forking.
+        """
         capture_dir = self.base_path / "capture"
-        hook_content = f'''#!/bin/bash
-# KB Daemon post-commit hook
-
-# Set capture directory
-export KB_CAPTURE_DIR="{capture_dir}"
+        return rf'''KB_EVENTS="{capture_dir / "git_events.jsonl"}"
+KB_SOCKET="{capture_dir / "kb.sock"}"
 
-# Get commit information
-COMMIT_HASH=$(git rev-parse HEAD)
-COMMIT_MSG=$(git log -1 --pretty=%B)
-BRANCH=$(git branch --show-current)
-CHANGED_FILES=$(git diff-tree --no-commit-id --name-only -r HEAD)
+# JSON string escaping into $REPLY
+kb_json_escape() {{
+    local s=$1
+    s=${{s//\\/\\\\}}
+    s=${{s//\"/\\\"}}
+    s=${{s//$'\n'/\\n}}
+    s=${{s//$'\t'/\\t}}
+    s=${{s//$'\r'/\\r}}
+    REPLY=$s
+}}
 
-# Detect commit type
-COMMIT_TYPE="general"
-if [[ "$COMMIT_MSG" =~ ^fix:|^bugfix: ]]; then
-    COMMIT_TYPE="bugfix"
-elif [[ "$COMMIT_MSG" =~ ^feat:|^feature: ]]; then
-    COMMIT_TYPE="feature"
-elif [[ "$COMMIT_MSG" =~ ^refactor: ]]; then
-    COMMIT_TYPE="refactor"
-elif [[ "$COMMIT_MSG" =~ ^docs: ]]; then
-    COMMIT_TYPE="documentation"
-elif [[ "$COMMIT_MSG" =~ ^test: ]]; then
-    COMMIT_TYPE="testing"
+# Git dir ($GIT_DIR or .git, which is a "gitdir:" file in linked worktrees)
+# and the common dir that holds branch refs
+KB_GIT_DIR=${{GIT_DIR:-.git}}
+if [ -f "$KB_GIT_DIR" ]; then
+    read -r KB_LINE < "$KB_GIT_DIR"
+    KB_GIT_DIR=${{KB_LINE#gitdir: }}
 fi
+KB_COMMON_DIR=$KB_GIT_DIR
+if [ -f "$KB_GIT_DIR/commondir" ]; then
+    read -r KB_LINE < "$KB_GIT_DIR/commondir"
+    case $KB_LINE in
+        /*) KB_COMMON_DIR=$KB_LINE ;;
+        *) KB_COMMON_DIR=$KB_GIT_DIR/$KB_LINE ;;
+    esac
+fi
+
+# HEAD's ref and commit into KB_REF and KB_HEAD. A ref that only exists in
+# packed-refs leaves KB_HEAD empty for the daemon to resolve
+KB_REF= KB_HEAD=
+read -r KB_LINE < "$KB_GIT_DIR/HEAD"
+case $KB_LINE in
+    ref:\ *)
+        KB_REF=${{KB_LINE#ref: }}
+        [ -f "$KB_COMMON_DIR/$KB_REF" ] && read -r KB_HEAD < "$KB_COMMON_DIR/$KB_REF"
+        ;;
+    *) KB_HEAD=$KB_LINE ;;
+esac
+kb_json_escape "$KB_REF"; J_REF=$REPLY
+kb_json_escape "$PWD"; J_REPO=$REPLY
 
-# Create event JSON
-EVENT_JSON=$(cat <<EOF
-{
-    "type": "git_commit",
-    "timestamp": "$(date -u +"%Y-%m-%dT%H:%M:%SZ")",
-    "data": {
-        "hash": "$COMMIT_HASH",
-        "message": "$COMMIT_MSG",
-        "branch": "$BRANCH",
-        "commit_type": "$COMMIT_TYPE",
-        "files_changed": "$CHANGED_FILES"
-    }
-}
-EOF
-)
+# Epoch seconds ($EPOCHSECONDS needs bash 5; older versions fork date)
+KB_NOW=${{EPOCHSECONDS:-$(date +%s)}}
 
-# Send to KB daemon  
-echo "$EVENT_JSON" >> "$KB_CAPTURE_DIR/git_events.jsonl"
+# Send one event line to the daemon socket as a single datagram, or append
+# it to the capture file when the daemon isn't listening
+kb_emit() {{
+    if [ -S "$KB_SOCKET" ]; then
+        if command -v socat > /dev/null; then
+            socat -u STDIN "UNIX-SENDTO:$KB_SOCKET" <<< "$1" 2> /dev/null && return
+        elif command -v nc > /dev/null; then
+            nc -U -u -w0 "$KB_SOCKET" <<< "$1" 2> /dev/null && return
+        fi
+    fi
+    printf '%s\n' "$1" >> "$KB_EVENTS"
+}}
+'''
+    
+    def _create_post_commit_hook(self, hooks_dir: Path):
+        """Create post-commit hook"""
+        prelude = self._hook_prelude()
+        hook_content = rf'''#!/bin/bash
+# KB Daemon post-commit hook - records the new commit; the daemon adds
+# message, branch, commit type and changed files
+
+{prelude}
+printf -v KB_EVENT '{{"type":"git_commit","epoch":%s,"data":{{"hash":"%s","ref":"%s","repo":"%s"}}}}' \
+    "$KB_NOW" "$KB_HEAD" "$J_REF" "$J_REPO"
+kb_emit "$KB_EVENT"
 '''
         
         hook_path = hooks_dir / "post-commit"
         hook_path.write_text(hook_content)
         hook_path.chmod(0o755)
-        
+    
     def _create_post_merge_hook(self, hooks_dir: Path):
         """Create post-merge hook for tracking external changes"""
-        capture_dir = self.base_path / "capture"
-        hook_content = f'''#!/bin/bash
-# KB Daemon post-merge hook - tracks external changes
+        prelude = self._hook_prelude()
+        hook_content = rf'''#!/bin/bash
+# KB Daemon post-merge hook - tracks external changes. Records the range
+# ORIG_HEAD..HEAD; the daemon lists and analyzes the merged commits
 
-# Set capture directory
-export KB_CAPTURE_DIR="{capture_dir}"
+{prelude}
+HEAD_BEFORE=
+[ -f "$KB_GIT_DIR/ORIG_HEAD" ] && read -r HEAD_BEFORE < "$KB_GIT_DIR/ORIG_HEAD"
 
-# Get merge information
-BRANCH=$(git branch --show-current)
-HEAD_BEFORE=$1
-HEAD_AFTER=$(git rev-parse HEAD)
-
-# Get list of commits in the merge
-NEW_COMMITS=$(git rev-list $HEAD_BEFORE..$HEAD_AFTER)
-
-# Create event JSON
-EVENT_JSON=$(cat <<EOF
-{
-    "type": "git_merge",
-    "timestamp": "$(date -u +"%Y-%m-%dT%H:%M:%SZ")",
-    "data": {
-        "branch": "$BRANCH",
-        "head_before": "$HEAD_BEFORE",
-        "head_after": "$HEAD_AFTER",
-        "commits_merged": "$NEW_COMMITS"
-    }
-}
-EOF
-)
-
-# Send to KB daemon
-echo "$EVENT_JSON" >> "$KB_CAPTURE_DIR/git_events.jsonl"
+printf -v KB_EVENT '{{"type":"git_merge","epoch":%s,"data":{{"head_before":"%s","head_after":"%s","ref":"%s","squash":"%s","repo":"%s"}}}}' \
+    "$KB_NOW" "$HEAD_BEFORE" "$KB_HEAD" "$J_REF" "$1" "$J_REPO"
+kb_emit "$KB_EVENT"
 '''
         
         hook_path = hooks_dir / "post-merge"
         hook_path.write_text(hook_content)
         hook_path.chmod(0o755)
-        
+    
     def _create_post_checkout_hook(self, hooks_dir: Path):
         """Create post-checkout hook for branch switches"""
-        capture_dir = self.base_path / "capture"
-        hook_content = f'''#!/bin/bash
+        prelude = self._hook_prelude()
+        hook_content = rf'''#!/bin/bash
 # KB Daemon post-checkout hook
 
-# Set capture directory
-export KB_CAPTURE_DIR="{capture_dir}"
-
-PREV_HEAD=$1
-NEW_HEAD=$2
-BRANCH_CHECKOUT=$3
+# Only branch checkouts, not file checkouts
+[ "$3" = "1" ] || exit 0
 
-if [ "$BRANCH_CHECKOUT" = "1" ]; then
-    NEW_BRANCH=$(git branch --show-current)
-    
-    EVENT_JSON=$(cat <<EOF
-{
-    "type": "git_checkout",
-    "timestamp": "$(date -u +"%Y-%m-%dT%H:%M:%SZ")",
-    "data": {
-        "prev_head": "$PREV_HEAD",
-        "new_head": "$NEW_HEAD",
-        "branch": "$NEW_BRANCH"
-    }
-}
-EOF
-)
-    
-    echo "$EVENT_JSON" >> "$KB_CAPTURE_DIR/git_events.jsonl"
-fi
+{prelude}
+printf -v KB_EVENT '{{"type":"git_checkout","epoch":%s,"data":{{"prev_head":"%s","new_head":"%s","ref":"%s","repo":"%s"}}}}' \
+    "$KB_NOW" "$1" "$2" "$J_REF" "$J_REPO"
+kb_emit "$KB_EVENT"
 '''
         
         hook_path = hooks_dir / "post-checkout"
         hook_path.write_text(hook_content)
         hook_path.chmod(0o755)
-        
+
     def _create_prepare_commit_msg_hook(self, hooks_dir: Path):
         """Create prepare-commit-msg hook for context capture"""
         hook_content = '''#!/bin/bash
@@ -209,19 +251,80 @@ fi
         hook_path.write_text(hook_content)
         hook_path.chmod(0o755)
     
-    def process_git_event(self, event: Dict) -> Dict:
-        """Process a git event and enrich with context"""
+    def process_git_event(self, event: Dict, cwd: Optional[str] = None) -> Dict:
+        """
+        Process a git event and enrich with context.
+        `cwd` is the repository git commands run in (the hook's repo).
+        """
         event_type = event.get('type', '')
+        self._complete_hook_event(event, cwd)
         
         if event_type == 'git_commit':
             return self._process_commit(event)
         elif event_type == 'git_merge':
-            return self._process_merge(event)
+            return self._process_merge(event, cwd)
         elif event_type == 'git_checkout':
             return self._process_checkout(event)
         
         return event
     
+    def _complete_hook_event(self, event: Dict, cwd: Optional[str] = None):
+        """
+        Fill in what the hooks leave out: timestamp, branch, and for commits
+        the message, type and changed files. Events that already carry
+        these (hooks installed by older versions) are left as they are.
+        """
+        data = event.setdefault('data', {})
+        epoch = event.pop('epoch', None)
+        if not event.get('timestamp'):
+            when = datetime.utcfromtimestamp(epoch) if epoch else datetime.utcnow()
+            event['timestamp'] = when.strftime('%Y-%m-%dT%H:%M:%SZ')
+        
+        ref = data.pop('ref', None)
+        if ref is None:
+            return
+        if 'branch' not in data:
+            # Empty on a detached HEAD, like `git branch --show-current`
+            data['branch'] = ref[len('refs/heads/'):] if ref.startswith('refs/heads/') else ''
+        
+        event_type = event.get('type', '')
+        if event_type == 'git_commit' and 'message' not in data:
+            commit_hash = data.get('hash') or self._rev_parse(ref or 'HEAD', cwd)
+            info = self._commit_metadata([commit_hash], cwd).get(commit_hash, {}) if commit_hash else {}
+            data['hash'] = commit_hash
+            data['message'] = info.get('message', '')
+            data['commit_type'] = self.commit_type(data['message'])
+            data['files_changed'] = '\n'.join(info.get('files', []))
+        elif event_type == 'git_merge' and not data.get('head_after'):
+            data['head_after'] = self._rev_parse(ref or 'HEAD', cwd)
+    
+    def _rev_parse(self, rev: str, cwd: Optional[str] = None) -> str:
+        """Resolve a ref to a commit hash"""
+        try:
+            result = subprocess.run(
+                ['git', 'rev-parse', '--verify', '-q', rev],
+                capture_output=True,
+                text=True,
+                cwd=cwd
+            )
+            return result.stdout.strip()
+        except:
+            return ""
+    
+    def commit_type(self, message: str) -> str:
+        """Commit type from a conventional commit prefix"""
+        if re.match(r'fix:|bugfix:', message):
+            return 'bugfix'
+        elif re.match(r'feat:|feature:', message):
+            return 'feature'
+        elif message.startswith('refactor:'):
+            return 'refactor'
+        elif message.startswith('docs:'):
+            return 'documentation'
+        elif message.startswith('test:'):
+            return 'testing'
+        return 'general'
+
     def _process_commit(self, event: Dict) -> Dict:
         """Process commit event"""
         data = event.get('data', {})
@@ -238,16 +341,24 @@ fi
         
         return event
     
-    def _process_merge(self, event: Dict) -> Dict:
+    def _process_merge(self, event: Dict, cwd: Optional[str] = None) -> Dict:
         """Process merge event - identify external changes"""
         data = event.get('data', {})
         commits = data.get('commits_merged', '').split()
+        if not commits and data.get('head_before') and data.get('head_after'):
+            commits = self._rev_list(f"{data['head_before']}..{data['head_after']}", cwd)
+        
+        # Huge merges are analyzed from an evenly spaced sample
+        limit = self.config.get('merge_tracking', {}).get('max_commits', 200)
+        analyzed = self._sample_commits(commits, limit)
+        metadata = self._commit_metadata(analyzed, cwd)
+        my_email = self.repo_email(cwd)
         
         my_commits = []
         external_commits = []
         
-        for commit_hash in commits:
-            if self._is_my_commit(commit_hash):
+        for commit_hash in analyzed:
+            if metadata.get(commit_hash, {}).get('author_email') == my_email:
                 my_commits.append(commit_hash)
             else:
                 external_commits.append(commit_hash)
@@ -256,10 +367,13 @@ fi
         event['external_commits'] = external_commits
         event['category'] = 'integration'
         event['importance'] = 7 if external_commits else 5
+        if len(analyzed) < len(commits):
+            event['commits_total'] = len(commits)
+            event['commits_sampled'] = len(analyzed)
         
         # If there are external commits, extract what they changed
         if external_commits:
-            event['external_changes'] = self._analyze_external_commits(external_commits)
+            event['external_changes'] = self._analyze_external_commits(external_commits, metadata)
         
         return event
     
@@ -281,20 +395,58 @@ fi
         
         return event
     
-    def _is_my_commit(self, commit_hash: str) -> bool:
-        """Check if a commit is authored by the user"""
+    def _rev_list(self, rev_range: str, cwd: Optional[str] = None) -> List[str]:
+        """Commit hashes in a range, newest first"""
+        try:
+            result = subprocess.run(
+                ['git', 'rev-list', rev_range],
+                capture_output=True,
+                text=True,
+                cwd=cwd
+            )
+            return result.stdout.split()
+        except:
+            return []
+    
+    def _sample_commits(self, commits: List[str], limit: int) -> List[str]:
+        """At most `limit` commits, evenly spaced across the list"""
+        if limit <= 0 or len(commits) <= limit:
+            return commits
+        step = len(commits) / limit
+        return [commits[int(i * step)] for i in range(limit)]
+    
+    def _commit_metadata(self, commits: List[str], cwd: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        Author, message, changed files and line stats for many commits,
+        keyed by commit hash. Commits not in the cache are fetched with one
+        `git log --no-walk --stdin` call.
+        """
+        repo = str(Path(cwd).resolve()) if cwd else str(Path.cwd())
+        metadata, missing = self.commit_cache.get_many(repo, commits)
+        if missing:
+            fetched = self._fetch_commit_metadata(missing, cwd)
+            self.commit_cache.put_many(repo, fetched)
+            metadata.update(fetched)
+        return metadata
+    
+    def _fetch_commit_metadata(self, commits: List[str], cwd: Optional[str] = None) -> Dict[str, Dict]:
+        """Run one git log over the given commits and parse it"""
         try:
             result = subprocess.run(
-                ['git', 'show', '-s', '--format=%ae', commit_hash],
+                ['git', 'log', '--no-walk=unsorted', '--stdin', '--numstat',
+                 f'--format={COMMIT_LOG_FORMAT}'],
+                input='\n'.join(commits) + '\n',
                 capture_output=True,
-                text=True
+                text=True,
+                errors='replace',
+                cwd=cwd
             )
-            author_email = result.stdout.strip()
-            return author_email == self.my_email
         except:
-            return False
+            return {}
+        
+        return {commit_hash: info for commit_hash, _, _, info in parse_commit_log(result.stdout)}
     
-    def _analyze_external_commits(self, commits: List[str]) -> Dict:
+    def _analyze_external_commits(self, commits: List[str], metadata: Dict[str, Dict]) -> Dict:
         """Analyze external commits to understand what changed"""
         analysis = {
             'count': len(commits),
@@ -305,32 +457,19 @@ fi
         }
         
         for commit_hash in commits:
-            try:
-                # Get commit details
-                result = subprocess.run(
-                    ['git', 'show', '--format=%an|%s', '--name-only', commit_hash],
-                    capture_output=True,
-                    text=True
-                )
-                
-                lines = result.stdout.strip().split('\n')
-                if lines:
-                    author, subject = lines[0].split('|', 1)
-                    analysis['authors'].add(author)
-                    
-                    # Check for breaking changes
-                    if 'BREAKING' in subject.upper():
-                        analysis['potential_breaking_changes'].append({
-                            'commit': commit_hash,
-                            'message': subject
-                        })
-                    
-                    # Collect changed files
-                    for line in lines[2:]:  # Skip empty line after commit info
-                        if line:
-                            analysis['files_changed'].add(line)
-            except:
+            info = metadata.get(commit_hash)
+            if not info:
                 continue
+            analysis['authors'].add(info['author_name'])
+            
+            # Check for breaking changes
+            if 'BREAKING' in info['subject'].upper():
+                analysis['potential_breaking_changes'].append({
+                    'commit': commit_hash,
+                    'message': info['subject']
+                })
+            
+            analysis['files_changed'].update(info['files'])
         
         # Convert sets to lists for JSON serialization
         analysis['authors'] = list(analysis['authors'])
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Git Repo Reader - Repository facts straight from the git directory
+
+Finds the git dir for a path (following `gitdir:` files and worktree
+`commondir` links), reads the current branch from HEAD and remote URLs from
+config, without starting a git process. Results are cached per repository
+and reused until HEAD or config change. Setups the reader doesn't model
+(config includes, reftable, GIT_DIR overrides) fall back to the git CLI.
+"""
+
+import os
+import re
+import subprocess
+import threading
+from typing import Dict, Optional, Tuple
+
+SECTION = re.compile(r'^\s*\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+ENTRY = re.compile(r'^\s*([A-Za-z][A-Za-z0-9-]*)\s*(?:=\s*(.*))?$')
+
+
+class GitRepoReader:
+    """Reads branch and remotes of git repositories from the filesystem"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cache = {}  # worktree root -> (signature, info)
+        self.cli_fallbacks = 0
+
+    def read(self, path: str) -> Optional[Dict]:
+        """
+        Git facts for the repository containing path:
+        {'root', 'git_dir', 'branch', 'remotes': {name: url}}
+        or None outside a repository.
+        """
+        if 'GIT_DIR' in os.environ:
+            return self._read_with_cli(path)
+
+        found = self._find_git_dir(path)
+        if found is None:
+            return None
+        root, git_dir, common_dir = found
+
+        signature = self._signature(git_dir, common_dir)
+        with self.lock:
+            cached = self.cache.get(root)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        info = self._read_native(root, git_dir, common_dir)
+        if info is None:
+            info = self._read_with_cli(root)
+        with self.lock:
+            self.cache[root] = (signature, info)
+        return info
+
+    def _find_git_dir(self, path: str) -> Optional[Tuple[str, str, str]]:
+        """(worktree root, git dir, common dir) by walking up from path"""
+        current = os.path.abspath(path)
+        while True:
+            dot_git = os.path.join(current, '.git')
+            if os.path.isdir(dot_git):
+                return current, dot_git, self._common_dir(dot_git)
+            if os.path.isfile(dot_git):
+                # Linked worktrees and submodules: "gitdir: <path>"
+                try:
+                    with open(dot_git) as f:
+                        line = f.readline().strip()
+                except OSError:
+                    return None
+                if not line.startswith('gitdir:'):
+                    return None
+                git_dir = os.path.normpath(os.path.join(current, line[len('gitdir:'):].strip()))
+                return current, git_dir, self._common_dir(git_dir)
+
+            parent = os.path.dirname(current)
+            if parent == current:
+                return None
+            current = parent
+
+    def _common_dir(self, git_dir: str) -> str:
+        """Where refs and config live (differs from git_dir in linked worktrees)"""
+        try:
+            with open(os.path.join(git_dir, 'commondir')) as f:
+                return os.path.normpath(os.path.join(git_dir, f.readline().strip()))
+        except OSError:
+            return git_dir
+
+    def _signature(self, git_dir: str, common_dir: str) -> Tuple[int, int]:
+        """mtimes of HEAD and config"""
+        signature = []
+        for file_path in (os.path.join(git_dir, 'HEAD'), os.path.join(common_dir, 'config')):
+            try:
+                signature.append(os.stat(file_path).st_mtime_ns)
+            except OSError:
+                signature.append(0)
+        return tuple(signature)
+
+    def _read_native(self, root: str, git_dir: str, common_dir: str) -> Optional[Dict]:
+        """Read HEAD and config; None if they need the git CLI"""
+        try:
+            with open(os.path.join(git_dir, 'HEAD')) as f:
+                head = f.readline().strip()
+            with open(os.path.join(common_dir, 'config'), errors='replace') as f:
+                config = f.read()
+        except OSError:
+            return None
+
+        remotes = {}
+        section, subsection = None, None
+        for line in config.splitlines():
+            match = SECTION.match(line)
+            if match:
+                section, subsection = match.group(1).lower(), match.group(2)
+                if section in ('include', 'includeif'):
+                    return None  # remotes may come from an included file
+                continue
+            match = ENTRY.match(line)
+            if not match:
+                continue
+            key, value = match.group(1).lower(), self._config_value(match.group(2) or '')
+            if section == 'remote' and subsection and key == 'url':
+                remotes.setdefault(subsection, value)
+            elif section == 'extensions' and key == 'refstorage' and value != 'files':
+                return None  # reftable: HEAD isn't a plain file
+
+        if head.startswith('ref: '):
+            ref = head[len('ref: '):]
+            branch = ref[len('refs/heads/'):] if ref.startswith('refs/heads/') else ''
+        else:
+            branch = ''  # detached HEAD, like `git branch --show-current`
+
+        return {'root': root, 'git_dir': git_dir, 'branch': branch, 'remotes': remotes}
+
+    def _config_value(self, raw: str) -> str:
+        """Strip comments and quotes from a config value"""
+        value, quoted, escaped = [], False, False
+        for ch in raw:
+            if escaped:
+                value.append({'n': '\n', 't': '\t'}.get(ch, ch))
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                quoted = not quoted
+            elif ch in '#;' and not quoted:
+                break
+            else:
+                value.append(ch)
+        return ''.join(value).strip()
+
+    def _read_with_cli(self, path: str) -> Optional[Dict]:
+        """Ask git itself (slow path for setups the native reader skips)"""
+        self.cli_fallbacks += 1
+        try:
+            result = subprocess.run(
+                ['git', 'rev-parse', '--show-toplevel', '--absolute-git-dir'],
+                cwd=path, capture_output=True, text=True
+            )
+            if result.returncode != 0:
+                return None
+            lines = result.stdout.splitlines()
+            root, git_dir = (lines + ['', ''])[:2]
+
+            result = subprocess.run(
+                ['git', 'config', '--get-regexp', r'^remote\..*\.url$'],
+                cwd=path, capture_output=True, text=True
+            )
+            remotes = {}
+            for line in result.stdout.splitlines():
+                key, _, url = line.partition(' ')
+                remotes.setdefault(key[len('remote.'):-len('.url')], url)
+
+            result = subprocess.run(
+                ['git', 'branch', '--show-current'],
+                cwd=path, capture_output=True, text=True
+            )
+            return {'root': root or path, 'git_dir': git_dir, 'branch': result.stdout.strip(),
+                    'remotes': remotes}
+        except Exception:
+            return None
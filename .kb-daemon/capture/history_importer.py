@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+History Importer - Bulk import of existing bash and zsh history files
+
+History files are split into byte ranges aligned to entry boundaries and
+parsed across a process pool. Each worker classifies its entries with the
+same ShellMonitor rules as live capture and serializes them into database
+rows; the parent only writes them in batches as chunks complete. Only a bounded number of chunks are in flight,
+so memory stays flat however large the history is.
+
+Bash history without `#<epoch>` lines records no times. Those entries are
+stamped with the file's mtime and carry a hash of the commands before them
+(`history_context`), which deduplication uses in place of the timestamp.
+Repeated commands stay distinct, and re-imports stay idempotent even after
+bash trims the oldest lines at HISTFILESIZE: only the few entries whose
+preceding commands were trimmed are stored again.
+
+History files don't record where commands ran. When the caller knows (a
+per-project history file), imported commands carry that working directory
+and its project, like live capture.
+"""
+
+import os
+import re
+import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from pathlib import Path
+from queue import Queue
+from typing import Dict, List, Optional, Tuple
+
+from capture.shell_monitor import ShellMonitor
+from storage.db_manager import DatabaseManager
+
+ZSH_EXTENDED = re.compile(rb'^: (\d+):(\d+);')
+BASH_TIMESTAMP = re.compile(rb'^#(\d{9,11})\s*$')
+ZSH_BOUNDARY = re.compile(rb'\n: \d+:\d+;')
+BASH_BOUNDARY = re.compile(rb'\n#\d{9,11}\s*\n')
+
+CLASSIFIED_CACHE_SIZE = 50000
+
+# Preceding commands that identify an untimed bash history entry
+HISTORY_CONTEXT_LINES = 8
+
+# Set in each worker process by _init_worker
+_monitor = None
+_classified = {}  # (command line, duration bucket) -> classified event or None
+
+
+def _init_worker(config: Dict, base_path: str):
+    """Build one ShellMonitor per worker for classification"""
+    global _monitor
+    _monitor = ShellMonitor(Queue(), config, Path(base_path))
+
+
+def _unmetafy(raw: bytes) -> bytes:
+    """Undo zsh's history encoding: 0x83 escapes the next byte XOR 0x20"""
+    if b'\x83' not in raw:
+        return raw
+    out = bytearray()
+    it = iter(raw)
+    for byte in it:
+        if byte == 0x83:
+            out.append(next(it, 0x20) ^ 0x20)
+        else:
+            out.append(byte)
+    return bytes(out)
+
+
+def _preceding_commands(f, start: int, count: int) -> List[bytes]:
+    """The last `count` bash command lines before byte `start`"""
+    window = 4096
+    while True:
+        begin = max(0, start - window)
+        f.seek(begin)
+        lines = f.read(start - begin).split(b'\n')
+        if begin > 0:
+            lines = lines[1:]  # may start mid-line
+        commands = [line for line in lines if line.strip() and not BASH_TIMESTAMP.match(line)]
+        if len(commands) >= count or begin == 0:
+            return commands[-count:]
+        window *= 4
+
+
+def _parse_entries(data: bytes, fmt: str, default_ts: int,
+                   context: List[bytes] = ()) -> List[Tuple[int, int, str, Optional[str]]]:
+    """
+    Split a chunk of history into (timestamp, duration, command line,
+    context). The context, a hash of the preceding bash commands (starting
+    from `context`), is only set for entries without a recorded timestamp.
+    """
+    entries = []
+    lines = data.split(b'\n')
+
+    if fmt == 'zsh':
+        i = 0
+        while i < len(lines):
+            line = _unmetafy(lines[i])
+            i += 1
+            match = ZSH_EXTENDED.match(line)
+            if not match:
+                continue
+            command = line[match.end():]
+            # Multi-line commands continue while the line ends in a backslash
+            while command.endswith(b'\\') and i < len(lines):
+                command = command[:-1] + b'\n' + _unmetafy(lines[i])
+                i += 1
+            entries.append((int(match.group(1)), int(match.group(2)),
+                            command.decode('utf-8', errors='replace'), None))
+    else:
+        ts = None
+        previous = deque(context, maxlen=HISTORY_CONTEXT_LINES)
+        for line in lines:
+            match = BASH_TIMESTAMP.match(line)
+            if match:
+                ts = int(match.group(1))
+            elif line.strip():
+                text = line.decode('utf-8', errors='replace')
+                if ts is None:
+                    digest = hashlib.sha1(b'\n'.join(previous)).hexdigest()[:16]
+                    entries.append((default_ts, 0, text, digest))
+                else:
+                    entries.append((ts, 0, text, None))
+                previous.append(line)
+
+    return entries
+
+
+def _duration_bucket(duration: int) -> int:
+    """Durations that classify identically share a bucket"""
+    return (duration > 5) + (duration > 30) + (duration > 60)
+
+
+def _import_chunk(path: str, start: int, end: int, fmt: str, default_ts: int,
+                  min_importance: int, working_dir: Optional[str] = None,
+                  project: Optional[Dict] = None) -> Tuple[int, int, List[tuple]]:
+    """
+    Worker: parse, classify and serialize one byte range of a history file.
+    Returns (entries read, entries tracked, database rows).
+    """
+    with open(path, 'rb') as f:
+        context = _preceding_commands(f, start, HISTORY_CONTEXT_LINES) if fmt == 'bash' else []
+        f.seek(start)
+        data = f.read(end - start)
+
+    tracked = 0
+    events = []
+    entries = _parse_entries(data, fmt, default_ts, context)
+    for ts, duration, cmdline, context in entries:
+        cmdline = cmdline.strip()
+        if not cmdline:
+            continue
+
+        # History repeats the same few commands endlessly; classify each
+        # distinct command line once
+        key = (cmdline, _duration_bucket(duration))
+        template = _classified.get(key, False)
+        if template is False:
+            template = _monitor.classify_command({
+                'type': 'shell_command',
+                'data': {
+                    'cmdline': cmdline,
+                    'duration': duration,
+                    'exit_code': 0,  # not recorded in history files
+                    'source': f'{fmt}_history'
+                }
+            })
+            if len(_classified) >= CLASSIFIED_CACHE_SIZE:
+                _classified.clear()
+            _classified[key] = template
+
+        if template is None:
+            continue
+        tracked += 1
+        if template.get('importance', 0) < min_importance:
+            continue
+
+        event = dict(template, timestamp=datetime.utcfromtimestamp(ts).isoformat() + 'Z')
+        event['data'] = dict(template['data'], duration=duration)
+        if context is not None:
+            event['data']['history_context'] = context
+        if working_dir:
+            event['data']['working_dir'] = working_dir
+            event['project'] = project
+        events.append(event)
+
+    return len(entries), tracked, DatabaseManager.event_rows(events)
+
+
+class HistoryImporter:
+    """Imports shell history files into the event database"""
+
+    def __init__(self, db, config: Dict, base_path: Path, workers: Optional[int] = None,
+                 chunk_bytes: int = 1024 * 1024, min_importance: int = 3, project_detector=None):
+        self.db = db
+        self.project_detector = project_detector
+        self.config = config
+        self.base_path = Path(base_path)
+        self.workers = workers or os.cpu_count() or 2
+        self.chunk_bytes = chunk_bytes
+        self.min_importance = min_importance
+
+    @staticmethod
+    def default_history_files() -> List[Path]:
+        """The user's bash and zsh history files that exist"""
+        candidates = [Path.home() / ".bash_history", Path.home() / ".zsh_history"]
+        if os.environ.get('HISTFILE'):
+            candidates.append(Path(os.environ['HISTFILE']).expanduser())
+
+        seen, files = set(), []
+        for path in candidates:
+            if path.is_file() and path.resolve() not in seen:
+                seen.add(path.resolve())
+                files.append(path)
+        return files
+
+    def import_files(self, paths: List[Path], working_dir: Optional[str] = None) -> Dict:
+        """
+        Import history files; returns counts of what was read and stored.
+        With `working_dir`, commands are attributed to it and its project.
+        """
+        stats = {'files': 0, 'entries': 0, 'tracked': 0, 'stored': 0}
+
+        project = None
+        if working_dir:
+            working_dir = os.path.abspath(os.path.expanduser(working_dir))
+            if self.project_detector:
+                project = self.project_detector.event_context(
+                    self.project_detector.detect_project(Path(working_dir))
+                )
+
+        jobs = []
+        for path in paths:
+            path = Path(path)
+            fmt = self._detect_format(path)
+            default_ts = int(path.stat().st_mtime)
+            jobs.extend((str(path), start, end, fmt, default_ts, self.min_importance, working_dir, project)
+                        for start, end in self._chunk_ranges(path, fmt))
+            stats['files'] += 1
+
+        # Bounded in-flight chunks keep memory flat for any history size
+        max_pending = self.workers * 2
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.config, str(self.base_path))) as pool:
+            pending = set()
+            jobs = iter(jobs)
+            while True:
+                for job in jobs:
+                    pending.add(pool.submit(_import_chunk, *job))
+                    if len(pending) >= max_pending:
+                        break
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    entries, tracked, rows = future.result()
+                    stats['entries'] += entries
+                    stats['tracked'] += tracked
+                    stats['stored'] += self.db.store_rows(rows)
+
+        return stats
+
+    def _detect_format(self, path: Path) -> str:
+        """zsh extended history or bash (with or without timestamps)"""
+        with open(path, 'rb') as f:
+            head = f.read(4096)
+        for line in head.split(b'\n')[:20]:
+            if ZSH_EXTENDED.match(line):
+                return 'zsh'
+        return 'bash'
+
+    def _chunk_ranges(self, path: Path, fmt: str) -> List[Tuple[int, int]]:
+        """Byte ranges of about chunk_bytes, each starting on an entry boundary"""
+        size = path.stat().st_size
+        ranges = []
+        start = 0
+
+        with open(path, 'rb') as f:
+            while start < size:
+                end = min(start + self.chunk_bytes, size)
+                if end < size:
+                    end = self._next_boundary(f, end, size, fmt)
+                ranges.append((start, end))
+                start = end
+
+        return ranges
+
+    def _next_boundary(self, f, offset: int, size: int, fmt: str) -> int:
+        """First entry start at or after offset"""
+        f.seek(offset)
+        buf = f.read(min(256 * 1024, size - offset))
+        # zsh entries start with ": <ts>:"; bash entries with "#<ts>" when
+        # timestamps are recorded, otherwise on any line
+        pattern = ZSH_BOUNDARY if fmt == 'zsh' else BASH_BOUNDARY
+        match = pattern.search(buf)
+        pos = match.start() if match else buf.find(b'\n')
+        return offset + pos + 1 if pos != -1 else size
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Log Tailer - Follows an append-only JSONL capture file
+
+Keeps the file open, wakes on file system notifications, reads in bounded
+chunks and checkpoints the byte offset once each batch has been accepted
+downstream. Truncation and rotation (the path now pointing at a new inode)
+are detected, so daemon restarts neither replay nor skip events. A batch
+the handler rejects is retried one line at a time and lines that still
+fail are logged and skipped, so one malformed line can't stall the file.
+
+With a SegmentedLog attached the tailer also rotates the file itself once it
+is fully drained and past its size or age bound, and seals each rotated
+segment after late appends have settled.
+"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+from capture.segmented_log import SegmentedLog
+
+
+class LogTailer:
+    """Tails a JSONL file with a durable offset checkpoint"""
+
+    def __init__(self, path: Path, offset_file: Path, chunk_size: int = 64 * 1024,
+                 poll_interval: float = 5.0, segments: Optional[SegmentedLog] = None,
+                 seal_grace: float = 2.0):
+        self.path = Path(path)
+        self.offset_file = Path(offset_file)
+        self.offset_file.parent.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+
+        self.running = False
+        self.wakeup = threading.Event()
+        self.observer = None
+
+        self.handle = None
+        self.inode = None
+        self.offset = 0     # byte offset just past the last accepted line
+        self.partial = b''  # bytes of an incomplete trailing line
+
+        self.segments = segments
+        self.seal_grace = seal_grace
+        self.rotated = None  # (inode, segment path) of our last rotation
+        self.sealing = {}    # rotated segment path -> offset already delivered
+
+    def run(self, handle_batch: Callable[[List[str]], None]):
+        """
+        Follow the file until stop() is called.
+        `handle_batch` receives complete lines; the offset is checkpointed
+        only after it returns. It should skip bad lines itself: if it
+        raises, lines it already accepted are delivered again.
+        """
+        self.running = True
+        self._start_notifications()
+        self._recover_segments()
+
+        try:
+            while self.running:
+                try:
+                    self._ensure_open()
+                    if self.handle:
+                        self._drain(handle_batch)
+                        self._check_rotation(handle_batch)
+                    if self.segments:
+                        self._maybe_rotate(handle_batch)
+                        self._seal_ready(handle_batch)
+                except Exception as e:
+                    print(f"Error tailing {self.path.name}: {e}")
+
+                # Sleep until the file changes; the timeout covers missed notifications
+                self.wakeup.wait(self.poll_interval)
+                self.wakeup.clear()
+        finally:
+            self._stop_notifications()
+            self._close()
+
+    def stop(self):
+        """Stop following the file"""
+        self.running = False
+        self.wakeup.set()
+
+    def _start_notifications(self):
+        """Wake the tail loop whenever the watched file changes"""
+        tailer = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                paths = [getattr(event, 'src_path', ''), getattr(event, 'dest_path', '')]
+                if any(os.path.basename(p) == tailer.path.name for p in paths if p):
+                    tailer.wakeup.set()
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.observer = Observer()
+            self.observer.schedule(_Handler(), str(self.path.parent), recursive=False)
+            self.observer.start()
+        except Exception as e:
+            # Fall back to polling every poll_interval
+            print(f"File notifications unavailable for {self.path.name}: {e}")
+            self.observer = None
+
+    def _stop_notifications(self):
+        """Stop the notification observer"""
+        if self.observer:
+            self.observer.stop()
+            self.observer.join()
+            self.observer = None
+
+    def _ensure_open(self):
+        """Open the file and seek to the checkpointed offset"""
+        if self.handle:
+            return
+
+        try:
+            handle = open(self.path, 'rb')
+        except FileNotFoundError:
+            return
+
+        st = os.fstat(handle.fileno())
+        checkpoint = self._load_checkpoint()
+
+        # Resume only if the checkpoint refers to this same file and it
+        # hasn't been truncated below the checkpoint since
+        offset = 0
+        if checkpoint and checkpoint.get('inode') == st.st_ino and checkpoint.get('offset', 0) <= st.st_size:
+            offset = checkpoint['offset']
+
+        handle.seek(offset)
+        self.handle = handle
+        self.inode = st.st_ino
+        self.offset = offset
+        self.partial = b''
+
+    def _drain(self, handle_batch: Callable[[List[str]], None]):
+        """Read everything available, one bounded chunk per batch"""
+        while self.running:
+            chunk = self.handle.read(self.chunk_size)
+            if not chunk:
+                return
+
+            data = self.partial + chunk
+            end = data.rfind(b'\n')
+            if end == -1:
+                self.partial = data
+                continue
+
+            complete, self.partial = data[:end + 1], data[end + 1:]
+            self._deliver(handle_batch, complete, advance=True)
+
+    def _deliver(self, handle_batch: Callable[[List[str]], None], complete: bytes,
+                 advance: bool = False):
+        """
+        Hand complete lines downstream, isolating lines the handler rejects.
+        With `advance`, the checkpoint moves past every line handled or skipped.
+        """
+        lines = [line.decode('utf-8', errors='replace')
+                 for line in complete.split(b'\n') if line.strip()]
+        try:
+            if lines:
+                handle_batch(lines)
+        except Exception as e:
+            print(f"Error handling batch from {self.path.name}, retrying line by line: {e}")
+        else:
+            if advance:
+                self.offset += len(complete)
+                self._save_checkpoint()
+            return
+
+        raw_lines = complete.split(b'\n')
+        for i, raw in enumerate(raw_lines):
+            line = raw.decode('utf-8', errors='replace')
+            if line.strip():
+                try:
+                    handle_batch([line])
+                except Exception as e:
+                    print(f"Skipping bad line in {self.path.name}: {e}: {line[:200]!r}")
+            if advance:
+                self.offset += len(raw) + (1 if i < len(raw_lines) - 1 else 0)
+
+        if advance:
+            self._save_checkpoint()
+
+    def _check_rotation(self, handle_batch: Callable[[List[str]], None]):
+        """Reopen after rotation, rewind after truncation"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            st = None
+
+        if st is None or st.st_ino != self.inode:
+            # Rotated (or removed): the old inode is finished once drained
+            self._drain(handle_batch)
+            self._close()
+            if self.rotated and self.rotated[0] == self.inode:
+                # Appends that race the rename are picked up when sealing
+                self.sealing[str(self.rotated[1])] = self.offset
+                self.rotated = None
+                self._save_checkpoint()
+            if st is not None:
+                self._open_fresh()
+            return
+
+        if st.st_size < self.offset + len(self.partial):
+            # Truncated in place: everything now in the file is new
+            self.handle.seek(0)
+            self.offset = 0
+            self.partial = b''
+            self._save_checkpoint()
+
+    def _maybe_rotate(self, handle_batch: Callable[[List[str]], None]):
+        """Rotate the file into a segment once it is drained and outgrown"""
+        if not self.handle or self.partial:
+            return
+
+        size = os.fstat(self.handle.fileno()).st_size
+        if self.offset != size or not self.segments.should_rotate(size, self.inode):
+            return
+
+        segment = self.segments.rotate()
+        if segment:
+            self.rotated = (self.inode, segment)
+            self._check_rotation(handle_batch)
+
+    def _seal_ready(self, handle_batch: Callable[[List[str]], None]):
+        """Deliver late appends to rotated segments, then compress them"""
+        for path, offset in list(self.sealing.items()):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                del self.sealing[path]
+                continue
+
+            # Writers may still hold the renamed file open for a moment
+            if time.time() - st.st_mtime < self.seal_grace:
+                continue
+
+            if st.st_size > offset:
+                with open(path, 'rb') as f:
+                    f.seek(offset)
+                    self._deliver(handle_batch, f.read())
+
+            self.segments.seal(Path(path))
+            del self.sealing[path]
+            self._save_checkpoint()
+
+    def _recover_segments(self):
+        """Pick up rotated segments left unsealed by a previous run"""
+        if not self.segments:
+            return
+
+        checkpoint = self._load_checkpoint() or {}
+        delivered = checkpoint.get('sealing', {})
+        for path in self.segments.pending():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+
+            if checkpoint.get('inode') == st.st_ino:
+                # Stopped between the rename and draining the old inode
+                self.sealing[str(path)] = checkpoint.get('offset', 0)
+            else:
+                self.sealing[str(path)] = delivered.get(str(path), st.st_size)
+
+    def _open_fresh(self):
+        """Open a newly rotated-in file from its beginning"""
+        self.handle = open(self.path, 'rb')
+        self.inode = os.fstat(self.handle.fileno()).st_ino
+        self.offset = 0
+        self.partial = b''
+        self._save_checkpoint()
+
+    def _close(self):
+        """Close the current file handle"""
+        if self.handle:
+            self.handle.close()
+        self.handle = None
+
+    def _load_checkpoint(self) -> Optional[dict]:
+        """Load the persisted offset"""
+        try:
+            with open(self.offset_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_checkpoint(self):
+        """Persist the offset durably (write, fsync, atomic rename)"""
+        tmp_file = self.offset_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump({'inode': self.inode, 'offset': self.offset, 'sealing': self.sealing}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.offset_file)
@@ -4,35 +4,158 @@ Project Detector - Automatically detect and track current project context
 """
 
 import os
+import re
 import json
-import subprocess
+import time
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 from datetime import datetime
 
+from capture.git_repo_reader import GitRepoReader
+from capture.project_index import ProjectIndex
+
+# Project type markers in priority order; a directory entry whose name ends
+# with a marker identifies the type
+PROJECT_MARKERS = [
+    # Node.js/JavaScript
+    ('package.json', 'node'),
+    ('yarn.lock', 'node'),
+    ('pnpm-lock.yaml', 'node'),
+    
+    # Python
+    ('requirements.txt', 'python'),
+    ('setup.py', 'python'),
+    ('pyproject.toml', 'python'),
+    ('Pipfile', 'python'),
+    ('poetry.lock', 'python'),
+    
+    # Rust
+    ('Cargo.toml', 'rust'),
+    
+    # Go
+    ('go.mod', 'go'),
+    
+    # Ruby
+    ('Gemfile', 'ruby'),
+    
+    # Java
+    ('pom.xml', 'java'),
+    ('build.gradle', 'java'),
+    
+    # C/C++
+    ('CMakeLists.txt', 'cpp'),
+    ('Makefile', 'c'),
+    
+    # .NET
+    ('.csproj', 'dotnet'),
+    ('.sln', 'dotnet'),
+    
+    # Docker
+    ('Dockerfile', 'docker'),
+    ('docker-compose.yml', 'docker'),
+    ('docker-compose.yaml', 'docker'),
+]
+MARKER_PRIORITY = {marker: i for i, (marker, _) in enumerate(PROJECT_MARKERS)}
+# Longest alternatives first, so the longest matching suffix wins
+MARKER_PATTERN = re.compile('(?:%s)\\Z' % '|'.join(
+    re.escape(m) for m in sorted(MARKER_PRIORITY, key=len, reverse=True)
+))
+
+# Files that mark the top of a project when looking for its root
+ROOT_INDICATORS = frozenset([
+    'package.json', 'requirements.txt', 'setup.py',
+    'Cargo.toml', 'go.mod', 'Gemfile', 'pom.xml',
+    '.gitignore', 'README.md', 'Makefile'
+])
+
+# Directories not searched for nested projects
+NESTED_SKIP = frozenset([
+    'node_modules', 'venv', 'env', '__pycache__', 'build', 'dist', 'target', 'vendor'
+])
+
 class ProjectDetector:
     """Detect current project from various indicators"""
     
-    def __init__(self, base_path: Path = None):
+    # Files whose mtimes invalidate a cached project when they change
+    SIGNATURE_FILES = (
+        '.git/HEAD', '.git/config', 'package.json', 'pyproject.toml', 'setup.py',
+        'requirements.txt', 'Cargo.toml', 'go.mod', 'Gemfile', 'pom.xml'
+    )
+    
+    def __init__(self, base_path: Path = None, config: Dict = None):
+        config = config or {}
         self.base_path = base_path or Path.cwd()
         self.cache_file = Path.home() / ".kb-daemon" / "project_cache.json"
-        self.project_cache = self._load_cache()
+        self.max_projects = config.get('project_cache_size', 2000)
+        self.flush_interval = config.get('project_cache_flush_seconds', 10)
+        self.revalidate_interval = config.get('project_revalidate_seconds', 30)
+        self.nested_depth = config.get('project_nested_depth', 3)
         
-    def _load_cache(self) -> Dict:
-        """Load project cache"""
-        if self.cache_file.exists():
-            try:
-                with open(self.cache_file) as f:
-                    return json.load(f)
-            except:
-                pass
-        return {}
+        # Known project roots; paths under them resolve without disk access.
+        # project_cache holds the same entries in LRU order:
+        # indexed path -> {'project', 'exact', 'signature', 'checked'}
+        self.index = ProjectIndex()
+        self.git_reader = GitRepoReader()
+        self.listings = {}  # directory -> [mtime_ns, entry names, project type]
+        self.max_listings = 4096
+        self.lock = threading.RLock()
+        self.project_cache = OrderedDict()
+        self.flush_lock = threading.Lock()
+        self.flush_timer = None
+        self.dirty = False
+        self._load_cache()
+        
+    def _load_cache(self):
+        """Load persisted projects into the path index"""
+        try:
+            with open(self.cache_file) as f:
+                data = json.load(f)
+        except:
+            return
+        if data.get('version') != 3:
+            return
+        
+        for path, exact, signature, project in data.get('entries', [])[-self.max_projects:]:
+            self.index.insert(path, project, exact=exact)
+            # Revalidated on first use: files may have changed while stopped
+            self.project_cache[path] = {
+                'project': project, 'exact': exact, 'signature': signature, 'checked': 0.0
+            }
+    
+    def flush(self):
+        """Write the cache if it changed (compact JSON, atomic rename)"""
+        with self.flush_lock:
+            self.flush_timer = None
+            if not self.dirty:
+                return
+            self.dirty = False
+            with self.lock:
+                entries = [[path, e['exact'], e['signature'], e['project']]
+                           for path, e in self.project_cache.items()]
+            
+            self.cache_file.parent.mkdir(exist_ok=True)
+            tmp_file = self.cache_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump({'version': 3, 'entries': entries}, f, separators=(',', ':'))
+            os.replace(tmp_file, self.cache_file)
+    
+    def close(self):
+        """Stop the pending write-behind and flush now"""
+        with self.flush_lock:
+            if self.flush_timer:
+                self.flush_timer.cancel()
+        self.flush()
     
-    def _save_cache(self):
-        """Save project cache"""
-        self.cache_file.parent.mkdir(exist_ok=True)
-        with open(self.cache_file, 'w') as f:
-            json.dump(self.project_cache, f, indent=2)
+    def _schedule_flush(self):
+        """Write-behind: persist at most once per flush interval"""
+        with self.flush_lock:
+            self.dirty = True
+            if self.flush_timer is None:
+                self.flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self.flush_timer.daemon = True
+                self.flush_timer.start()
     
     def detect_project(self, path: Path = None) -> Dict:
         """
@@ -44,178 +167,263 @@ class ProjectDetector:
             'git_remote': 'github.com/user/repo',
             'identifiers': {...}
         }
+        Paths under an already detected project root resolve from the index,
+        unless a project nested inside that root (found when the root was
+        indexed or last revalidated) contains them.
         """
-        check_path = path or Path.cwd()
+        check_path = os.path.abspath(path or Path.cwd())
         
-        # Check cache first
-        cache_key = str(check_path.resolve())
-        if cache_key in self.project_cache:
-            cached = self.project_cache[cache_key]
-            # Cache for 1 hour
-            if (datetime.now().timestamp() - cached.get('timestamp', 0)) < 3600:
-                return cached['project']
+        with self.lock:
+            hit = self.index.lookup(check_path)
+            if hit is not None:
+                indexed_path, project = hit
+                entry = self.project_cache.get(indexed_path)
+                if entry is not None and self._still_valid(indexed_path, entry):
+                    # Revalidating may have found a nested root around check_path
+                    hit = self.index.lookup(check_path)
+                    if hit is not None and hit[0] == indexed_path:
+                        self.project_cache.move_to_end(indexed_path)
+                        return project
+                else:
+                    self._forget(indexed_path)
+        
+        project_info, is_root = self._detect(Path(check_path))
+        self._remember(check_path, project_info, is_root)
+        return project_info
+    
+    @staticmethod
+    def event_context(project: Dict) -> Dict:
+        """The project fields stored with an event"""
+        return {
+            'name': project['name'],
+            'type': project['type'],
+            'path': project['path'],
+            'git_remote': project.get('git_remote')
+        }
+    
+    def _still_valid(self, indexed_path: str, entry: Dict) -> bool:
+        """
+        Whether a cached project's marker and git files are unchanged
+        (checked periodically). A project root that is still valid has its
+        nested roots searched again at the same time.
+        """
+        now = time.monotonic()
+        if now - entry['checked'] < self.revalidate_interval:
+            return True
+        entry['checked'] = now
+        if self._signature(entry['project']['path']) != entry['signature']:
+            return False
+        if not entry['exact']:
+            self.index.set_nested(indexed_path, self._nested_roots(indexed_path))
+        return True
+    
+    def _nested_roots(self, root: str) -> List[str]:
+        """
+        Directories below a project root (up to nested_depth levels) where
+        _locate_project_root would stop before reaching it. The search ends
+        at each nested root; that project's own detection searches below it.
+        """
+        nested = []
+        stack = [(root, None, 0)]
+        while stack:
+            path, parent_names, depth = stack.pop()
+            try:
+                with os.scandir(path) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            names = frozenset(entry.name for entry in entries)
+            
+            if parent_names is not None and ('.git' in names or (
+                not ROOT_INDICATORS.isdisjoint(names)
+                and (ROOT_INDICATORS.isdisjoint(parent_names) or '.git' in parent_names)
+            )):
+                nested.append(path)
+                continue
+            
+            if depth < self.nested_depth:
+                for entry in entries:
+                    if (not entry.name.startswith('.') and entry.name not in NESTED_SKIP
+                            and entry.is_dir(follow_symlinks=False)):
+                        stack.append((entry.path, names, depth + 1))
+        return nested
+    
+    def _signature(self, project_path: str) -> List[int]:
+        """mtimes of the files that determine a project (0 if missing)"""
+        signature = []
+        for name in self.SIGNATURE_FILES:
+            try:
+                signature.append(os.stat(os.path.join(project_path, name)).st_mtime_ns)
+            except OSError:
+                signature.append(0)
+        return signature
+    
+    def _detect(self, check_path: Path) -> Tuple[Dict, bool]:
+        """
+        Detect the project containing a directory.
+        Returns (project info, whether a project root was found); without
+        a root the directory itself stands in as the project.
+        """
+        root = self._locate_project_root(check_path)
+        project_path = root or check_path.resolve()
         
         project_info = {
-            'name': check_path.name,
+            'name': project_path.name,
             'type': 'unknown',
-            'path': str(check_path.resolve()),
+            'path': str(project_path),
             'git_remote': None,
             'identifiers': {}
         }
         
         # 1. Check Git repository
-        git_info = self._detect_git(check_path)
+        git_info = self._detect_git(project_path)
         if git_info:
             project_info.update(git_info)
         
         # 2. Detect project type from files
-        project_type = self._detect_project_type(check_path)
+        project_type = self._detect_project_type(project_path)
         project_info['type'] = project_type
         
         # 3. Get project name from package files
-        project_name = self._get_project_name(check_path, project_type)
+        project_name = self._get_project_name(project_path, project_type)
         if project_name:
             project_info['name'] = project_name
         
-        # 4. Find project root (go up until no more project files)
-        project_root = self._find_project_root(check_path)
-        if project_root != check_path:
-            project_info['path'] = str(project_root.resolve())
-            project_info['name'] = project_root.name
+        return project_info, root is not None
+    
+    def _remember(self, check_path: str, project_info: Dict, is_root: bool):
+        """Index a detection result and schedule it for persistence"""
+        project_path = project_info['path']
+        paths = [project_path]
         
-        # Cache the result
-        self.project_cache[cache_key] = {
-            'project': project_info,
-            'timestamp': datetime.now().timestamp()
-        }
-        self._save_cache()
+        # A symlinked path resolves to a different root; index the
+        # unresolved spelling too so it doesn't miss every time
+        resolved = str(Path(check_path).resolve())
+        if is_root and resolved != check_path and resolved.startswith(project_path):
+            depth = len(Path(resolved).relative_to(project_path).parts)
+            alias = Path(check_path)
+            for _ in range(depth):
+                alias = alias.parent
+            paths.append(str(alias))
         
-        return project_info
+        signature = self._signature(project_path)
+        nested = {path: self._nested_roots(path) for path in paths} if is_root else {}
+        with self.lock:
+            for path in paths:
+                self.index.insert(path, project_info, exact=not is_root)
+                if is_root:
+                    self.index.set_nested(path, nested[path])
+                self.project_cache[path] = {
+                    'project': project_info,
+                    'exact': not is_root,
+                    'signature': signature,
+                    'checked': time.monotonic()
+                }
+                self.project_cache.move_to_end(path)
+            
+            while len(self.project_cache) > self.max_projects:
+                evicted, _ = self.project_cache.popitem(last=False)
+                self.index.remove(evicted)
+        self._schedule_flush()
+    
+    def _forget(self, indexed_path: str):
+        """Drop an invalidated entry"""
+        with self.lock:
+            self.project_cache.pop(indexed_path, None)
+            self.index.remove(indexed_path)
     
     def _detect_git(self, path: Path) -> Optional[Dict]:
         """Detect git repository info"""
-        try:
-            # Check if it's a git repo
-            result = subprocess.run(
-                ['git', 'rev-parse', '--git-dir'],
-                cwd=path,
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode != 0:
-                return None
-            
-            # Get remote URL
-            result = subprocess.run(
-                ['git', 'config', '--get', 'remote.origin.url'],
-                cwd=path,
-                capture_output=True,
-                text=True
-            )
+        repo = self.git_reader.read(str(path))
+        if repo is None:
+            return None
+        
+        remote_url = repo['remotes'].get('origin')
+        
+        # Parse GitHub/GitLab URL to get project name
+        if remote_url:
+            # Convert SSH to HTTPS format for consistency
+            if remote_url.startswith('git@'):
+                remote_url = remote_url.replace(':', '/').replace('git@', 'https://')
             
-            remote_url = result.stdout.strip() if result.returncode == 0 else None
+            # Remove .git suffix
+            remote_url = remote_url.removesuffix('.git')
             
-            # Parse GitHub/GitLab URL to get project name
-            if remote_url:
-                # Convert SSH to HTTPS format for consistency
-                if remote_url.startswith('git@'):
-                    remote_url = remote_url.replace(':', '/').replace('git@', 'https://')
-                
-                # Remove .git suffix
-                remote_url = remote_url.removesuffix('.git')
+            # Extract project name from URL
+            parts = remote_url.split('/')
+            if len(parts) >= 2:
+                project_name = parts[-1]
+                org_name = parts[-2]
                 
-                # Extract project name from URL
-                parts = remote_url.split('/')
-                if len(parts) >= 2:
-                    project_name = parts[-1]
-                    org_name = parts[-2]
-                    
-                    return {
-                        'name': project_name,
-                        'git_remote': remote_url,
-                        'identifiers': {
-                            'git_org': org_name,
-                            'git_project': project_name
-                        }
+                return {
+                    'name': project_name,
+                    'git_remote': remote_url,
+                    'identifiers': {
+                        'git_org': org_name,
+                        'git_project': project_name
                     }
-            
-            # Get current branch
-            result = subprocess.run(
-                ['git', 'branch', '--show-current'],
-                cwd=path,
-                capture_output=True,
-                text=True
-            )
-            
-            branch = result.stdout.strip() if result.returncode == 0 else 'main'
-            
-            return {
-                'git_remote': remote_url,
-                'identifiers': {
-                    'git_branch': branch
                 }
+        
+        return {
+            'git_remote': remote_url,
+            'identifiers': {
+                'git_branch': repo['branch']
             }
-            
-        except Exception:
-            return None
+        }
     
     def _detect_project_type(self, path: Path) -> str:
         """Detect project type from characteristic files"""
+        listing = self._listing(str(path))
+        if listing[2] is None:
+            best = None
+            for name in listing[1]:
+                # Markers match as name suffixes (e.g. "App.csproj")
+                match = MARKER_PATTERN.search(name)
+                if match:
+                    priority = MARKER_PRIORITY[match.group(0)]
+                    if best is None or priority < best:
+                        best = priority
+            listing[2] = PROJECT_MARKERS[best][1] if best is not None else 'unknown'
+        return listing[2]
+    
+    def _list_dir(self, path: str) -> frozenset:
+        """Names in a directory"""
+        return self._listing(path)[1]
+    
+    def _listing(self, path: str) -> List:
+        """
+        [mtime, entry names, project type] for a directory from one scandir,
+        memoized until its mtime changes (adding or removing entries
+        updates it). The type is filled in on first use.
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return [0, frozenset(), None]
         
-        # Check for project files in priority order
-        checks = [
-            # Node.js/JavaScript
-            (['package.json'], 'node'),
-            (['yarn.lock'], 'node'),
-            (['pnpm-lock.yaml'], 'node'),
-            
-            # Python
-            (['requirements.txt'], 'python'),
-            (['setup.py'], 'python'),
-            (['pyproject.toml'], 'python'),
-            (['Pipfile'], 'python'),
-            (['poetry.lock'], 'python'),
-            
-            # Rust
-            (['Cargo.toml'], 'rust'),
-            
-            # Go
-            (['go.mod'], 'go'),
-            
-            # Ruby
-            (['Gemfile'], 'ruby'),
-            
-            # Java
-            (['pom.xml'], 'java'),
-            (['build.gradle'], 'java'),
-            
-            # C/C++
-            (['CMakeLists.txt'], 'cpp'),
-            (['Makefile'], 'c'),
-            
-            # .NET
-            (['.csproj', '.sln'], 'dotnet'),
-            
-            # Docker
-            (['Dockerfile'], 'docker'),
-            (['docker-compose.yml', 'docker-compose.yaml'], 'docker'),
-        ]
+        cached = self.listings.get(path)
+        if cached and cached[0] == mtime:
+            return cached
         
-        for files, project_type in checks:
-            for file in files:
-                if (path / file).exists() or list(path.glob(f'*{file}')):
-                    return project_type
+        try:
+            with os.scandir(path) as entries:
+                names = frozenset(entry.name for entry in entries)
+        except OSError:
+            names = frozenset()
         
-        return 'unknown'
+        if len(self.listings) >= self.max_listings:
+            self.listings.clear()
+        listing = self.listings[path] = [mtime, names, None]
+        return listing
     
     def _get_project_name(self, path: Path, project_type: str) -> Optional[str]:
         """Extract project name from package files"""
         
+        names = self._list_dir(str(path))
         try:
             if project_type == 'node':
                 package_json = path / 'package.json'
-                if package_json.exists():
+                if 'package.json' in names:
                     with open(package_json) as f:
                         data = json.load(f)
                         return data.get('name', path.name)
@@ -223,17 +431,16 @@ class ProjectDetector:
             elif project_type == 'python':
                 # Check setup.py
                 setup_py = path / 'setup.py'
-                if setup_py.exists():
+                if 'setup.py' in names:
                     # Simple regex to find name= in setup()
                     content = setup_py.read_text()
-                    import re
                     match = re.search(r'name\s*=\s*["\']([^"\']+)["\']', content)
                     if match:
                         return match.group(1)
                 
                 # Check pyproject.toml
                 pyproject = path / 'pyproject.toml'
-                if pyproject.exists():
+                if 'pyproject.toml' in names:
                     try:
                         import tomllib
                         with open(pyproject, 'rb') as f:
@@ -250,7 +457,7 @@ class ProjectDetector:
             
             elif project_type == 'rust':
                 cargo_toml = path / 'Cargo.toml'
-                if cargo_toml.exists():
+                if 'Cargo.toml' in names:
                     try:
                         import toml
                         data = toml.load(cargo_toml)
@@ -260,7 +467,7 @@ class ProjectDetector:
             
             elif project_type == 'go':
                 go_mod = path / 'go.mod'
-                if go_mod.exists():
+                if 'go.mod' in names:
                     content = go_mod.read_text()
                     lines = content.split('\n')
                     if lines and lines[0].startswith('module '):
@@ -272,43 +479,38 @@ class ProjectDetector:
         
         return None
     
-    def _find_project_root(self, path: Path) -> Path:
-        """Find project root by going up until no more project files"""
+    def _locate_project_root(self, path: Path) -> Optional[Path]:
+        """Project root containing path, or None if it isn't in a project"""
         
-        current = path.resolve()
-        project_type = None
+        current = os.path.realpath(path)
+        home = os.path.expanduser('~')
         
         # Keep going up while we find project indicators
-        while current.parent != current:
-            # Check if this looks like a project root
-            if (current / '.git').exists():
-                return current
-            
-            # Check for root-level project files
-            root_indicators = [
-                'package.json', 'requirements.txt', 'setup.py',
-                'Cargo.toml', 'go.mod', 'Gemfile', 'pom.xml',
-                '.gitignore', 'README.md', 'Makefile'
-            ]
+        while True:
+            parent = os.path.dirname(current)
+            if parent == current:
+                break
+            names = self._list_dir(current)
             
-            has_indicator = any((current / f).exists() for f in root_indicators)
+            # Check if this looks like a project root
+            if '.git' in names:
+                return Path(current)
             
-            if has_indicator:
+            if not ROOT_INDICATORS.isdisjoint(names):
                 # Check if parent also has indicators
-                parent = current.parent
-                parent_has_indicator = any((parent / f).exists() for f in root_indicators)
+                parent_names = self._list_dir(parent)
                 
                 # If parent doesn't have indicators, we found the root
-                if not parent_has_indicator or (parent / '.git').exists():
-                    return current
+                if ROOT_INDICATORS.isdisjoint(parent_names) or '.git' in parent_names:
+                    return Path(current)
             
-            current = current.parent
+            current = parent
             
             # Stop at home or root directory
-            if current == Path.home() or current == Path('/'):
+            if current == home or current == os.sep:
                 break
         
-        return path
+        return None
     
     def track_project_switch(self, old_project: Dict, new_project: Dict) -> Dict:
         """Create an event for project context switch"""
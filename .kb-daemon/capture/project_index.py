@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Project Index - Resolves paths to known project roots without touching disk
+
+A trie keyed by path components. Project roots resolve every path beneath
+them (the deepest root wins, so nested projects take precedence over the
+repository around them). Directories that turned out not to belong to any
+project are remembered for that exact path only, so a stray shell in $HOME
+doesn't swallow every project below it. Project roots found inside a known
+root but not detected yet are marked as nested, so paths below them are
+sent to detection instead of resolving to the outer root.
+"""
+
+import os
+from typing import Dict, Iterator, Optional, Tuple
+
+
+class _Node:
+    __slots__ = ('children', 'project', 'exact', 'nested')
+
+    def __init__(self):
+        self.children = {}
+        self.project = None  # project rooted here: resolves all paths below
+        self.exact = None  # detection result for this directory only
+        self.nested = False  # a project root inside the enclosing one
+
+
+class ProjectIndex:
+    """Path-component trie of project roots"""
+
+    def __init__(self):
+        self.root = _Node()
+        self.count = 0
+
+    def lookup(self, path: str) -> Optional[Tuple[str, Dict]]:
+        """
+        (indexed path, project) for an absolute directory path, or None if
+        it needs detection
+        """
+        parts = self._parts(path)
+        node = self.root
+        found = None
+        for depth, part in enumerate(parts, 1):
+            node = node.children.get(part)
+            if node is None:
+                return found
+            if node.project is not None:
+                found = (self._join(parts[:depth]), node.project)
+            elif node.nested:
+                found = None
+        if node.exact is not None:
+            return self._join(parts), node.exact
+        return found
+
+    def insert(self, path: str, project: Dict, exact: bool = False):
+        """Register a project root (or an exact, non-project directory)"""
+        node = self.root
+        for part in self._parts(path):
+            node = node.children.setdefault(part, _Node())
+        if node.project is None and node.exact is None:
+            self.count += 1
+        # A directory is either a project root or an exact entry
+        if exact:
+            node.exact, node.project = project, None
+        else:
+            node.project, node.exact = project, None
+
+    def set_nested(self, path: str, nested):
+        """
+        Replace the nested roots recorded for the project root at path.
+        Markers inside other known roots belong to those roots and are kept.
+        """
+        start = self.root
+        for part in self._parts(path):
+            start = start.children.get(part)
+            if start is None:
+                return
+
+        stack = list(start.children.values())
+        while stack:
+            node = stack.pop()
+            node.nested = False
+            if node.project is None:
+                stack.extend(node.children.values())
+
+        for nested_path in nested:
+            node = self.root
+            for part in self._parts(nested_path):
+                node = node.children.setdefault(part, _Node())
+            node.nested = True
+
+    def remove(self, path: str):
+        """Forget a root or exact directory, pruning empty branches"""
+        trail = [self.root]
+        for part in self._parts(path):
+            node = trail[-1].children.get(part)
+            if node is None:
+                return
+            trail.append(node)
+
+        node = trail[-1]
+        if node.project is None and node.exact is None:
+            return
+        node.project = node.exact = None
+        self.count -= 1
+
+        parts = self._parts(path)
+        for depth in range(len(parts), 0, -1):
+            node = trail[depth]
+            if node.children or node.project is not None or node.exact is not None or node.nested:
+                break
+            del trail[depth - 1].children[parts[depth - 1]]
+
+    def entries(self) -> Iterator[Tuple[str, Dict, bool]]:
+        """(path, project, exact) for everything indexed"""
+        stack = [('', self.root)]
+        while stack:
+            prefix, node = stack.pop()
+            if node.project is not None:
+                yield prefix or os.sep, node.project, False
+            if node.exact is not None:
+                yield prefix or os.sep, node.exact, True
+            for part, child in node.children.items():
+                stack.append((os.path.join(prefix or os.sep, part), child))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _join(self, parts) -> str:
+        """Absolute path from components"""
+        return os.sep + os.sep.join(parts)
+
+    def _parts(self, path: str):
+        """Components of an absolute path"""
+        return [p for p in path.split(os.sep) if p]
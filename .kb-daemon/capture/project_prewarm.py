@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Project Prewarm - Detects likely projects before the first batch needs them
+
+At startup the daemon knows where activity will come from: the watched
+project roots and the directories recent shell and git events ran in. The
+prewarmer detects those concurrently in a bounded thread pool (detection
+is mostly filesystem and git I/O, done outside the detector's lock), so the
+first batch resolves its paths from the project index instead of detecting
+each distinct directory serially. Progress is written to a small status
+file that `kb-daemon status` reads.
+"""
+
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from threading import Event
+from typing import Dict, Iterable, List, Optional
+
+from capture.segmented_log import SegmentedLog
+
+
+class ProjectPrewarmer:
+    """Concurrent startup detection of watched and recently active directories"""
+
+    def __init__(self, detector, base_path: Path, config: Optional[Dict] = None):
+        config = config or {}
+        self.detector = detector
+        self.status_file = Path(base_path) / "capture" / "prewarm_status.json"
+        self.workers = config.get('project_prewarm_workers', 8)
+        self.recent_events = config.get('project_prewarm_events', 5000)
+        self.max_paths = config.get('project_prewarm_max_paths', 500)
+        self.done = Event()
+        self.state = {'state': 'pending', 'paths': 0, 'detected': 0, 'errors': 0,
+                      'projects': 0, 'started': None, 'seconds': 0.0}
+
+    def candidates(self, roots: Iterable[Path], logs: Iterable[SegmentedLog]) -> List[str]:
+        """Existing directories to detect: most recently active first, then the roots"""
+        paths = []
+        seen = set()
+        for log in logs:
+            for line in reversed(log.last(self.recent_events)):
+                directory = self._event_directory(line)
+                if directory and directory not in seen:
+                    seen.add(directory)
+                    paths.append(directory)
+        for root in roots:
+            root = os.path.abspath(root)
+            if root not in seen:
+                seen.add(root)
+                paths.append(root)
+        return [p for p in paths if os.path.isdir(p)][:self.max_paths]
+
+    def run(self, roots: Iterable[Path], logs: Iterable[SegmentedLog]) -> Dict:
+        """Detect every candidate; sets `done` when finished (even on failure)"""
+        start = time.monotonic()
+        self.state.update(state='running', started=time.time())
+        try:
+            paths = self.candidates(roots, logs)
+            self.state['paths'] = len(paths)
+            self._write_status(start)
+
+            projects = set()
+            with ThreadPoolExecutor(max_workers=self.workers,
+                                    thread_name_prefix='project-prewarm') as pool:
+                futures = [pool.submit(self.detector.detect_project, Path(p)) for p in paths]
+                for future in as_completed(futures):
+                    try:
+                        projects.add(future.result()['path'])
+                    except Exception:
+                        self.state['errors'] += 1
+                    self.state['detected'] += 1
+                    if self.state['detected'] % 50 == 0:
+                        self.state['projects'] = len(projects)
+                        self._write_status(start)
+
+            self.state.update(state='done', projects=len(projects))
+        except Exception as e:
+            self.state.update(state='failed', error=str(e))
+        finally:
+            self._write_status(start)
+            self.done.set()
+        return dict(self.state)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the prewarm finished (or timeout); True if it did"""
+        return self.done.wait(timeout)
+
+    @staticmethod
+    def read_status(base_path: Path) -> Optional[Dict]:
+        """Last prewarm status written by the daemon"""
+        try:
+            with open(Path(base_path) / "capture" / "prewarm_status.json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _event_directory(self, line: str) -> Optional[str]:
+        """Directory an event from the capture logs happened in"""
+        try:
+            data = json.loads(line).get('data') or {}
+        except (ValueError, AttributeError):
+            return None
+        directory = data.get('working_dir') or data.get('repo') or data.get('to')
+        return directory if isinstance(directory, str) and os.path.isabs(directory) else None
+
+    def _write_status(self, start: float):
+        """Persist progress (write, then atomic rename)"""
+        self.state['seconds'] = round(time.monotonic() - start, 2)
+        try:
+            self.status_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.status_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(self.state, f)
+            os.replace(tmp_file, self.status_file)
+        except OSError:
+            pass
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Snapshot Reconciler - Detects file changes the live watcher never saw
+
+Keeps a persisted per-project snapshot of paths, mtimes and sizes. Diffing a
+fresh scan against it recovers changes made while the daemon was down or
+dropped by an inotify queue overflow.
+"""
+
+import os
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+
+class SnapshotReconciler:
+    """Scans watched projects and diffs them against persisted snapshots"""
+
+    SNAPSHOT_VERSION = 1
+
+    def __init__(self, snapshot_dir: Path, is_ignored_name: Callable[[str], bool],
+                 max_workers: int = 8):
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        self.is_ignored_name = is_ignored_name
+        self.max_workers = max_workers
+
+    def reconcile(self, roots: List[Path]) -> Dict[str, List[Tuple[str, str]]]:
+        """
+        Scan every root in parallel and persist the new snapshots.
+        Returns: {root: [(event_type, absolute_path), ...]}
+        """
+        roots = [r for r in roots if r.is_dir()]
+        if not roots:
+            return {}
+
+        workers = max(1, min(self.max_workers, len(roots)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(self.reconcile_root, roots)
+            return {str(root): changes for root, changes in zip(roots, results)}
+
+    def reconcile_root(self, root: Path) -> List[Tuple[str, str]]:
+        """Scan a single project root, diff it and persist the snapshot"""
+        previous = self._load_snapshot(root)
+        current = self._scan(root, previous)
+        self._save_snapshot(root, current)
+
+        # A project seen for the first time has no baseline to diff against
+        if previous is None:
+            return []
+
+        return self._diff(root, previous['files'], current['files'])
+
+    def _scan(self, root: Path, previous: Dict = None) -> Dict:
+        """
+        Walk a project with os.scandir.
+
+        Directories whose mtime is unchanged since the last snapshot keep
+        their cached listing, so only their files are stat'ed; the entry
+        set of such a directory cannot have changed.
+        """
+        old_dirs = previous['dirs'] if previous else {}
+        dirs = {}
+        files = {}
+
+        stack = ['']
+        while stack:
+            rel_dir = stack.pop()
+            abs_dir = os.path.join(root, rel_dir) if rel_dir else str(root)
+
+            try:
+                dir_mtime = os.stat(abs_dir).st_mtime_ns
+            except OSError:
+                continue
+
+            cached = old_dirs.get(rel_dir)
+            if cached and cached['m'] == dir_mtime:
+                subdirs, names = cached['d'], cached['f']
+                for name in names:
+                    rel_path = os.path.join(rel_dir, name) if rel_dir else name
+                    try:
+                        st = os.stat(os.path.join(abs_dir, name))
+                    except OSError:
+                        continue
+                    files[rel_path] = [st.st_mtime_ns, st.st_size]
+            else:
+                subdirs, names = [], []
+                try:
+                    with os.scandir(abs_dir) as it:
+                        for entry in it:
+                            if self.is_ignored_name(entry.name):
+                                continue
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    subdirs.append(entry.name)
+                                elif entry.is_file(follow_symlinks=False):
+                                    st = entry.stat(follow_symlinks=False)
+                                    rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                                    files[rel_path] = [st.st_mtime_ns, st.st_size]
+                                    names.append(entry.name)
+                            except OSError:
+                                continue
+                except OSError:
+                    continue
+
+            dirs[rel_dir] = {'m': dir_mtime, 'd': subdirs, 'f': names}
+            for name in subdirs:
+                stack.append(os.path.join(rel_dir, name) if rel_dir else name)
+
+        # Files that vanished from unchanged directories fail their stat above
+        # and are simply absent from the new snapshot
+        return {'dirs': dirs, 'files': files}
+
+    def _diff(self, root: Path, old_files: Dict, new_files: Dict) -> List[Tuple[str, str]]:
+        """Compare two file maps and produce synthetic watchdog-style changes"""
+        changes = []
+
+        for rel_path, stat in new_files.items():
+            old = old_files.get(rel_path)
+            if old is None:
+                changes.append(('created', os.path.join(root, rel_path)))
+            elif old != stat:
+                changes.append(('modified', os.path.join(root, rel_path)))
+
+        for rel_path in old_files.keys() - new_files.keys():
+            changes.append(('deleted', os.path.join(root, rel_path)))
+
+        return changes
+
+    def _snapshot_path(self, root: Path) -> Path:
+        """Snapshot file for a project root"""
+        digest = hashlib.sha1(str(root).encode()).hexdigest()[:12]
+        return self.snapshot_dir / f"{root.name}-{digest}.json"
+
+    def _load_snapshot(self, root: Path):
+        """Load a persisted snapshot, or None if missing or stale"""
+        snapshot_file = self._snapshot_path(root)
+        if not snapshot_file.exists():
+            return None
+
+        try:
+            with open(snapshot_file) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if snapshot.get('version') != self.SNAPSHOT_VERSION or snapshot.get('root') != str(root):
+            return None
+        return snapshot
+
+    def _save_snapshot(self, root: Path, snapshot: Dict):
+        """Persist a snapshot atomically in compact JSON"""
+        snapshot_file = self._snapshot_path(root)
+        tmp_file = snapshot_file.with_suffix('.tmp')
+
+        payload = {'version': self.SNAPSHOT_VERSION, 'root': str(root)}
+        payload.update(snapshot)
+
+        with open(tmp_file, 'w') as f:
+            json.dump(payload, f, separators=(',', ':'))
+        os.replace(tmp_file, snapshot_file)
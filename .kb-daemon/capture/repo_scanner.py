@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Repo Scanner - Catches up on commits the git hooks never saw
+
+Hooks only exist in repositories cloned after init.templatedir was set.
+The scanner finds repositories under the watched roots, remembers the tip
+of every local branch it has ingested, and logs only the commits since then.
+Repositories are scanned concurrently (one git for-each-ref and one git log
+each). The resulting git_commit events go through the same steps as live
+events on the calling thread: they are attributed to the repository's
+project, categorized and filtered by min_importance, then bulk-inserted,
+deduplicated by commit hash against what the hooks already captured.
+"""
+
+import json
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from capture.git_hooks import GitHooks, COMMIT_LOG_FORMAT, parse_commit_log
+from capture.project_detector import ProjectDetector
+from process.categorizer import ActivityCategorizer
+
+SKIP_DIRS = {'node_modules', 'venv', '.venv', '__pycache__', 'target', 'build', 'dist'}
+
+
+class RepoScanner:
+    """Incremental, parallel git log ingestion across many repositories"""
+
+    def __init__(self, db, git_hooks: GitHooks, base_path: Path, config: Optional[Dict] = None,
+                 project_detector: Optional[ProjectDetector] = None,
+                 categorizer: Optional[ActivityCategorizer] = None, min_importance: int = 3):
+        config = config or {}
+        self.db = db
+        self.git_hooks = git_hooks
+        self.project_detector = project_detector
+        # Scans replay history: keep them out of the live context window
+        self.categorizer = categorizer or ActivityCategorizer(
+            Path(__file__).parent.parent / "config" / "patterns.yml"
+        )
+        self.min_importance = min_importance
+        self.roots = [Path(os.path.expanduser(r)) for r in config.get('repo_scan_roots', ['~/DEV'])]
+        self.max_depth = config.get('repo_scan_depth', 3)
+        self.workers = config.get('repo_scan_workers', 8)
+        self.since_days = config.get('repo_scan_since_days', 30)
+        self.state_file = Path(base_path) / "capture" / "offsets" / "repo_scan.json"
+        self.state = self._load_state()  # repo -> {ref: last ingested tip}
+
+    def discover(self) -> List[Path]:
+        """Repositories under the roots (not descending into repositories)"""
+        repos = []
+        pending = [(root, 0) for root in self.roots if root.is_dir()]
+        while pending:
+            path, depth = pending.pop()
+            if (path / ".git").exists():
+                repos.append(path)
+                continue
+            if depth >= self.max_depth:
+                continue
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if (entry.is_dir(follow_symlinks=False) and not entry.name.startswith('.')
+                                and entry.name not in SKIP_DIRS):
+                            pending.append((Path(entry.path), depth + 1))
+            except OSError:
+                continue
+        return sorted(repos)
+
+    def scan(self, repos: Optional[List[Path]] = None) -> Dict:
+        """Ingest new commits from every repository; returns counts"""
+        repos = self.discover() if repos is None else repos
+        stats = {'repos': len(repos), 'updated': 0, 'commits': 0, 'stored': 0, 'errors': 0}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._scan_repo, repo): repo for repo in repos}
+            for future in as_completed(futures):
+                repo = str(futures[future])
+                try:
+                    tips, events = future.result()
+                except Exception as e:
+                    stats['errors'] += 1
+                    print(f"Error scanning {repo}: {e}")
+                    continue
+
+                if events:
+                    stats['commits'] += len(events)
+                    stats['stored'] += self.db.store_events(self._prepare(repo, events))
+                if tips != self.state.get(repo):
+                    # Only advance once the commits are stored
+                    self.state[repo] = tips
+                    stats['updated'] += 1
+
+        self._save_state()
+        return stats
+
+    def _scan_repo(self, repo: Path) -> Tuple[Dict[str, str], List[Dict]]:
+        """Current branch tips and git_commit events for commits since the last scan"""
+        tips = self._branch_tips(repo)
+        known = self.state.get(str(repo), {})
+        new_tips = [sha for ref, sha in tips.items() if known.get(ref) != sha]
+        if not new_tips:
+            return tips, []
+
+        # Commits reachable from a moved tip but from no tip already ingested
+        revs = new_tips + [f'^{sha}' for sha in set(known.values())]
+        args = ['git', 'log', '--stdin', '--ignore-missing', '--source', '--numstat',
+                f'--format={COMMIT_LOG_FORMAT}']
+        if not known and self.since_days:
+            args.append(f'--since={self.since_days}.days.ago')
+        email = self.git_hooks.repo_email(str(repo))
+        if email:
+            # Like post-commit, only the user's own commits
+            args += ['--fixed-strings', f'--author=<{email}>']
+
+        result = subprocess.run(args, input='\n'.join(revs) + '\n', capture_output=True,
+                                text=True, errors='replace', cwd=repo)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or 'git log failed')
+
+        events = []
+        for commit_hash, committed, source, info in parse_commit_log(result.stdout):
+            event = {
+                'type': 'git_commit',
+                'timestamp': datetime.utcfromtimestamp(committed).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'data': {
+                    'hash': commit_hash,
+                    'message': info['message'],
+                    'branch': source[len('refs/heads/'):] if source.startswith('refs/heads/') else source,
+                    'commit_type': self.git_hooks.commit_type(info['message']),
+                    'files_changed': '\n'.join(info['files']),
+                    'repo': str(repo),
+                    'working_dir': str(repo),
+                    'source': 'repo_scan'
+                }
+            }
+            events.append(self.git_hooks.process_git_event(event, cwd=str(repo)))
+        return tips, events
+
+    def _prepare(self, repo: str, events: List[Dict]) -> List[Dict]:
+        """
+        Attribute a repository's commits to its project, categorize them
+        oldest first and keep those important enough to store
+        """
+        if self.project_detector:
+            project = ProjectDetector.event_context(self.project_detector.detect_project(Path(repo)))
+            for event in events:
+                event['project'] = project
+
+        events.sort(key=lambda e: e['timestamp'])
+        categorized = self.categorizer.categorize_batch(events)
+        return [e for e in categorized if e.get('importance', 0) >= self.min_importance]
+
+    def _branch_tips(self, repo: Path) -> Dict[str, str]:
+        """Local branch name -> tip commit"""
+        result = subprocess.run(
+            ['git', 'for-each-ref', '--format=%(refname)%09%(objectname)', 'refs/heads'],
+            capture_output=True, text=True, cwd=repo
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or 'git for-each-ref failed')
+        tips = {}
+        for line in result.stdout.splitlines():
+            ref, _, sha = line.partition('\t')
+            if sha:
+                tips[ref] = sha
+        return tips
+
+    def _load_state(self) -> Dict[str, Dict[str, str]]:
+        """Load last ingested branch tips"""
+        try:
+            with open(self.state_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        """Persist branch tips (write, then atomic rename)"""
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.state_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_file, self.state_file)
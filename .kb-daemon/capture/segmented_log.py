@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Segmented Log - Rotated, compressed storage for append-only capture logs
+
+Producers keep appending to the active `<name>.jsonl`. Once it grows past a
+size or age bound the daemon renames it into `segments/<name>/` and, after
+the tailer has drained it, seals it: the lines are rewritten as a
+multi-member gzip file and a small index records the first and last
+timestamp, line count and the compressed offset of every member. Totals,
+"last N" and time-bounded replay read the indexes and decompress only the
+members they need.
+"""
+
+import os
+import re
+import json
+import gzip
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+TIMESTAMP_PATTERN = re.compile(rb'"timestamp"\s*:\s*"([^"]+)"')
+
+
+class SegmentedLog:
+    """An active JSONL file plus its sealed, indexed segments"""
+
+    def __init__(self, capture_dir: Path, name: str, max_bytes: int = 16 * 1024 * 1024,
+                 max_age_seconds: float = 86400, member_lines: int = 1000):
+        self.name = name
+        self.active_path = Path(capture_dir) / f"{name}.jsonl"
+        self.segment_dir = Path(capture_dir) / "segments" / name
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.member_lines = member_lines
+
+        self._first_ts_cache = (None, None)  # (inode, first timestamp)
+
+    # Rotation and sealing (called by the tailer that owns the active file)
+
+    def should_rotate(self, size: int, inode: int) -> bool:
+        """Whether the active file has outgrown its size or age bound"""
+        if size <= 0:
+            return False
+        if size >= self.max_bytes:
+            return True
+
+        first_ts = self._active_first_timestamp(inode)
+        return first_ts is not None and time.time() - first_ts >= self.max_age_seconds
+
+    def rotate(self) -> Optional[Path]:
+        """Move the active file aside as the next plain segment"""
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
+        target = self.segment_dir / f"{self.name}-{self._next_seq():06d}.jsonl"
+        try:
+            os.rename(self.active_path, target)
+        except FileNotFoundError:
+            return None
+        return target
+
+    def pending(self) -> List[Path]:
+        """Plain segments that have been rotated but not sealed yet"""
+        if not self.segment_dir.exists():
+            return []
+        return sorted(self.segment_dir.glob(f"{self.name}-*.jsonl"))
+
+    def seal(self, plain_path: Path) -> Dict:
+        """Compress a plain segment into gzip members and write its index"""
+        plain_path = Path(plain_path)
+        gz_path = plain_path.with_suffix('.jsonl.gz')
+        tmp_path = gz_path.with_suffix('.tmp')
+
+        index = {
+            'file': gz_path.name,
+            'seq': self._seq_of(plain_path),
+            'first_ts': None,
+            'last_ts': None,
+            'lines': 0,
+            'bytes': 0,
+            'members': []
+        }
+
+        with open(plain_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            batch = []
+            for line in src:
+                if not line.strip():
+                    continue
+                if not line.endswith(b'\n'):
+                    line += b'\n'
+                batch.append(line)
+                if len(batch) >= self.member_lines:
+                    self._write_member(dst, batch, index)
+                    batch = []
+            if batch:
+                self._write_member(dst, batch, index)
+            dst.flush()
+            os.fsync(dst.fileno())
+
+        index['compressed_bytes'] = os.path.getsize(tmp_path)
+        os.replace(tmp_path, gz_path)
+        self._save_index(gz_path, index)
+        plain_path.unlink()
+        return index
+
+    def _write_member(self, dst, lines: List[bytes], index: Dict):
+        """Append one independently decompressible gzip member"""
+        data = b''.join(lines)
+        offset = dst.tell()
+        dst.write(gzip.compress(data, compresslevel=6))
+
+        first_ts = self._line_timestamp(lines[0])
+        last_ts = self._line_timestamp(lines[-1])
+        index['members'].append({
+            'offset': offset,
+            'length': dst.tell() - offset,
+            'first_line': index['lines'],
+            'lines': len(lines),
+            'first_ts': first_ts
+        })
+        index['first_ts'] = index['first_ts'] or first_ts
+        index['last_ts'] = last_ts or index['last_ts']
+        index['lines'] += len(lines)
+        index['bytes'] += len(data)
+
+    # Reading
+
+    def segments(self) -> List[Dict]:
+        """Indexes of all sealed segments, oldest first"""
+        if not self.segment_dir.exists():
+            return []
+
+        indexes = []
+        for index_file in sorted(self.segment_dir.glob(f"{self.name}-*.idx.json")):
+            try:
+                with open(index_file) as f:
+                    indexes.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return indexes
+
+    def stats(self) -> Dict:
+        """Line and byte totals without reading sealed history"""
+        sealed = self.segments()
+        stats = {
+            'segments': len(sealed),
+            'lines': sum(s['lines'] for s in sealed),
+            'bytes': sum(s['bytes'] for s in sealed),
+            'compressed_bytes': sum(s.get('compressed_bytes', 0) for s in sealed),
+            'first_ts': sealed[0]['first_ts'] if sealed else None,
+            'last_ts': sealed[-1]['last_ts'] if sealed else None
+        }
+
+        # Pending and active files are bounded by max_bytes, so counting
+        # their newlines stays cheap
+        for path in self.pending() + [self.active_path]:
+            lines, size = self._count_lines(path)
+            stats['lines'] += lines
+            stats['bytes'] += size
+
+        return stats
+
+    def last(self, n: int) -> List[str]:
+        """The newest n lines, newest last"""
+        collected = []
+
+        for path in [self.active_path] + list(reversed(self.pending())):
+            if len(collected) >= n:
+                break
+            collected = self._tail_file(path, n - len(collected)) + collected
+
+        for index in reversed(self.segments()):
+            if len(collected) >= n:
+                break
+            for member in reversed(index['members']):
+                lines = self._read_member(index, member)
+                collected = lines[-(n - len(collected)):] + collected
+                if len(collected) >= n:
+                    break
+
+        return collected[-n:] if n > 0 else []
+
+    def replay(self, since: Optional[str] = None) -> Iterator[str]:
+        """
+        Yield every line in order, starting at the first member that can
+        contain `since` (an ISO timestamp) when given.
+        """
+        for index in self.segments():
+            if since and index['last_ts'] and index['last_ts'] < since:
+                continue
+
+            members = index['members']
+            start = 0
+            if since:
+                # Last member that starts at or before `since`
+                for i, member in enumerate(members):
+                    if member['first_ts'] and member['first_ts'] <= since:
+                        start = i
+            for member in members[start:]:
+                for line in self._read_member(index, member):
+                    if since:
+                        ts = self._line_timestamp(line.encode())
+                        if ts and ts < since:
+                            continue
+                    yield line
+
+        for path in self.pending() + [self.active_path]:
+            try:
+                with open(path, 'rb') as f:
+                    for raw in f:
+                        if not raw.strip():
+                            continue
+                        ts = self._line_timestamp(raw)
+                        if since and ts and ts < since:
+                            continue
+                        yield raw.decode('utf-8', errors='replace').rstrip('\n')
+            except FileNotFoundError:
+                continue
+
+    def _read_member(self, index: Dict, member: Dict) -> List[str]:
+        """Decompress a single gzip member"""
+        with open(self.segment_dir / index['file'], 'rb') as f:
+            f.seek(member['offset'])
+            data = zlib.decompress(f.read(member['length']), wbits=31)
+        return data.decode('utf-8', errors='replace').splitlines()
+
+    # Helpers
+
+    def _active_first_timestamp(self, inode: int) -> Optional[float]:
+        """Epoch time of the active file's first event, cached per inode"""
+        cached_inode, cached_ts = self._first_ts_cache
+        if cached_inode == inode and cached_ts is not None:
+            return cached_ts
+
+        first_ts = None
+        try:
+            with open(self.active_path, 'rb') as f:
+                line = f.readline(64 * 1024)
+            ts = self._line_timestamp(line)
+            if ts:
+                first_ts = datetime.fromisoformat(ts.replace('Z', '+00:00')).timestamp()
+        except (OSError, ValueError):
+            pass
+
+        self._first_ts_cache = (inode, first_ts)
+        return first_ts
+
+    def _line_timestamp(self, line: bytes) -> Optional[str]:
+        """Timestamp field of a raw JSONL line, without a full parse"""
+        match = TIMESTAMP_PATTERN.search(line)
+        return match.group(1).decode() if match else None
+
+    def _count_lines(self, path: Path):
+        """Newline count and size of a plain file, read in chunks"""
+        lines = size = 0
+        try:
+            with open(path, 'rb') as f:
+                while True:
+                    chunk = f.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    lines += chunk.count(b'\n')
+                    size += len(chunk)
+        except FileNotFoundError:
+            pass
+        return lines, size
+
+    def _tail_file(self, path: Path, n: int) -> List[str]:
+        """Last n lines of a plain file, reading backwards in blocks"""
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return []
+
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            data = b''
+            position = end
+            while position > 0 and data.count(b'\n') <= n:
+                step = min(64 * 1024, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+
+        lines = [line.decode('utf-8', errors='replace') for line in data.splitlines() if line.strip()]
+        return lines[-n:] if n > 0 else []
+
+    def _next_seq(self) -> int:
+        """Sequence number after the highest existing segment"""
+        seqs = [self._seq_of(p) for p in self.segment_dir.glob(f"{self.name}-*.jsonl*")]
+        return max(seqs, default=0) + 1
+
+    def _seq_of(self, path: Path) -> int:
+        """Sequence number encoded in a segment file name"""
+        stem = path.name[len(self.name) + 1:].split('.', 1)[0]
+        return int(stem) if stem.isdigit() else 0
+
+    def _save_index(self, gz_path: Path, index: Dict):
+        """Persist a segment index atomically"""
+        index_path = gz_path.with_name(gz_path.name.replace('.jsonl.gz', '.idx.json'))
+        tmp_path = index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, separators=(',', ':'))
+        os.replace(tmp_path, index_path)
@@ -12,11 +12,20 @@ from pathlib import Path
 from typing import Dict, List, Any, Optional
 from queue import Queue
 import subprocess
+import shlex
 import re
 
+from capture.command_classifier import CommandClassifier
+from capture.command_window import CommandWindow
+from capture.log_tailer import LogTailer
+from capture.segmented_log import SegmentedLog
+
 class ShellMonitor:
     """Monitors shell commands and captures important activities"""
     
+    # Wrappers that run the next word as the actual command
+    COMMAND_PREFIXES = {'sudo', 'time', 'command', 'builtin', 'exec', 'nohup', 'env', 'nice'}
+    
     def __init__(self, capture_queue: Queue, config: Dict, base_path=None):
         self.capture_queue = capture_queue
         self.config = config
@@ -24,11 +33,24 @@ class ShellMonitor:
         self.base_path = base_path or Path.home()
         self.events_file = self.base_path / "capture" / "shell_events.jsonl"
         self.events_file.parent.mkdir(parents=True, exist_ok=True)
+        self.segments = SegmentedLog(
+            self.events_file.parent, "shell_events",
+            max_bytes=int(config.get('log_segment_mb', 16) * 1024 * 1024),
+            max_age_seconds=config.get('log_segment_max_age_hours', 24) * 3600
+        )
+        self.tailer = LogTailer(
+            self.events_file,
+            self.base_path / "capture" / "offsets" / "shell_events.json",
+            segments=self.segments
+        )
         
         # Track command patterns
         self.track_commands = config.get('track_commands', [])
-        self.command_history = []  # Keep recent commands for pattern detection
-        self.last_error = None
+        self.classifier = CommandClassifier(self.base_path / "config" / "patterns.yml")
+        self.window = CommandWindow(config.get('pattern_window_seconds', 600))
+        
+        # Events arrive from both the file tailer and the event socket
+        self.lock = threading.Lock()
         
     def start(self):
         """Start monitoring shell commands"""
@@ -44,6 +66,7 @@ class ShellMonitor:
     def stop(self):
         """Stop monitoring"""
         self.running = False
+        self.tailer.stop()
         
     def _install_shell_integration(self):
         """Install shell integration for command capture"""
@@ -51,70 +74,11 @@ class ShellMonitor:
         wrapper_script = self.base_path / "shell_wrapper.sh"
         capture_dir = self.base_path / "capture"
         
-        wrapper_content = f'''#!/bin/bash
-# KB Daemon Shell Wrapper
-
-# Set capture directory
-export KB_CAPTURE_DIR="{capture_dir}"
-
-kb_capture_command() {{
-    local cmd="$1"
-    shift
-    local args="$@"
-    local start_time=$(date +%s)
-    local working_dir=$(pwd)
-    
-    # Run the actual command
-    command "$cmd" "$args"
-    local exit_code=$?
-    local end_time=$(date +%s)
-    local duration=$((end_time - start_time))
-    
-    # Capture the output (last 100 lines)
-    local output_file="/tmp/kb_cmd_output_$$"
-    
-    # Create event JSON
-    cat > /tmp/kb_event_$$.json <<EOF
-{{
-    "type": "shell_command",
-    "timestamp": "$(date -u +"%Y-%m-%dT%H:%M:%SZ")",
-    "data": {{
-        "command": "$cmd",
-        "args": "$args",
-        "exit_code": $exit_code,
-        "duration": $duration,
-        "working_dir": "$working_dir"
-    }}
-}}
-EOF
-    
-    # Append to events file
-    cat /tmp/kb_event_$$.json >> "$KB_CAPTURE_DIR/shell_events.jsonl"
-    rm /tmp/kb_event_$$.json
-    
-    return $exit_code
-}}
-
-# Alias tracked commands
-KB_TRACK_COMMANDS=(npm yarn pnpm cargo pytest python node docker kubectl terraform ansible make)
-
-for cmd in "${{KB_TRACK_COMMANDS[@]}}"; do
-    if command -v "$cmd" > /dev/null 2>&1; then
-        alias $cmd="kb_capture_command $cmd"
-    fi
-done
-
-# Enhanced prompt command for context
-kb_prompt_command() {{
-    # Capture directory changes
-    if [ "$PWD" != "$OLDPWD" ]; then
-        echo '{{"type":"dir_change","timestamp":"'$(date -u +"%Y-%m-%dT%H:%M:%SZ")'","data":{{"from":"'$OLDPWD'","to":"'$PWD'"}}}}' >> "$KB_CAPTURE_DIR/shell_events.jsonl"
-    fi
-}}
-
-# Add to PROMPT_COMMAND
-export PROMPT_COMMAND="${{PROMPT_COMMAND:+$PROMPT_COMMAND; }}kb_prompt_command"
-'''
+        wrapper_content = self.render_shell_wrapper(
+            capture_dir,
+            flush_every=self.config.get('shell_flush_every', 20),
+            flush_interval=self.config.get('shell_flush_interval', 30)
+        )
         
         wrapper_script.write_text(wrapper_content)
         wrapper_script.chmod(0o755)
@@ -153,36 +117,285 @@ fi
         
         print(f"Shell integration prepared. Run: {installer}")
         
+    @staticmethod
+    def render_shell_wrapper(capture_dir: Path, flush_every: int = 20,
+                             flush_interval: int = 30) -> str:
+        """
+        Generate shell_wrapper.sh for bash and zsh.
+        
+        Every interactive command is captured from preexec/precmd hooks
+        (a DEBUG trap and PROMPT_COMMAND in bash) using shell builtins
+        only. Events are buffered in the shell and appended in batches of
+        `flush_every` commands, after `flush_interval` seconds, or on exit.
+        """
+        return rf'''#!/bin/bash
+# KB Daemon Shell Wrapper (bash 5+ / zsh)
+# Uses shell builtins only: no processes are forked per command
+
+# Set capture directory
+export KB_CAPTURE_DIR="{capture_dir}"
+
+# Flush the event buffer every N commands or T seconds
+KB_FLUSH_EVERY=${{KB_FLUSH_EVERY:-{flush_every}}}
+KB_FLUSH_INTERVAL=${{KB_FLUSH_INTERVAL:-{flush_interval}}}
+# Keep each flush within one stdio buffer so it lands as a single write
+KB_FLUSH_BYTES=3500
+
+# zsh provides EPOCHREALTIME and strftime through zsh/datetime
+[ -n "$ZSH_VERSION" ] && zmodload zsh/datetime 2>/dev/null
+
+# Current time as epoch seconds ($KB_NOW_S) and microseconds ($KB_NOW_FRAC)
+kb_now() {{
+    local rt=$EPOCHREALTIME
+    # Shells without EPOCHREALTIME (bash < 5) pay one fork
+    [ -z "$rt" ] && rt="$(date +%s).0"
+    local frac="${{rt#*[.,]}}000000"
+    KB_NOW_S=${{rt%[.,]*}}
+    KB_NOW_FRAC=${{frac:0:6}}
+}}
+
+# ISO-8601 UTC timestamp for $KB_NOW_S/$KB_NOW_FRAC into $REPLY.
+# Switching TZ costs a tzset, so the date/hour/minute prefix is cached
+# and only reformatted once a minute.
+KB_TS_MINUTE=-1
+kb_timestamp() {{
+    local minute=$(( KB_NOW_S / 60 ))
+    if [ "$minute" != "$KB_TS_MINUTE" ]; then
+        if [ -n "$ZSH_VERSION" ]; then
+            TZ=UTC0 strftime -s KB_TS_PREFIX '%Y-%m-%dT%H:%M:' "$KB_NOW_S"
+        else
+            TZ=UTC0 printf -v KB_TS_PREFIX '%(%Y-%m-%dT%H:%M:)T' "$KB_NOW_S"
+        fi
+        KB_TS_MINUTE=$minute
+    fi
+    printf -v REPLY '%s%02d.%sZ' "$KB_TS_PREFIX" $(( KB_NOW_S % 60 )) "$KB_NOW_FRAC"
+}}
+
+# JSON string escaping into $REPLY
+kb_json_escape() {{
+    local s=$1
+    # Most paths and commands need no escaping at all
+    case $s in
+        *[\\\"$'\n\t\r']*) ;;
+        *) REPLY=$s; return ;;
+    esac
+    s=${{s//\\/\\\\}}
+    s=${{s//\"/\\\"}}
+    s=${{s//$'\n'/\\n}}
+    s=${{s//$'\t'/\\t}}
+    s=${{s//$'\r'/\\r}}
+    REPLY=$s
+}}
+
+# In-shell event buffer
+KB_EVENT_BUFFER=()
+KB_BUFFER_BYTES=0
+kb_now; KB_LAST_FLUSH=$KB_NOW_S
+
+kb_buffer_event() {{
+    KB_EVENT_BUFFER+=("$1")
+    KB_BUFFER_BYTES=$(( KB_BUFFER_BYTES + ${{#1}} + 1 ))
+}}
+
+# Append all buffered events with one printf (one O_APPEND write)
+kb_flush() {{
+    if [ "${{#KB_EVENT_BUFFER[@]}}" -gt 0 ]; then
+        printf '%s\n' "${{KB_EVENT_BUFFER[@]}}" >> "$KB_CAPTURE_DIR/shell_events.jsonl"
+        KB_EVENT_BUFFER=()
+        KB_BUFFER_BYTES=0
+    fi
+    KB_LAST_FLUSH=${{KB_NOW_S:-$KB_LAST_FLUSH}}
+}}
+
+# Called before a command line runs, with the line as typed
+kb_command_start() {{
+    kb_now
+    # A long-running command shouldn't hold back what is already buffered
+    if [ "${{#KB_EVENT_BUFFER[@]}}" -gt 0 ] &&
+       [ $(( KB_NOW_S - KB_LAST_FLUSH )) -ge "$KB_FLUSH_INTERVAL" ]; then
+        kb_flush
+    fi
+    KB_CMD_LINE=$1
+    KB_CMD_PWD=$PWD
+    KB_CMD_START_S=$KB_NOW_S
+    KB_CMD_START_FRAC=$KB_NOW_FRAC
+}}
+
+# Called before the next prompt with the command line's exit status
+kb_command_end() {{
+    local exit_code=$1
+    kb_now
+    
+    if [ -n "$KB_CMD_START_S" ]; then
+        local end_s=$KB_NOW_S end_frac=$KB_NOW_FRAC
+        local duration_us=$(( (end_s - KB_CMD_START_S) * 1000000 + 10#$end_frac - 10#$KB_CMD_START_FRAC ))
+        local duration
+        printf -v duration '%d.%06d' $(( duration_us / 1000000 )) $(( duration_us % 1000000 ))
+        
+        KB_NOW_S=$KB_CMD_START_S KB_NOW_FRAC=$KB_CMD_START_FRAC
+        kb_timestamp; local timestamp=$REPLY
+        KB_NOW_S=$end_s KB_NOW_FRAC=$end_frac
+        kb_json_escape "$KB_CMD_LINE"; local j_cmd=$REPLY
+        kb_json_escape "$KB_CMD_PWD"; local j_dir=$REPLY
+        
+        printf -v REPLY '{{"type":"shell_command","timestamp":"%s","data":{{"cmdline":"%s","exit_code":%d,"duration":%s,"working_dir":"%s"}}}}' \
+            "$timestamp" "$j_cmd" "$exit_code" "$duration" "$j_dir"
+        kb_buffer_event "$REPLY"
+        KB_CMD_START_S=
+    fi
+    
+    # Capture directory changes
+    if [ "$PWD" != "$KB_LAST_PWD" ]; then
+        kb_timestamp; local timestamp=$REPLY
+        kb_json_escape "$KB_LAST_PWD"; local j_from=$REPLY
+        kb_json_escape "$PWD"; local j_to=$REPLY
+        printf -v REPLY '{{"type":"dir_change","timestamp":"%s","data":{{"from":"%s","to":"%s"}}}}' \
+            "$timestamp" "$j_from" "$j_to"
+        kb_buffer_event "$REPLY"
+        KB_LAST_PWD=$PWD
+    fi
+    
+    if [ "${{#KB_EVENT_BUFFER[@]}}" -ge "$KB_FLUSH_EVERY" ] ||
+       [ "$KB_BUFFER_BYTES" -ge "$KB_FLUSH_BYTES" ] ||
+       [ $(( KB_NOW_S - KB_LAST_FLUSH )) -ge "$KB_FLUSH_INTERVAL" ]; then
+        kb_flush
+    fi
+}}
+
+KB_LAST_PWD=$PWD
+
+# Hooks are only installed in interactive shells
+case $- in
+    *i*) ;;
+    *) return 0 2>/dev/null ;;
+esac
+
+if [ -n "$ZSH_VERSION" ]; then
+    kb_preexec() {{ kb_command_start "$1"; }}
+    kb_precmd() {{ kb_command_end $?; }}
+    
+    preexec_functions+=(kb_preexec)
+    # First in line so $? still holds the command's exit status
+    precmd_functions=(kb_precmd $precmd_functions)
+    zshexit_functions+=(kb_flush)
+else
+    # The line as typed is read back from `history 1`, through a file so
+    # that no subshell is forked
+    KB_HIST_FILE="$KB_CAPTURE_DIR/.history.$$"
+    
+    # Newest history entry into $KB_HIST_NUM/$REPLY (fails if there is none)
+    kb_history_last() {{
+        HISTTIMEFORMAT= builtin history 1 > "$KB_HIST_FILE" 2>/dev/null || return 1
+        local entry=
+        IFS= read -r -d '' entry < "$KB_HIST_FILE"
+        entry=${{entry%$'\n'}}
+        entry=${{entry#"${{entry%%[![:space:]]*}}"}}
+        KB_HIST_NUM=${{entry%%[![:digit:]]*}}
+        [ -n "$KB_HIST_NUM" ] || return 1
+        entry=${{entry#"$KB_HIST_NUM"}}
+        entry=${{entry#\*}}
+        REPLY=${{entry#  }}
+    }}
+    
+    # The current line from history into $REPLY. A line history didn't
+    # keep (ignorespace, HISTIGNORE) leaves the number unchanged; one
+    # dropped by ignoredups repeats the last entry, which still matches.
+    kb_history_line() {{
+        local previous=$KB_HIST_NUM
+        kb_history_last || return 1
+        [ "$KB_HIST_NUM" != "$previous" ] || [[ $REPLY == *"$BASH_COMMAND"* ]]
+    }}
+    
+    # The DEBUG trap fires before every simple command, including those run
+    # from PROMPT_COMMAND; KB_AT_PROMPT limits capture to the first command
+    # of each interactive line. It always succeeds, so extdebug never
+    # skips a command because of it.
+    KB_AT_PROMPT=
+    kb_preexec() {{
+        [ -n "$KB_AT_PROMPT" ] || return 0
+        [ -n "$COMP_LINE" ] && return 0
+        KB_AT_PROMPT=
+        # An empty line goes straight to PROMPT_COMMAND
+        [ "$BASH_COMMAND" = kb_precmd ] && return 0
+        # $BASH_COMMAND (the line's first simple command, unexpanded) only
+        # stands in when history doesn't have the line; the exit status
+        # recorded is the whole line's
+        if kb_history_line; then
+            kb_command_start "$REPLY"
+        else
+            kb_command_start "$BASH_COMMAND"
+        fi
+        return 0
+    }}
+    kb_precmd() {{ kb_command_end $?; }}
+    kb_prompt_ready() {{
+        # At the first prompt the startup files are done: chain whatever
+        # DEBUG trap they set and note where the loaded history ends
+        if [ -z "$KB_DEBUG_CHAINED" ]; then
+            kb_chain_trap kb_preexec DEBUG
+            kb_history_last || KB_HIST_NUM=0
+            KB_DEBUG_CHAINED=1
+        fi
+        KB_AT_PROMPT=1
+    }}
+    kb_exit() {{
+        kb_flush
+        command rm -f "$KB_HIST_FILE"
+    }}
+    kb_status() {{ return "$1"; }}
+    
+    # Install a trap handler ahead of the one already set for the signal
+    # (as `trap -p` wrote it to $KB_HIST_FILE), which still sees the
+    # original $? and has the last word on the status
+    kb_chain_trap() {{
+        local handler=$1 signal=$2 existing=
+        IFS= read -r -d '' existing < "$KB_HIST_FILE"
+        if [ -z "$existing" ]; then
+            trap "$handler" "$signal"
+            return
+        fi
+        eval "set -- $existing"
+        case $3 in
+            *"$handler"*) ;;  # already installed by an earlier source
+            *) trap "KB_TRAP_STATUS=\$?; $handler; kb_status \$KB_TRAP_STATUS; $3" "$signal" ;;
+        esac
+    }}
+    
+    trap -p EXIT > "$KB_HIST_FILE"; kb_chain_trap kb_exit EXIT
+    # Functions, $(...) and sourced files don't see the DEBUG trap, so
+    # PROMPT_COMMAND writes it out for kb_prompt_ready to chain
+    PROMPT_COMMAND="kb_precmd${{PROMPT_COMMAND:+; $PROMPT_COMMAND}}; [ -n \"\$KB_DEBUG_CHAINED\" ] || trap -p DEBUG > \"\$KB_HIST_FILE\"; kb_prompt_ready"
+fi
+'''
+        
     def _monitor_events(self):
         """Monitor shell events file for new events"""
         if not self.events_file.exists():
             self.events_file.touch()
             
-        # Track file position
-        last_position = 0
+        self.tailer.run(self._handle_event_lines)
         
-        while self.running:
+    def _handle_event_lines(self, lines: List[str]):
+        """Process a batch of raw JSONL lines from the tailer"""
+        for line in lines:
             try:
-                if self.events_file.exists():
-                    with open(self.events_file, 'r') as f:
-                        f.seek(last_position)
-                        new_lines = f.readlines()
-                        last_position = f.tell()
-                        
-                        for line in new_lines:
-                            if line.strip():
-                                try:
-                                    event = json.loads(line)
-                                    processed_event = self._process_shell_event(event)
-                                    if processed_event:
-                                        self.capture_queue.put(processed_event)
-                                except json.JSONDecodeError:
-                                    continue
-                                    
-            except Exception as e:
-                print(f"Error monitoring shell events: {e}")
+                # strict=False tolerates raw control characters in commands
+                event = json.loads(line, strict=False)
+            except json.JSONDecodeError:
+                continue
                 
-            time.sleep(1)  # Check every second
+            try:
+                self.ingest_event(event)
+            except Exception as e:
+                # Skip it so the rest of the batch is still accepted
+                print(f"Skipping malformed shell event: {e}")
+            
+    def ingest_event(self, event: Dict):
+        """Process a raw shell event from any source and queue it if relevant"""
+        with self.lock:
+            processed_event = self._process_shell_event(event)
+        if processed_event:
+            self.capture_queue.put(processed_event)
             
     def _process_shell_event(self, event: Dict) -> Optional[Dict]:
         """Process and enrich shell events"""
@@ -197,43 +410,75 @@ fi
         
     def _process_command(self, event: Dict) -> Optional[Dict]:
         """Process command execution event"""
+        event = self.classify_command(event)
+        if not event:
+            return None
+            
+        # Detect patterns and error fixes in the sliding window
+        patterns, fixes_error = self.window.add(event)
+        event['patterns'] = patterns
+        
+        if fixes_error and not event.get('is_error'):
+            # Same command succeeding after it failed
+            event['fixes_error'] = True
+            event['importance'] = 8
+                
+        return event
+        
+    def classify_command(self, event: Dict) -> Optional[Dict]:
+        """
+        Categorize and score a command event without touching session state.
+        Returns None if the command isn't worth tracking.
+        """
         data = event.get('data', {})
+        if 'cmdline' in data and 'command' not in data:
+            self._parse_cmdline(data)
         command = data.get('command', '')
         
+        classification = self.classifier.classify(
+            command, data.get('args', ''), data.get('duration', 0)
+        )
+        
         # Check if command should be tracked
-        if command not in self.track_commands and not self._is_important_command(data):
+        if command not in self.track_commands and not classification['important']:
             return None
             
-        # Add to command history
-        self.command_history.append(event)
-        if len(self.command_history) > 100:
-            self.command_history.pop(0)
-            
-        # Categorize the command
-        category = self._categorize_command(command, data)
-        importance = self._calculate_command_importance(command, data)
-        
-        # Detect patterns
-        patterns = self._detect_patterns()
-        
-        # Enrich event
-        event['category'] = category
-        event['importance'] = importance
-        event['patterns'] = patterns
+        event['category'] = classification['category']
+        event['importance'] = classification['importance']
         
         # Track errors
         if data.get('exit_code', 0) != 0:
-            self.last_error = event
             event['is_error'] = True
-            event['importance'] = min(importance + 2, 10)
+            event['importance'] = min(classification['importance'] + 2, 10)
             
-            # Check if this is a fix for previous error
-            if self._is_error_fix(event):
-                event['fixes_error'] = True
-                event['importance'] = 8
-                
         return event
         
+    def _parse_cmdline(self, data: Dict):
+        """Split a captured command line into argv, command and args"""
+        cmdline = data.get('cmdline', '')
+        if '"' in cmdline or "'" in cmdline or '\\' in cmdline:
+            try:
+                argv = shlex.split(cmdline)
+            except ValueError:
+                # Unbalanced quotes (e.g. a heredoc's first line)
+                argv = cmdline.split()
+        else:
+            # Nothing to unquote: plain whitespace splitting is equivalent
+            argv = cmdline.split()
+            
+        # Skip environment assignments and transparent prefixes so that
+        # `FOO=1 sudo npm test` is tracked as npm
+        index = 0
+        while index < len(argv) and (
+            re.match(r'^[A-Za-z_][A-Za-z0-9_]*=', argv[index])
+            or argv[index] in self.COMMAND_PREFIXES
+        ):
+            index += 1
+            
+        data['argv'] = argv
+        data['command'] = os.path.basename(argv[index]) if index < len(argv) else ''
+        data['args'] = ' '.join(argv[index + 1:])
+        
     def _process_dir_change(self, event: Dict) -> Optional[Dict]:
         """Process directory change event"""
         data = event.get('data', {})
@@ -250,141 +495,6 @@ fi
                 
         return None
         
-    def _is_important_command(self, data: Dict) -> bool:
-        """Check if a command is important enough to track"""
-        command = data.get('command', '')
-        args = data.get('args', '')
-        
-        # Important patterns
-        important_patterns = [
-            r'install', r'add', r'remove', r'update', r'upgrade',
-            r'build', r'test', r'deploy', r'push', r'pull',
-            r'merge', r'rebase', r'commit'
-        ]
-        
-        full_command = f"{command} {args}"
-        for pattern in important_patterns:
-            if re.search(pattern, full_command, re.IGNORECASE):
-                return True
-                
-        # Long-running commands are usually important
-        if data.get('duration', 0) > 5:
-            return True
-            
-        return False
-        
-    def _categorize_command(self, command: str, data: Dict) -> str:
-        """Categorize a command"""
-        args = data.get('args', '')
-        full_command = f"{command} {args}"
-        
-        # Package management
-        if command in ['npm', 'yarn', 'pnpm', 'pip', 'cargo']:
-            if any(x in args for x in ['install', 'add']):
-                return 'dependency_add'
-            elif any(x in args for x in ['remove', 'uninstall']):
-                return 'dependency_remove'
-            elif 'test' in args:
-                return 'testing'
-            elif 'build' in args:
-                return 'building'
-                
-        # Testing
-        elif command in ['pytest', 'jest', 'mocha'] or 'test' in full_command:
-            return 'testing'
-            
-        # Docker
-        elif command == 'docker':
-            if 'build' in args:
-                return 'docker_build'
-            elif 'run' in args:
-                return 'docker_run'
-            elif 'compose' in args:
-                return 'docker_compose'
-                
-        # Git
-        elif command == 'git':
-            git_subcmd = args.split()[0] if args else ''
-            return f'git_{git_subcmd}' if git_subcmd else 'git'
-            
-        # Kubernetes
-        elif command == 'kubectl':
-            if 'apply' in args:
-                return 'deploy'
-            elif 'get' in args:
-                return 'inspect'
-                
-        return 'shell_command'
-        
-    def _calculate_command_importance(self, command: str, data: Dict) -> int:
-        """Calculate importance score for a command"""
-        args = data.get('args', '')
-        duration = data.get('duration', 0)
-        
-        # Base importance from config
-        importance = 5
-        
-        # High importance commands
-        high_importance = ['deploy', 'apply', 'push', 'merge', 'install']
-        if any(x in f"{command} {args}" for x in high_importance):
-            importance = 8
-            
-        # Medium importance
-        medium_importance = ['test', 'build', 'commit']
-        if any(x in f"{command} {args}" for x in medium_importance):
-            importance = 6
-            
-        # Adjust for duration
-        if duration > 30:
-            importance += 1
-        if duration > 60:
-            importance += 1
-            
-        return min(importance, 10)
-        
-    def _detect_patterns(self) -> List[str]:
-        """Detect patterns in recent command history"""
-        patterns = []
-        
-        if len(self.command_history) < 3:
-            return patterns
-            
-        recent = self.command_history[-10:]
-        
-        # Detect debugging pattern (repeated test runs)
-        test_commands = [c for c in recent if c.get('category') == 'testing']
-        if len(test_commands) >= 3:
-            # Check for failures followed by success
-            failures = [c for c in test_commands if c.get('data', {}).get('exit_code', 0) != 0]
-            if failures:
-                patterns.append('debugging_session')
-                
-        # Detect dependency installation pattern
-        dep_commands = [c for c in recent if 'dependency' in c.get('category', '')]
-        if len(dep_commands) >= 2:
-            patterns.append('dependency_management')
-            
-        # Detect build-test cycle
-        build_cmds = [c for c in recent if c.get('category') == 'building']
-        test_cmds = [c for c in recent if c.get('category') == 'testing']
-        if build_cmds and test_cmds:
-            patterns.append('build_test_cycle')
-            
-        return patterns
-        
-    def _is_error_fix(self, event: Dict) -> bool:
-        """Check if this command fixes a previous error"""
-        if not self.last_error:
-            return False
-            
-        # Same command succeeding after failure
-        if (event.get('data', {}).get('command') == 
-            self.last_error.get('data', {}).get('command') and
-            event.get('data', {}).get('exit_code') == 0):
-            return True
-            
-        return False
-        
     def _extract_project_name(self, path: str) -> Optional[str]:
         """Extract project name from path"""
         parts = Path(path).parts
@@ -26,11 +26,12 @@ echo ""
 echo "Optional packages (not required):"
 echo "  - toml: For better config parsing"
 echo "  - pyyaml: For YAML config files"
+echo "  - numpy: Vectorized categorization of large backlogs (imports, replays)"
 echo ""
 echo "Install optional packages? (y/n)"
 read -r response
 if [[ "$response" =~ ^[Yy]$ ]]; then
-    pip3 install toml pyyaml --user --quiet
+    pip3 install toml pyyaml numpy --user --quiet
     echo "✅ Optional packages installed"
 fi
 
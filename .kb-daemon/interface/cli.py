@@ -15,6 +15,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from storage.db_manager import DatabaseManager
 from process.summarizer import Summarizer
+from process.event_text import EventText
 
 class CLI:
     """Command line interface for KB daemon"""
@@ -215,7 +216,7 @@ class CLI:
         """Extract tags from data"""
         tags = []
         
-        text = str(data).lower()
+        text = f"{EventText(data).text}\n{data.get('category') or ''}".lower()
         
         # Common tags
         tag_keywords = {
@@ -22,9 +22,15 @@ from threading import Thread
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from capture.git_hooks import GitHooks
+from capture.commit_cache import CommitMetadataCache
+from capture.fingerprint_cache import FingerprintCache
+from capture.repo_scanner import RepoScanner
 from capture.shell_monitor import ShellMonitor
 from capture.file_watcher import FileWatcher
 from capture.project_detector import ProjectDetector
+from capture.project_prewarm import ProjectPrewarmer
+from capture.event_socket import EventSocketListener
+from capture.git_event_source import GitEventSource
 from process.categorizer import ActivityCategorizer
 from process.summarizer import Summarizer
 from process.process_manager import ProcessManager
@@ -52,9 +58,23 @@ class KBDaemon:
         self.git_hooks = GitHooks(self.capture_queue, self.config['git'], self.base_path)
         self.shell_monitor = ShellMonitor(self.capture_queue, self.config['capture'], self.base_path)
         self.file_watcher = FileWatcher(self.capture_queue, self.config['capture'], self.base_path)
+        self.git_source = GitEventSource(
+            self.capture_queue, self.git_hooks, self.base_path, self.config['capture']
+        )
+        
+        # Hooks and wrappers send events here; the JSONL files are the fallback
+        self.event_socket = EventSocketListener(
+            self.base_path / "capture" / "kb.sock", self._route_socket_event
+        )
         
         # Initialize project detector
-        self.project_detector = ProjectDetector(self.base_path)
+        self.project_detector = ProjectDetector(self.base_path, self.config['processing'])
+        self.repo_scanner = RepoScanner(
+            self.db, self.git_hooks, self.base_path, self.config['capture'], self.project_detector,
+            ActivityCategorizer(self.base_path / "config" / "patterns.yml"),
+            self.config['processing']['min_importance']
+        )
+        self.prewarmer = ProjectPrewarmer(self.project_detector, self.base_path, self.config['processing'])
         self.current_project = None
         
         # Initialize process manager
@@ -95,12 +115,19 @@ class KBDaemon:
         signal.signal(signal.SIGTERM, self._signal_handler)
         signal.signal(signal.SIGINT, self._signal_handler)
         
-        # Start capture threads
+        # Start capture threads (the first batch waits for the project prewarm)
         threads = [
+            Thread(target=self._prewarm_projects, daemon=True),
             Thread(target=self.shell_monitor.start, daemon=True),
             Thread(target=self.file_watcher.start, daemon=True),
             Thread(target=self.process_queue, daemon=True),
         ]
+        if self.config['capture'].get('git_activity', True):
+            threads.append(Thread(target=self.git_source.start, daemon=True))
+        if self.config['capture'].get('event_socket', True):
+            threads.append(Thread(target=self.event_socket.start, daemon=True))
+        if self.config['capture'].get('repo_scan_interval_hours', 24):
+            threads.append(Thread(target=self._repo_catchup_loop, daemon=True))
         
         for t in threads:
             t.start()
@@ -118,11 +145,45 @@ class KBDaemon:
         """Stop the daemon gracefully"""
         self.logger.info("Stopping KB Daemon...")
         self.running = False
+        self.event_socket.stop()
         self.shell_monitor.stop()
         self.file_watcher.stop()
+        self.git_source.stop()
+        self.project_detector.close()
         self.process_manager.cleanup()
         self.logger.info("KB Daemon stopped")
     
+    def _prewarm_projects(self):
+        """Detect watched and recently active projects before the first batch"""
+        stats = self.prewarmer.run(
+            self.file_watcher.watch_paths,
+            [self.shell_monitor.segments, self.git_source.segments]
+        )
+        self.logger.info(f"Project prewarm {stats['state']}: {stats['projects']} projects "
+                         f"from {stats['paths']} directories in {stats['seconds']:.2f}s")
+    
+    def _route_socket_event(self, event: Dict):
+        """Hand an event received on the socket to its capture source"""
+        if event.get('type', '').startswith('git_'):
+            self.git_source.ingest_event(event)
+        else:
+            self.shell_monitor.ingest_event(event)
+    
+    def _repo_catchup_loop(self):
+        """Ingest commits from repos without hooks at startup and then periodically"""
+        interval = self.config['capture'].get('repo_scan_interval_hours', 24) * 3600
+        while self.running:
+            try:
+                stats = self.repo_scanner.scan()
+                self.logger.info(f"Repo catch-up: {stats['stored']} new commits "
+                                 f"from {stats['repos']} repos")
+            except Exception as e:
+                self.logger.error(f"Repo catch-up failed: {e}")
+            
+            deadline = time.time() + interval
+            while self.running and time.time() < deadline:
+                time.sleep(1)
+    
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals"""
         self.logger.info(f"Received signal {signum}, shutting down...")
@@ -152,6 +213,7 @@ class KBDaemon:
             
             # Process if we should
             if should_process and events_buffer:
+                self.prewarmer.wait(self.config['processing'].get('project_prewarm_timeout_seconds', 60))
                 self._process_events(events_buffer)
                 events_buffer = []
                 last_process_time = current_time
@@ -164,19 +226,15 @@ class KBDaemon:
         
         # Add project context to each event
         for event in events:
-            # Detect project from event path if available
-            event_path = event.get('data', {}).get('working_dir') or event.get('data', {}).get('path')
+            # Detect project from the event's directory if available
+            event_path = self._event_directory(event.get('data', {}))
             if event_path:
                 project = self.project_detector.detect_project(Path(event_path))
             else:
                 project = self.project_detector.detect_project()
             
             # Add project context
-            event['project'] = {
-                'name': project['name'],
-                'type': project['type'],
-                'path': project['path']
-            }
+            event['project'] = ProjectDetector.event_context(project)
             
             # Track project switches
             if self.current_project and self.current_project['name'] != project['name']:
@@ -200,14 +258,13 @@ class KBDaemon:
             self.logger.info("No important events to process")
             return
         
-        # Summarize if needed
+        # Store individual events (one transaction, project counters included)
+        self.db.store_events(important_events)
+        
+        # Summarize larger batches as well
         if len(important_events) > 5:
             summary = self.summarizer.summarize(important_events)
             self.db.store_summary(summary)
-        else:
-            # Store individual events
-            for event in important_events:
-                self.db.store_event(event)
         
         self.logger.info(f"Processed and stored {len(important_events)} important events")
         
@@ -215,6 +272,15 @@ class KBDaemon:
         if self.config['daemon'].get('shadow_mode', False):
             self._log_shadow_mode_capture(important_events)
     
+    @staticmethod
+    def _event_directory(data: Dict) -> Optional[str]:
+        """Directory an event happened in (a file event's parent directory)"""
+        if data.get('working_dir'):
+            return data['working_dir']
+        if data.get('path'):
+            return data['path'] if data.get('is_directory') else os.path.dirname(data['path'])
+        return None
+    
     def _log_shadow_mode_capture(self, events: List[Dict]):
         """Log what would be captured in shadow mode"""
         shadow_log = self.base_path / "logs" / f"shadow_{datetime.now():%Y%m%d_%H%M%S}.json"
@@ -227,10 +293,17 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description="KB Daemon - Intelligent Knowledge Base Automation")
-    parser.add_argument('command', choices=['start', 'stop', 'status', 'review', 'test', 'full'],
+    parser.add_argument('command', choices=['start', 'stop', 'status', 'review', 'test', 'full', 'import', 'catchup'],
                        help='Command to execute')
+    parser.add_argument('source', nargs='?', choices=['shell-history'],
+                       help='What to import (for the import command)')
     parser.add_argument('--config', help='Path to config file')
     parser.add_argument('--foreground', action='store_true', help="Run in foreground (don't daemonize)")
+    parser.add_argument('--file', action='append', dest='files',
+                       help='History file to import (repeatable; defaults to ~/.bash_history and ~/.zsh_history)')
+    parser.add_argument('--workers', type=int, help='Worker processes for import')
+    parser.add_argument('--working-dir',
+                       help='Directory the imported history was recorded in (attributes it to that project)')
     
     args = parser.parse_args()
     
@@ -267,7 +340,6 @@ def main():
             manager.save_pid(process.pid)
             
             # Wait a moment to check if it started successfully
-            import time
             time.sleep(2)
             
             if manager.is_running():
@@ -331,10 +403,37 @@ def main():
             print(f"\n📊 Database Statistics:")
             print(f"  Total events: {stats.get('total_events', 0)}")
             print(f"  Average importance: {stats.get('average_importance', 0):.2f}/10")
+            if stats.get('total_projects'):
+                print(f"  Projects: {stats['total_projects']}")
             pending = stats.get('pending_entries', 0)
             if pending > 0:
                 print(f"  Pending reviews: {pending}")
                 print(f"\n💡 Run 'kb review' to process pending events")
+        
+        active_projects = db.get_project_activity(days=7)
+        if active_projects:
+            print(f"\n📁 Active projects (last 7 days):")
+            for project in active_projects[:5]:
+                print(f"  {project['name']}: {project['recent_events']} events "
+                      f"({project['event_count']} total)")
+        
+        prewarm = ProjectPrewarmer.read_status(base_path)
+        if prewarm:
+            print(f"\n🔥 Project prewarm: {prewarm['state']}, {prewarm['detected']}/{prewarm['paths']} "
+                  f"directories, {prewarm['projects']} projects in {prewarm['seconds']:.2f}s")
+        
+        cache_file = base_path / "capture" / "commit_cache.json.gz"
+        if cache_file.exists():
+            cache_stats = CommitMetadataCache(cache_file).stats()
+            print(f"\n🗂️  Commit cache: {cache_stats['entries']} commits, "
+                  f"hit rate {cache_stats['hit_rate']:.0%}")
+        
+        fingerprint_stats = FingerprintCache.read_stats(base_path / "capture" / "fingerprint_stats.json")
+        if fingerprint_stats:
+            print(f"\n🧬 Fingerprint cache: {fingerprint_stats['entries']} files, "
+                  f"{fingerprint_stats['bytes_used'] / 1024 / 1024:.1f}/"
+                  f"{fingerprint_stats['max_bytes'] / 1024 / 1024:.0f} MB, "
+                  f"hit rate {fingerprint_stats['hit_rate']:.0%}")
     elif args.command == 'review':
         # Determine base_path
         if args.config:
@@ -345,6 +444,64 @@ def main():
         
         cli = CLI(base_path)
         cli.daily_review()
+    elif args.command == 'import':
+        if args.source != 'shell-history':
+            parser.error("import requires a source: shell-history")
+            
+        from capture.history_importer import HistoryImporter
+        
+        base_path = Path(__file__).parent
+        with open(args.config or base_path / "config" / "settings.yml") as f:
+            config = yaml.safe_load(f)
+        db = DatabaseManager(base_path / "storage" / "kb_store.db")
+        
+        files = [Path(f).expanduser() for f in args.files] if args.files else HistoryImporter.default_history_files()
+        if not files:
+            print("No shell history files found")
+            return
+            
+        print("📥 Importing shell history:")
+        for f in files:
+            print(f"  - {f}")
+            
+        project_detector = ProjectDetector(base_path, config['processing'])
+        importer = HistoryImporter(
+            db, config['capture'], base_path,
+            workers=args.workers,
+            min_importance=config['processing']['min_importance'],
+            project_detector=project_detector
+        )
+        start_time = time.time()
+        stats = importer.import_files(files, working_dir=args.working_dir)
+        project_detector.close()
+        
+        print(f"✅ Read {stats['entries']} history entries, {stats['tracked']} worth tracking")
+        print(f"   Stored {stats['stored']} new events in {time.time() - start_time:.1f}s "
+              f"(duplicates skipped)")
+    elif args.command == 'catchup':
+        base_path = Path(__file__).parent
+        with open(args.config or base_path / "config" / "settings.yml") as f:
+            config = yaml.safe_load(f)
+        db = DatabaseManager(base_path / "storage" / "kb_store.db")
+        git_hooks = GitHooks(Queue(), config['git'], base_path)
+        project_detector = ProjectDetector(base_path, config['processing'])
+        scanner = RepoScanner(db, git_hooks, base_path, config['capture'], project_detector,
+                              min_importance=config['processing']['min_importance'])
+        
+        print("🔄 Catching up on git commits:")
+        for root in scanner.roots:
+            print(f"  - {root}")
+        
+        start_time = time.time()
+        stats = scanner.scan()
+        git_hooks.commit_cache.save()
+        project_detector.close()
+        
+        print(f"✅ Scanned {stats['repos']} repos ({stats['updated']} with new commits)")
+        print(f"   Stored {stats['stored']} of {stats['commits']} commits in "
+              f"{time.time() - start_time:.1f}s (already captured commits skipped)")
+        if stats['errors']:
+            print(f"⚠️  {stats['errors']} repos could not be scanned")
     elif args.command == 'test':
         print("Testing KB Daemon configuration...")
         daemon = KBDaemon(args.config)
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Batch Categorizer - Vectorized categorize_batch for large backlogs
+
+Replays, imports and recategorization runs push hundreds of thousands of
+events through ActivityCategorizer, one Python call chain per event. This
+path extracts a feature matrix for the whole batch in one pass (pattern
+rank from the PatternEngine, computed once per distinct projection; event
+type and command; exit code, error, external commit and duration flags),
+then derives categories, importance and sessions with NumPy array
+operations: indicators and pattern hits combine into a first-match over
+categories, and the context window rules (multiple_test_runs over the
+last 5 events, sessions over the last 10) become windowed sums.
+
+Events the capture sources already categorized (or scored) keep their
+category (or importance), enhanced like ActivityCategorizer._enhance_category
+does, and still count towards the context window rules.
+
+Results are identical to the per-event path. Batches it doesn't model
+(malformed data, non-string categories, mixed naive and aware timestamps
+in a session) return None before anything is changed, and the caller
+falls back to the per-event path. NumPy is optional.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # categorize_batch stays on the per-event path
+    np = None
+
+from process.event_text import EventText, projection_key
+
+# Default categories by type and command (ActivityCategorizer._determine_category)
+DEFAULT_CATEGORIES = ['development', 'dependency_management', 'testing', 'containerization', 'general']
+COMMAND_DEFAULTS = {
+    'npm': 'dependency_management', 'yarn': 'dependency_management',
+    'pip': 'dependency_management', 'cargo': 'dependency_management',
+    'pytest': 'testing', 'jest': 'testing', 'test': 'testing',
+    'docker': 'containerization',
+}
+FEATURE_CATEGORIES = {'feature_start', 'code_created', 'test_created'}
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+class BatchCategorizer:
+    """NumPy implementation of ActivityCategorizer.categorize_batch"""
+
+    def __init__(self, categorizer):
+        self.categorizer = categorizer
+        self.engine = categorizer.engine
+
+        # Category vocabulary: pattern categories (by rank), then defaults
+        self.names = list(self.engine.categories)
+        for name in DEFAULT_CATEGORIES:
+            if name not in self.names:
+                self.names.append(name)
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+        factors = categorizer.patterns.get('importance_scoring', {}).get('factors', {})
+        self.supported = all(type(v) is int for v in factors.values())
+        self.factor_map = factors
+        self.factors = np.array([factors.get(name, 5) if self.supported else 0 for name in self.names],
+                                dtype=np.int64)
+        self.is_feature = np.array([name in FEATURE_CATEGORIES for name in self.names])
+        self.is_created = np.array(['created' in name for name in self.names])
+
+        ranks = len(self.engine.categories)
+        self.error_ranks = np.array([k for k in range(ranks)
+                                     if 'error_in_output' in self.engine.indicators[k]], dtype=np.int64)
+        self.test_ranks = np.array([k for k in range(ranks)
+                                    if 'multiple_test_runs' in self.engine.indicators[k]], dtype=np.int64)
+
+        self.projections = {}  # projection key -> (rank, has test, breaking, learning)
+
+    def categorize(self, events: List[Dict]) -> Optional[List[Dict]]:
+        """Categorize events in place like categorize_batch; None if the batch needs the per-event path"""
+        if not self.supported:
+            return None
+        features = self._extract(events)
+        if features is None:
+            return None
+
+        context = self.categorizer.context_window
+        prefix = context[-9:]
+        prefix_features = self._prefix_features(prefix)
+        if prefix_features is None:
+            return None
+
+        n, p = len(events), len(prefix)
+        ranks = len(self.engine.categories)
+
+        # Context length after appending each event (capped like the window)
+        seen = len(context) + np.arange(1, n + 1)
+
+        # multiple_test_runs: 'test' in at least 2 of the last 5 context events
+        has_test = np.concatenate([prefix_features['has_test'], features['has_test']])
+        tests = self._window_sum(has_test, p, np.minimum(seen, 5)) >= 2
+
+        # First match over categories: pattern hit at its rank, indicators before it
+        matched = np.zeros((n, ranks + 1), dtype=bool)
+        matched[:, ranks] = True
+        matched[np.arange(n), features['rank']] = True
+        if len(self.error_ranks):
+            matched[:, self.error_ranks] |= features['failed'][:, None]
+        if len(self.test_ranks):
+            matched[:, self.test_ranks] |= tests[:, None]
+        first = matched.argmax(axis=1)
+        category = np.where(first < ranks, first, features['default'])
+        given = features['given']
+
+        # Importance (from the category the event already had, if any)
+        importance = np.where(given, features['given_factor'], self.factors[category])
+        importance = np.where(features['breaking'], np.maximum(importance, 9), importance)
+        importance = np.where(features['is_error'], np.minimum(importance + 2, 10), importance)
+        importance = np.where(features['external'], np.maximum(importance, 7), importance)
+        importance = np.where(features['duration'] > 60, np.minimum(importance + 1, 10), importance)
+
+        # Sessions over the last 10 context events
+        width = np.minimum(seen, 10)
+        errors = self._window_sum(np.concatenate([prefix_features['is_error'], features['is_error']]), p, width)
+        fixes = self._window_sum(np.concatenate([prefix_features['fixes'], features['fixes']]), p, width)
+        feature_flags = np.concatenate([prefix_features['feature'],
+                                        np.where(given, features['given_feature'], self.is_feature[category])])
+        created_flags = np.concatenate([prefix_features['created'],
+                                        np.where(given, features['given_created'], self.is_created[category])])
+        learning_flags = np.concatenate([prefix_features['learning'], features['learning']])
+
+        eligible = seen >= 3
+        debugging = eligible & (errors > 0) & (fixes > 0)
+        feature = eligible & ~debugging & (self._window_sum(feature_flags, p, width) >= 3)
+        learning = (eligible & ~debugging & ~feature
+                    & (self._window_sum(learning_flags, p, width) >= 2))
+        created = self._window_sum(created_flags, p, width)
+
+        sessions = np.flatnonzero(debugging | feature | learning)
+        durations = self._session_durations(prefix + events, p, width, sessions)
+        if durations is None:
+            return None
+
+        # Key info only reads type and data; extract before changing anything
+        try:
+            key_infos = [self.categorizer._extract_key_info(event) for event in events]
+        except Exception:
+            return None
+
+        # Apply (in the per-event path's key order)
+        names = self.names
+        category = category.tolist()
+        importance = importance.tolist()
+        given = given.tolist()
+        for i, event in enumerate(events):
+            if given[i]:
+                self.categorizer._enhance_category(event)
+            else:
+                event['category'] = names[category[i]]
+            if 'importance' not in event:
+                event['importance'] = importance[i]
+            event['key_info'] = key_infos[i]
+        for i, duration in zip(sessions.tolist(), durations):
+            if debugging[i]:
+                session = {'type': 'debugging', 'duration': duration,
+                           'errors_encountered': int(errors[i]), 'fixed': True}
+            elif feature[i]:
+                session = {'type': 'feature_development', 'duration': duration,
+                           'files_created': int(created[i])}
+            else:
+                session = {'type': 'learning', 'duration': duration}
+            events[i]['session'] = session
+
+        context.extend(events)
+        del context[:-50]
+        return events
+
+    def _extract(self, events: List[Dict]) -> Optional[Dict]:
+        """Per-event feature columns, or None for events the vector path doesn't model"""
+        n = len(events)
+        rank = np.empty(n, dtype=np.int64)
+        has_test = np.empty(n, dtype=bool)
+        breaking = np.empty(n, dtype=bool)
+        learning = np.empty(n, dtype=bool)
+        default = np.empty(n, dtype=np.int64)
+        failed = np.empty(n, dtype=bool)
+        is_error = np.empty(n, dtype=bool)
+        fixes = np.empty(n, dtype=bool)
+        external = np.empty(n, dtype=bool)
+        duration = np.empty(n, dtype=np.float64)
+        given = np.zeros(n, dtype=bool)
+        given_factor = np.zeros(n, dtype=np.int64)
+        given_feature = np.zeros(n, dtype=bool)
+        given_created = np.zeros(n, dtype=bool)
+
+        projections = self.projections
+        defaults = {name: self.index[name] for name in COMMAND_DEFAULTS.values()}
+        development, general = self.index['development'], self.index['general']
+
+        for i, event in enumerate(events):
+            data = event.get('data', {})
+            if not isinstance(data, dict):
+                return None
+            if 'category' in event:
+                category = event['category']
+                if not isinstance(category, str):
+                    return None
+                if category == 'git_commit' and not isinstance(data.get('message', ''), str):
+                    return None
+                given[i] = True
+                given_factor[i] = self.factor_map.get(category, 5)
+                given_feature[i] = category in FEATURE_CATEGORIES
+                given_created[i] = 'created' in category
+            value = data.get('duration', 0)
+            if type(value) not in (int, float, bool):
+                return None
+            duration[i] = value
+
+            try:
+                key = projection_key(event)
+                features = projections.get(key)
+            except TypeError:  # unhashable values: project this event alone
+                key, features = None, None
+            if features is None:
+                features = self._project(EventText(event))
+                if key is not None:
+                    if len(projections) >= 65536:
+                        projections.clear()
+                    projections[key] = features
+            rank[i], has_test[i], breaking[i], learning[i] = features
+
+            event_type = event.get('type', '')
+            if event_type == 'git_commit':
+                default[i] = development
+            elif event_type == 'shell_command':
+                command = data.get('command', '')
+                try:
+                    default[i] = defaults[COMMAND_DEFAULTS[command]]
+                except (KeyError, TypeError):
+                    default[i] = general
+            else:
+                default[i] = general
+
+            failed[i] = data.get('exit_code', 0) != 0
+            is_error[i] = bool(event.get('is_error'))
+            fixes[i] = bool(event.get('fixes_error'))
+            external[i] = bool(event.get('external_commits'))
+
+        return {'rank': rank, 'has_test': has_test, 'breaking': breaking, 'learning': learning,
+                'default': default, 'failed': failed, 'is_error': is_error, 'fixes': fixes,
+                'external': external, 'duration': duration, 'given': given,
+                'given_factor': given_factor, 'given_feature': given_feature,
+                'given_created': given_created}
+
+    def _project(self, text: EventText) -> tuple:
+        """Pattern rank and keyword flags of one projection"""
+        return (self.engine.match_rank(text), 'test' in text.text, 'breaking' in text.text,
+                'documentation' in text.text or 'readme' in text.text)
+
+    def _prefix_features(self, prefix: List[Dict]) -> Optional[Dict]:
+        """Window features of context events from earlier batches"""
+        columns = {'has_test': [], 'is_error': [], 'fixes': [], 'feature': [],
+                   'created': [], 'learning': []}
+        for event in prefix:
+            category = event.get('category', '')
+            if not isinstance(category, str):
+                return None
+            text = self.categorizer.event_text(event).text
+            columns['has_test'].append('test' in text)
+            columns['learning'].append('documentation' in text or 'readme' in text)
+            columns['is_error'].append(bool(event.get('is_error')))
+            columns['fixes'].append(bool(event.get('fixes_error')))
+            columns['feature'].append(category in FEATURE_CATEGORIES)
+            columns['created'].append('created' in category)
+        return {name: np.array(values, dtype=bool) for name, values in columns.items()}
+
+    def _window_sum(self, flags, offset: int, width):
+        """Per event: how many of the `width` flags ending at it are set"""
+        sums = np.concatenate([[0], np.cumsum(flags, dtype=np.int64)])
+        end = np.arange(offset + 1, len(flags) + 1)
+        return sums[end] - sums[end - width]
+
+    def _session_durations(self, window_events: List[Dict], offset: int, width,
+                           sessions) -> Optional[List[int]]:
+        """
+        Session durations as _calculate_session_duration computes them
+        (timedelta.seconds between the window's first and last parseable
+        timestamps); None if a window mixes naive and aware timestamps
+        """
+        parsed = {}  # position -> (microseconds since epoch, aware) or None
+
+        def timestamp(position: int):
+            if position not in parsed:
+                value = None
+                ts_str = window_events[position].get('timestamp', '')
+                if ts_str:
+                    try:
+                        ts = datetime.fromisoformat(ts_str.rstrip('Z'))
+                        if ts.tzinfo is None:
+                            value = ((ts - EPOCH) // MICROSECOND, False)
+                        else:
+                            value = ((ts - EPOCH_UTC) // MICROSECOND, True)
+                    except Exception:
+                        value = None
+                parsed[position] = value
+            return parsed[position]
+
+        durations = []
+        for i in sessions.tolist():
+            end = offset + i + 1
+            values = [t for t in map(timestamp, range(end - int(width[i]), end)) if t is not None]
+            if len(values) < 2:
+                durations.append(0)
+                continue
+            if len({aware for _, aware in values}) > 1:
+                return None  # the per-event path raises comparing these
+            micros = [m for m, _ in values]
+            durations.append((max(micros) - min(micros)) // 1000000 % 86400)
+        return durations
@@ -9,20 +9,51 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
+from process.batch_categorizer import BatchCategorizer, np
+from process.event_text import EventText
+from process.pattern_engine import PatternEngine
+
 class ActivityCategorizer:
     """Categorizes activities based on patterns"""
     
+    # Batches at least this large take the vectorized path (when NumPy is installed)
+    VECTORIZE_MIN_EVENTS = 256
+    
+    # Projections held at most (events outside a batch are released early)
+    MAX_TEXTS = 4096
+    
     def __init__(self, patterns_file: Path):
         self.patterns = self._load_patterns(patterns_file)
+        self.engine = PatternEngine(self.patterns.get('detection_patterns') or {})
         self.context_window = []  # Recent events for context
+        self.texts = {}  # id(event) -> (event, EventText) for the batch and context window
+        self.batch = BatchCategorizer(self) if np is not None else None
         
     def _load_patterns(self, patterns_file: Path) -> Dict:
         """Load patterns from YAML file"""
         with open(patterns_file, 'r') as f:
             return yaml.safe_load(f)
             
-    def categorize_batch(self, events: List[Dict]) -> List[Dict]:
-        """Categorize a batch of events"""
+    def categorize_batch(self, events: List[Dict], vectorized: Optional[bool] = None) -> List[Dict]:
+        """
+        Categorize a batch of events. Large batches are categorized with
+        NumPy when available (same results); vectorized=False forces the
+        per-event path.
+        """
+        try:
+            return self._categorize_batch(events, vectorized)
+        finally:
+            self._release_texts()
+            
+    def _categorize_batch(self, events: List[Dict], vectorized: Optional[bool]) -> List[Dict]:
+        """categorize_batch without releasing the batch's projections"""
+        if vectorized is None:
+            vectorized = len(events) >= self.VECTORIZE_MIN_EVENTS
+        if vectorized and self.batch is not None:
+            categorized = self.batch.categorize(events)
+            if categorized is not None:
+                return categorized
+                
         categorized = []
         
         for event in events:
@@ -68,11 +99,12 @@ class ActivityCategorizer:
         event_type = event.get('type', '')
         data = event.get('data', {})
         
-        # Check against patterns
-        for category, pattern_def in self.patterns['detection_patterns'].items():
-            if self._matches_pattern(event, pattern_def):
-                return category
-                
+        # Check against patterns (all families in one pass, indicators on demand)
+        category = self.engine.first_match(self.event_text(event),
+                                           lambda name: self._check_indicator(name, event))
+        if category:
+            return category
+            
         # Default categories by type
         if event_type == 'git_commit':
             return 'development'
@@ -87,32 +119,38 @@ class ActivityCategorizer:
                 
         return 'general'
         
-    def _matches_pattern(self, event: Dict, pattern_def: Dict) -> bool:
-        """Check if event matches a pattern definition"""
-        indicators = pattern_def.get('indicators', [])
-        keywords = pattern_def.get('keywords', [])
-        
-        event_str = str(event).lower()
-        
-        # Check keywords
-        for keyword in keywords:
-            if keyword.lower() in event_str:
-                return True
-                
-        # Check indicators
+    def _check_indicator(self, indicator: str, event: Dict) -> bool:
+        """Evaluate a detection indicator for an event"""
         data = event.get('data', {})
-        for indicator in indicators:
-            if indicator == 'error_in_output' and data.get('exit_code', 0) != 0:
-                return True
-            elif indicator == 'multiple_test_runs':
-                # Check context window for multiple test runs
-                test_runs = [e for e in self.context_window[-5:] 
-                           if 'test' in str(e).lower()]
-                if len(test_runs) >= 2:
-                    return True
-                    
+        if indicator == 'error_in_output':
+            return data.get('exit_code', 0) != 0
+        elif indicator == 'multiple_test_runs':
+            # Check context window for multiple test runs
+            test_runs = [e for e in self.context_window[-5:] if 'test' in self.event_text(e).text]
+            return len(test_runs) >= 2
         return False
         
+    def event_text(self, event: Dict) -> EventText:
+        """
+        The event's projection, computed on first use. It is kept while the
+        event is in the current batch or the context window; the entry
+        holds the event, so its id can't be reused meanwhile.
+        """
+        cached = self.texts.get(id(event))
+        if cached is not None:
+            return cached[1]
+            
+        if len(self.texts) >= self.MAX_TEXTS:
+            self._release_texts()
+        text = EventText(event)
+        self.texts[id(event)] = (event, text)
+        return text
+        
+    def _release_texts(self):
+        """Drop projections of events that have left the context window"""
+        texts = self.texts
+        self.texts = {id(e): texts[id(e)] for e in self.context_window if id(e) in texts}
+        
     def _enhance_category(self, event: Dict) -> Dict:
         """Enhance an already categorized event"""
         category = event.get('category', '')
@@ -147,7 +185,7 @@ class ActivityCategorizer:
         data = event.get('data', {})
         
         # Breaking changes are always important
-        if 'breaking' in str(event).lower():
+        if 'breaking' in self.event_text(event).text:
             base_importance = max(base_importance, 9)
             
         # Errors are important
@@ -185,6 +223,10 @@ class ActivityCategorizer:
             key_info['file'] = path.name
             key_info['file_type'] = path.suffix
             
+        elif event_type == 'bulk_change':
+            key_info['files_changed'] = data.get('files_changed', 0)
+            key_info['by_category'] = data.get('by_category', {})
+            
         return key_info
         
     def _detect_session(self) -> Optional[Dict]:
@@ -222,7 +264,7 @@ class ActivityCategorizer:
         # Learning session
         learning_indicators = [
             e for e in recent
-            if 'documentation' in str(e).lower() or 'README' in str(e)
+            if 'documentation' in self.event_text(e).text or 'readme' in self.event_text(e).text
         ]
         
         if len(learning_indicators) >= 2:
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Event Text - The searchable projection of an event, computed once
+
+Keyword checks used to stringify whole event dicts (`str(event).lower()`),
+over and over, and matched against dictionary keys, hashes, timestamps and
+the absolute paths of working directories ("/DEV/error-tracker" made every
+command there look like debugging). EventText keeps only the fields that
+describe what happened, lowercased: the command line, commit message, files
+relative to their project and URLs, with the branch, message and file list
+also available separately for anchored patterns.
+
+ActivityCategorizer.event_text() computes it once per event while the event
+is in the batch or the context window, so its pattern engine, importance
+scoring and session detection share one projection.
+"""
+
+import re
+from typing import Dict
+
+# Event data fields that describe the activity itself
+TEXT_FIELDS = ('message', 'output', 'error', 'files_changed', 'description', 'title', 'url')
+
+URL_PATTERN = re.compile(r'(?:[a-z][a-z0-9+.-]*://|www\.)[^\s\'"<>]+')
+
+
+class EventText:
+    """Lowercase searchable fields of an event"""
+
+    __slots__ = ('text', 'branch', 'message', 'files', 'urls')
+
+    def __init__(self, event: Dict):
+        data = event.get('data')
+        if not isinstance(data, dict):
+            data = {}
+        parts = [str(event.get('type') or ''), str(event.get('description') or '')]
+
+        # The command line once (command and args repeat it)
+        if data.get('cmdline'):
+            parts.append(str(data['cmdline']))
+        elif data.get('command'):
+            parts.append(f"{data['command']} {data.get('args') or ''}")
+        for field in TEXT_FIELDS:
+            value = data.get(field)
+            if value:
+                parts.append(value if isinstance(value, str) else str(value))
+
+        # Files relative to their project; the root's own name is noise
+        files = []
+        project = event.get('project')
+        root = project.get('path') if isinstance(project, dict) else None
+        path = data.get('path')
+        if isinstance(path, str) and path:
+            if root and path.startswith(root.rstrip('/') + '/'):
+                path = path[len(root.rstrip('/')) + 1:]
+                parts.append(path)
+            else:
+                parts.append(path.rsplit('/', 1)[-1])
+            files.append(path)
+        changed = data.get('files_changed')
+        if isinstance(changed, str) and changed:
+            files.extend(changed.split('\n') if '\n' in changed else changed.split())
+        for sample in data.get('sample_paths') or []:
+            files.append(str(sample))
+
+        self.text = '\n'.join(p for p in parts if p).lower()
+        self.files = '\n'.join(files).lower()
+        self.branch = str(data.get('branch') or '').lower()
+        message = data.get('message')
+        self.message = message.strip().lower() if isinstance(message, str) else ''
+
+        text = self.text
+        self.urls = '\n'.join(URL_PATTERN.findall(text)) if '://' in text or 'www.' in text else ''
+
+
+def projection_key(event: Dict) -> tuple:
+    """
+    The raw values EventText is built from: events with equal keys have
+    equal projections (batch paths project each distinct key once)
+    """
+    data = event.get('data')
+    if not isinstance(data, dict):
+        data = {}
+    project = event.get('project')
+    samples = data.get('sample_paths')
+    return (
+        event.get('type'), event.get('description'),
+        data.get('cmdline'), data.get('command'), data.get('args'),
+        data.get('message'), data.get('output'), data.get('error'),
+        data.get('files_changed'), data.get('description'), data.get('title'), data.get('url'),
+        data.get('path'), data.get('branch'),
+        project.get('path') if isinstance(project, dict) else None,
+        tuple(samples) if isinstance(samples, list) else samples
+    )
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Pattern Engine - Compiled detection patterns for ActivityCategorizer
+
+Every family in the `detection_patterns` section of config/patterns.yml is
+compiled once into a single regex with one named group per category:
+keywords (substrings of the event's text), urls (regexes over URLs the
+event mentions), branch_patterns and commit_patterns (prefixes of the
+branch name and commit message) and file_patterns (globs over the files it
+touches). Matching runs against the event's EventText projection, not its
+whole repr, so dictionary keys and bookkeeping values can't match.
+
+The regex engine acts as the keyword automaton: it scans the text once in
+C, which for pattern sets this size beats a pure-Python Aho-Corasick by an
+order of magnitude. Categories are tried in file order, so a category
+matching further along the text still wins over a later category that
+matched first: after a hit, the search continues with only the categories
+ranked ahead of it.
+"""
+
+import re
+from typing import Callable, Dict, Optional
+
+from process.event_text import EventText
+
+
+class PatternEngine:
+    """All detection pattern families compiled into ranked combined regexes"""
+
+    # Family name in patterns.yml -> (EventText attribute, how patterns compile)
+    FAMILIES = {
+        'keywords': ('text', 'literal'),
+        'urls': ('urls', 'regex'),
+        'branch_patterns': ('branch', 'prefix'),
+        'commit_patterns': ('message', 'prefix'),
+        'file_patterns': ('files', 'glob'),
+    }
+
+    def __init__(self, detection_patterns: Dict):
+        self.categories = list(detection_patterns)
+        self.indicators = [pattern_def.get('indicators') or [] for pattern_def in detection_patterns.values()]
+
+        # family -> list indexed by rank r: regex over categories ranked before r
+        # (index len(categories) covers them all), or None if none has patterns
+        self.families = []
+        for family, (field, kind) in self.FAMILIES.items():
+            branches = []
+            for rank, pattern_def in enumerate(detection_patterns.values()):
+                patterns = [self._translate(str(p), kind) for p in pattern_def.get(family) or []]
+                if patterns:
+                    branches.append((rank, f"(?P<c{rank}>{'|'.join(patterns)})"))
+            if not branches:
+                continue
+            ranked = [None] * (len(self.categories) + 1)
+            for limit in range(len(ranked)):
+                before = '|'.join(branch for rank, branch in branches if rank < limit)
+                if not before:
+                    continue
+                if kind == 'glob':
+                    # Globs match a whole path component, one file per line.
+                    # The shared anchor lets the scan skip most positions.
+                    ranked[limit] = re.compile(f'(?:^|/)(?:{before})(?=/|$)', re.MULTILINE)
+                else:
+                    ranked[limit] = re.compile(before)
+            self.families.append((field, ranked))
+
+    def first_match(self, fields: EventText,
+                    indicator: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        """
+        The first category (in patterns.yml order) whose patterns or
+        indicators match. `indicator` evaluates an indicator by name; it is
+        only consulted for categories ranked ahead of the best pattern hit.
+        """
+        best = self.match_rank(fields)
+        if indicator is not None:
+            for rank in range(best):
+                if any(indicator(name) for name in self.indicators[rank]):
+                    return self.categories[rank]
+        return self.categories[best] if best < len(self.categories) else None
+
+    def match_rank(self, fields: EventText) -> int:
+        """Rank of the first category any pattern family matches (len(categories) if none)"""
+        best = len(self.categories)
+        for field, ranked in self.families:
+            value = getattr(fields, field)
+            if not value:
+                continue
+            regex = ranked[best]
+            while regex is not None:
+                match = regex.search(value)
+                if match is None:
+                    break
+                best = int(match.lastgroup[1:])
+                regex = ranked[best]
+        return best
+
+    def _translate(self, pattern: str, kind: str) -> str:
+        """Regex source for one pattern"""
+        if kind == 'literal':
+            return re.escape(pattern.lower())
+        if kind == 'regex':
+            # Nested groups would shadow the category group in lastgroup
+            return re.sub(r'(?<!\\)\((?!\?)', '(?:', pattern.lower())
+        if kind == 'prefix':
+            return '^' + re.escape(pattern.lower())
+        # Glob ("__tests__", "test_*.py"), anchored to a path component by the caller
+        parts = []
+        for ch in pattern.lower():
+            if ch == '*':
+                parts.append('[^/\n]*')
+            elif ch == '?':
+                parts.append('[^/\n]')
+            else:
+                parts.append(re.escape(ch))
+        return ''.join(parts)
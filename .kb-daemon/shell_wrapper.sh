@@ -1,63 +1,168 @@
 #!/bin/bash
-# KB Daemon Shell Wrapper
+# KB Daemon Shell Wrapper (bash 5+ / zsh)
+# Uses shell builtins only: no processes are forked per command
 
 # Set capture directory
 export KB_CAPTURE_DIR="/Users/fathindosunmu/DEV/knowledge-base/.kb-daemon/capture"
 
-kb_capture_command() {
-    local cmd="$1"
-    shift
-    local args="$@"
-    local start_time=$(date +%s)
-    local working_dir=$(pwd)
-    
-    # Run the actual command
-    command "$cmd" "$args"
-    local exit_code=$?
-    local end_time=$(date +%s)
-    local duration=$((end_time - start_time))
-    
-    # Capture the output (last 100 lines)
-    local output_file="/tmp/kb_cmd_output_$$"
-    
-    # Create event JSON
-    cat > /tmp/kb_event_$$.json <<EOF
-{
-    "type": "shell_command",
-    "timestamp": "$(date -u +"%Y-%m-%dT%H:%M:%SZ")",
-    "data": {
-        "command": "$cmd",
-        "args": "$args",
-        "exit_code": $exit_code,
-        "duration": $duration,
-        "working_dir": "$working_dir"
-    }
+# Flush the event buffer every N commands or T seconds
+KB_FLUSH_EVERY=${KB_FLUSH_EVERY:-20}
+KB_FLUSH_INTERVAL=${KB_FLUSH_INTERVAL:-30}
+# Keep each flush within one stdio buffer so it lands as a single write
+KB_FLUSH_BYTES=3500
+
+# zsh provides EPOCHREALTIME and strftime through zsh/datetime
+[ -n "$ZSH_VERSION" ] && zmodload zsh/datetime 2>/dev/null
+
+# Current time as epoch seconds ($KB_NOW_S) and microseconds ($KB_NOW_FRAC)
+kb_now() {
+    local rt=$EPOCHREALTIME
+    # Shells without EPOCHREALTIME (bash < 5) pay one fork
+    [ -z "$rt" ] && rt="$(date +%s).0"
+    local frac="${rt#*[.,]}000000"
+    KB_NOW_S=${rt%[.,]*}
+    KB_NOW_FRAC=${frac:0:6}
 }
-EOF
-    
-    # Append to events file
-    cat /tmp/kb_event_$$.json >> "$KB_CAPTURE_DIR/shell_events.jsonl"
-    rm /tmp/kb_event_$$.json
-    
-    return $exit_code
+
+# ISO-8601 UTC timestamp for $KB_NOW_S/$KB_NOW_FRAC into $REPLY.
+# Switching TZ costs a tzset, so the date/hour/minute prefix is cached
+# and only reformatted once a minute.
+KB_TS_MINUTE=-1
+kb_timestamp() {
+    local minute=$(( KB_NOW_S / 60 ))
+    if [ "$minute" != "$KB_TS_MINUTE" ]; then
+        if [ -n "$ZSH_VERSION" ]; then
+            TZ=UTC0 strftime -s KB_TS_PREFIX '%Y-%m-%dT%H:%M:' "$KB_NOW_S"
+        else
+            TZ=UTC0 printf -v KB_TS_PREFIX '%(%Y-%m-%dT%H:%M:)T' "$KB_NOW_S"
+        fi
+        KB_TS_MINUTE=$minute
+    fi
+    printf -v REPLY '%s%02d.%sZ' "$KB_TS_PREFIX" $(( KB_NOW_S % 60 )) "$KB_NOW_FRAC"
 }
 
-# Alias tracked commands
-KB_TRACK_COMMANDS=(npm yarn pnpm cargo pytest python node docker kubectl terraform ansible make)
+# JSON string escaping into $REPLY
+kb_json_escape() {
+    local s=$1
+    # Most paths and commands need no escaping at all
+    case $s in
+        *[\\\"$'\n\t\r']*) ;;
+        *) REPLY=$s; return ;;
+    esac
+    s=${s//\\/\\\\}
+    s=${s//\"/\\\"}
+    s=${s//$'\n'/\\n}
+    s=${s//$'\t'/\\t}
+    s=${s//$'\r'/\\r}
+    REPLY=$s
+}
+
+# In-shell event buffer
+KB_EVENT_BUFFER=()
+KB_BUFFER_BYTES=0
+kb_now; KB_LAST_FLUSH=$KB_NOW_S
+
+kb_buffer_event() {
+    KB_EVENT_BUFFER+=("$1")
+    KB_BUFFER_BYTES=$(( KB_BUFFER_BYTES + ${#1} + 1 ))
+}
 
-for cmd in "${KB_TRACK_COMMANDS[@]}"; do
-    if command -v "$cmd" > /dev/null 2>&1; then
-        alias $cmd="kb_capture_command $cmd"
+# Append all buffered events with one printf (one O_APPEND write)
+kb_flush() {
+    if [ "${#KB_EVENT_BUFFER[@]}" -gt 0 ]; then
+        printf '%s\n' "${KB_EVENT_BUFFER[@]}" >> "$KB_CAPTURE_DIR/shell_events.jsonl"
+        KB_EVENT_BUFFER=()
+        KB_BUFFER_BYTES=0
     fi
-done
+    KB_LAST_FLUSH=${KB_NOW_S:-$KB_LAST_FLUSH}
+}
+
+# Called before a command line runs, with the line as typed
+kb_command_start() {
+    kb_now
+    KB_CMD_LINE=$1
+    KB_CMD_PWD=$PWD
+    KB_CMD_START_S=$KB_NOW_S
+    KB_CMD_START_FRAC=$KB_NOW_FRAC
+}
 
-# Enhanced prompt command for context
-kb_prompt_command() {
+# Called before the next prompt with the command line's exit status
+kb_command_end() {
+    local exit_code=$1
+    kb_now
+    
+    if [ -n "$KB_CMD_START_S" ]; then
+        local end_s=$KB_NOW_S end_frac=$KB_NOW_FRAC
+        local duration_us=$(( (end_s - KB_CMD_START_S) * 1000000 + 10#$end_frac - 10#$KB_CMD_START_FRAC ))
+        local duration
+        printf -v duration '%d.%06d' $(( duration_us / 1000000 )) $(( duration_us % 1000000 ))
+        
+        KB_NOW_S=$KB_CMD_START_S KB_NOW_FRAC=$KB_CMD_START_FRAC
+        kb_timestamp; local timestamp=$REPLY
+        KB_NOW_S=$end_s KB_NOW_FRAC=$end_frac
+        kb_json_escape "$KB_CMD_LINE"; local j_cmd=$REPLY
+        kb_json_escape "$KB_CMD_PWD"; local j_dir=$REPLY
+        
+        printf -v REPLY '{"type":"shell_command","timestamp":"%s","data":{"cmdline":"%s","exit_code":%d,"duration":%s,"working_dir":"%s"}}' \
+            "$timestamp" "$j_cmd" "$exit_code" "$duration" "$j_dir"
+        kb_buffer_event "$REPLY"
+        KB_CMD_START_S=
+    fi
+    
     # Capture directory changes
-    if [ "$PWD" != "$OLDPWD" ]; then
-        echo '{"type":"dir_change","timestamp":"'$(date -u +"%Y-%m-%dT%H:%M:%SZ")'","data":{"from":"'$OLDPWD'","to":"'$PWD'"}}' >> "$KB_CAPTURE_DIR/shell_events.jsonl"
+    if [ "$PWD" != "$KB_LAST_PWD" ]; then
+        kb_timestamp; local timestamp=$REPLY
+        kb_json_escape "$KB_LAST_PWD"; local j_from=$REPLY
+        kb_json_escape "$PWD"; local j_to=$REPLY
+        printf -v REPLY '{"type":"dir_change","timestamp":"%s","data":{"from":"%s","to":"%s"}}' \
+            "$timestamp" "$j_from" "$j_to"
+        kb_buffer_event "$REPLY"
+        KB_LAST_PWD=$PWD
+    fi
+    
+    if [ "${#KB_EVENT_BUFFER[@]}" -ge "$KB_FLUSH_EVERY" ] ||
+       [ "$KB_BUFFER_BYTES" -ge "$KB_FLUSH_BYTES" ] ||
+       [ $(( KB_NOW_S - KB_LAST_FLUSH )) -ge "$KB_FLUSH_INTERVAL" ]; then
+        kb_flush
     fi
 }
 
-# Add to PROMPT_COMMAND
-export PROMPT_COMMAND="${PROMPT_COMMAND:+$PROMPT_COMMAND; }kb_prompt_command"
+KB_LAST_PWD=$PWD
+
+# Hooks are only installed in interactive shells
+case $- in
+    *i*) ;;
+    *) return 0 2>/dev/null ;;
+esac
+
+if [ -n "$ZSH_VERSION" ]; then
+    kb_preexec() { kb_command_start "$1"; }
+    kb_precmd() { kb_command_end $?; }
+    
+    preexec_functions+=(kb_preexec)
+    # First in line so $? still holds the command's exit status
+    precmd_functions=(kb_precmd $precmd_functions)
+    zshexit_functions+=(kb_flush)
+else
+    # The DEBUG trap fires before every simple command, including those run
+    # from PROMPT_COMMAND; KB_AT_PROMPT limits capture to the first command
+    # of each interactive line
+    KB_AT_PROMPT=
+    kb_preexec() {
+        [ -n "$KB_AT_PROMPT" ] || return
+        [ -n "$COMP_LINE" ] && return
+        KB_AT_PROMPT=
+        # An empty line goes straight to PROMPT_COMMAND
+        [ "$BASH_COMMAND" = kb_precmd ] && return
+        # $BASH_COMMAND is the line's first simple command, unexpanded;
+        # the exit status recorded is the whole line's
+        kb_command_start "$BASH_COMMAND"
+    }
+    kb_precmd() { kb_command_end $?; }
+    kb_prompt_ready() { KB_AT_PROMPT=1; }
+    
+    trap 'kb_preexec' DEBUG
+    PROMPT_COMMAND="kb_precmd${PROMPT_COMMAND:+; $PROMPT_COMMAND}; kb_prompt_ready"
+    # Flush on exit unless the user already owns the EXIT trap
+    [ -z "$(trap -p EXIT)" ] && trap 'kb_flush' EXIT
+fi
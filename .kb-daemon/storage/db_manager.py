@@ -5,6 +5,7 @@ Database Manager - Manages storage of KB events with review tracking
 
 import sqlite3
 import json
+import hashlib
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Any, Optional
@@ -15,6 +16,8 @@ class DatabaseManager:
     def __init__(self, db_path: Path):
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.project_ids = {}  # canonical_id -> projects.id
+        self.project_details = {}  # canonical_id -> last stored project key
         self._init_database()
         self._upgrade_schema()  # Upgrade after init
         
@@ -79,6 +82,31 @@ class DatabaseManager:
                 )
             ''')
             
+            # Projects seen in events, with running activity counters
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS projects (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    canonical_id TEXT NOT NULL UNIQUE,
+                    name TEXT,
+                    root TEXT,
+                    type TEXT,
+                    git_remote TEXT,
+                    first_seen TEXT,
+                    last_seen TEXT,
+                    event_count INTEGER DEFAULT 0
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS project_activity (
+                    project_id INTEGER NOT NULL REFERENCES projects(id),
+                    category TEXT NOT NULL,
+                    importance INTEGER NOT NULL,
+                    count INTEGER DEFAULT 0,
+                    PRIMARY KEY (project_id, category, importance)
+                ) WITHOUT ROWID
+            ''')
+            
             # Create indexes (basic ones first)
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_category ON events(category)')
@@ -103,45 +131,191 @@ class DatabaseManager:
                 cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_reviewed ON events(reviewed)')
                 conn.commit()
                 print("✓ Database schema upgraded with review tracking")
+                
+            if 'fingerprint' not in columns:
+                cursor.execute('ALTER TABLE events ADD COLUMN fingerprint TEXT')
+                conn.commit()
+                print("✓ Database schema upgraded with event fingerprints")
+                
+            # NULL fingerprints (events stored before deduplication) never collide
+            cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_events_fingerprint ON events(fingerprint)')
+            conn.commit()
+            
+            if 'project_id' not in columns:
+                cursor.execute('ALTER TABLE events ADD COLUMN project_id INTEGER REFERENCES projects(id)')
+                conn.commit()
+                print("✓ Database schema upgraded with project references")
+                
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_events_project ON events(project_id, timestamp)')
+            conn.commit()
             
     def store_event(self, event: Dict):
         """Store a single event"""
+        self.store_events([event])
+        
+    def store_events(self, events: List[Dict], batch_size: int = 5000) -> int:
+        """
+        Store events with batched writes in a single transaction.
+        Events already stored (same fingerprint) are skipped.
+        Returns the number of events inserted.
+        """
+        return self.store_rows(self.event_rows(events), batch_size)
+        
+    def store_rows(self, rows: List[tuple], batch_size: int = 5000) -> int:
+        """
+        Store rows already serialized with event_row (e.g. by worker processes).
+        Projects are resolved to IDs and their activity counters advanced by
+        the events actually inserted, in the same transaction.
+        """
+        if not rows:
+            return 0
+            
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
-            
-            # Check if reviewed column exists
-            cursor.execute("PRAGMA table_info(events)")
-            columns = [col[1] for col in cursor.fetchall()]
-            
-            if 'reviewed' in columns:
-                cursor.execute('''
-                    INSERT INTO events (timestamp, type, category, importance, data, key_info, session, reviewed)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    event.get('timestamp'),
-                    event.get('type'),
-                    event.get('category'),
-                    event.get('importance'),
-                    json.dumps(event.get('data', {})),
-                    json.dumps(event.get('key_info', {})),
-                    json.dumps(event.get('session', {})) if event.get('session') else None,
-                    0  # Not reviewed by default
-                ))
-            else:
-                cursor.execute('''
-                    INSERT INTO events (timestamp, type, category, importance, data, key_info, session)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    event.get('timestamp'),
-                    event.get('type'),
-                    event.get('category'),
-                    event.get('importance'),
-                    json.dumps(event.get('data', {})),
-                    json.dumps(event.get('key_info', {})),
-                    json.dumps(event.get('session', {})) if event.get('session') else None
-                ))
+            # Take the write lock before reading MAX(id), so no other writer
+            # can insert between it and our inserts
+            cursor.execute('BEGIN IMMEDIATE')
+            resolved = self._resolve_projects(cursor, {row[8] for row in rows if row[8]})
+            before = conn.total_changes
+            
+            # AUTOINCREMENT ids only grow: everything above this was inserted now
+            cursor.execute('SELECT COALESCE(MAX(id), 0) FROM events')
+            last_id = cursor.fetchone()[0]
+            
+            for start in range(0, len(rows), batch_size):
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO events
+                    (timestamp, type, category, importance, data, key_info, session, reviewed,
+                     fingerprint, project_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?, ?)
+                ''', [row[:8] + (resolved[row[8][0]] if row[8] else None,)
+                      for row in rows[start:start + batch_size]])
+                
+            inserted = conn.total_changes - before
+            if resolved and inserted:
+                self._update_project_activity(cursor, last_id)
             
             conn.commit()
+            self.project_ids.update(resolved)
+            return inserted
+            
+    def _resolve_projects(self, cursor, projects: set) -> Dict[str, int]:
+        """
+        Project IDs for (canonical_id, name, root, type, git_remote) tuples,
+        registering new projects and refreshing ones whose details changed
+        """
+        resolved = {}
+        for project in projects:
+            known = self.project_ids.get(project[0])
+            if known is not None and self.project_details.get(project[0]) == project:
+                resolved[project[0]] = known
+                continue
+                
+            cursor.execute('''
+                INSERT INTO projects (canonical_id, name, root, type, git_remote)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(canonical_id) DO UPDATE SET
+                    name = excluded.name, root = excluded.root,
+                    type = excluded.type, git_remote = excluded.git_remote
+            ''', project)
+            cursor.execute('SELECT id FROM projects WHERE canonical_id = ?', (project[0],))
+            resolved[project[0]] = cursor.fetchone()[0]
+            self.project_details[project[0]] = project
+        return resolved
+        
+    def _update_project_activity(self, cursor, last_id: int):
+        """Add events stored after last_id to their projects' counters"""
+        cursor.execute('''
+            INSERT INTO project_activity (project_id, category, importance, count)
+            SELECT project_id, COALESCE(category, ''), COALESCE(importance, 0), COUNT(*)
+            FROM events WHERE id > ? AND project_id IS NOT NULL
+            GROUP BY 1, 2, 3
+            ON CONFLICT(project_id, category, importance) DO UPDATE SET
+                count = count + excluded.count
+        ''', (last_id,))
+        cursor.execute('''
+            UPDATE projects SET
+                event_count = event_count + batch.n,
+                first_seen = MIN(COALESCE(first_seen, batch.first), batch.first),
+                last_seen = MAX(COALESCE(last_seen, batch.last), batch.last)
+            FROM (
+                SELECT project_id, COUNT(*) AS n, MIN(timestamp) AS first, MAX(timestamp) AS last
+                FROM events WHERE id > ? AND project_id IS NOT NULL
+                GROUP BY project_id
+            ) AS batch
+            WHERE projects.id = batch.project_id
+        ''', (last_id,))
+        
+    @classmethod
+    def event_rows(cls, events: List[Dict]) -> List[tuple]:
+        """
+        Serialize events with event_row, numbering events that share a
+        fingerprint so that each of them is stored
+        """
+        seen = {}
+        rows = []
+        for event in events:
+            fingerprint = cls.event_fingerprint(event)
+            occurrence = seen.get(fingerprint, 0)
+            seen[fingerprint] = occurrence + 1
+            rows.append(cls.event_row(event, occurrence))
+        return rows
+        
+    @classmethod
+    def event_row(cls, event: Dict, occurrence: int = 0) -> tuple:
+        """Serialize an event into an events table row (plus its project key)"""
+        return (
+            event.get('timestamp'),
+            event.get('type'),
+            event.get('category'),
+            event.get('importance'),
+            json.dumps(event.get('data', {})),
+            json.dumps(event.get('key_info', {})),
+            json.dumps(event.get('session', {})) if event.get('session') else None,
+            cls.event_fingerprint(event, occurrence),
+            cls.project_key(event.get('project'))
+        )
+        
+    @staticmethod
+    def project_key(project) -> Optional[tuple]:
+        """
+        (canonical_id, name, root, type, git_remote) for an event's project.
+        A project is identified by its git remote, so clones and worktrees of
+        one repository count together, and otherwise by its root directory.
+        """
+        if not isinstance(project, dict) or not project.get('path'):
+            return None
+        remote = project.get('git_remote')
+        return (remote or project['path'], project.get('name'), project['path'],
+                project.get('type'), remote)
+            
+    @staticmethod
+    def event_fingerprint(event: Dict, occurrence: int = 0) -> str:
+        """
+        Identity of an event for deduplication: its type, timestamp to the
+        second and what it refers to (command line, commit hash or, failing
+        those, its whole data). Second precision lets a command imported
+        from shell history match the same command captured live. A commit
+        is identified by its hash alone, whether a hook or a repo scan saw it.
+        History entries without a recorded time are identified by the
+        commands before them instead of their estimated timestamp.
+        
+        `occurrence` numbers identical events within one batch (see
+        event_rows), so a command run twice in the same second is stored
+        twice. Repeats split across two batches still collapse into one.
+        """
+        data = event.get('data', {})
+        if event.get('type') == 'git_commit' and data.get('hash'):
+            return hashlib.sha1(f"git_commit|{data['hash']}".encode()).hexdigest()
+        identity = data.get('cmdline') or data.get('hash') or json.dumps(data, sort_keys=True, default=str)
+        if data.get('history_context'):
+            when = f"{data.get('source')}@{data['history_context']}"
+        else:
+            when = (event.get('timestamp') or '')[:19]
+        raw = f"{event.get('type')}|{when}|{identity}"
+        if occurrence:
+            raw += f"#{occurrence}"
+        return hashlib.sha1(raw.encode('utf-8', errors='replace')).hexdigest()
             
     def get_unreviewed_events(self, min_importance: int = 3) -> List[Dict]:
         """Get events that haven't been reviewed yet"""
@@ -306,6 +480,10 @@ class DatabaseManager:
             cursor.execute('SELECT COUNT(*) FROM kb_entries WHERE approved = 0')
             stats['pending_entries'] = cursor.fetchone()[0]
             
+            # Projects
+            cursor.execute('SELECT COUNT(*) FROM projects')
+            stats['total_projects'] = cursor.fetchone()[0]
+            
             # Review sessions (if table exists)
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='review_sessions'")
             if cursor.fetchone():
@@ -317,6 +495,64 @@ class DatabaseManager:
             
             return stats
             
+    def get_project_activity(self, days: Optional[int] = 7) -> List[Dict]:
+        """
+        Projects active in the last `days` (all projects if None), most
+        recent first, with their running counters by category and importance
+        and the number of events within the window
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            
+            from datetime import timedelta
+            threshold = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat() if days else ''
+            
+            cursor.execute('''
+                SELECT id, canonical_id, name, root, type, git_remote, first_seen, last_seen, event_count
+                FROM projects
+                WHERE last_seen > ?
+                ORDER BY last_seen DESC
+            ''', (threshold,))
+            
+            projects = {}
+            for row in cursor.fetchall():
+                projects[row[0]] = {
+                    'id': row[0],
+                    'canonical_id': row[1],
+                    'name': row[2],
+                    'root': row[3],
+                    'type': row[4],
+                    'git_remote': row[5],
+                    'first_seen': row[6],
+                    'last_seen': row[7],
+                    'event_count': row[8],
+                    'recent_events': 0,
+                    'by_category': {},
+                    'by_importance': {}
+                }
+            if not projects:
+                return []
+                
+            placeholders = ','.join('?' * len(projects))
+            cursor.execute(f'''
+                SELECT project_id, category, importance, count
+                FROM project_activity WHERE project_id IN ({placeholders})
+            ''', list(projects))
+            for project_id, category, importance, count in cursor.fetchall():
+                project = projects[project_id]
+                project['by_category'][category] = project['by_category'].get(category, 0) + count
+                project['by_importance'][importance] = project['by_importance'].get(importance, 0) + count
+                
+            cursor.execute(f'''
+                SELECT project_id, COUNT(*) FROM events
+                WHERE project_id IN ({placeholders}) AND timestamp > ?
+                GROUP BY project_id
+            ''', list(projects) + [threshold])
+            for project_id, count in cursor.fetchall():
+                projects[project_id]['recent_events'] = count
+                
+            return list(projects.values())
+            
     def store_summary(self, summary: Dict):
         """Store a summary"""
         with sqlite3.connect(self.db_path) as conn:
@@ -8,6 +8,8 @@ import sys
 from pathlib import Path
 from datetime import datetime
 
+from capture.segmented_log import SegmentedLog
+
 def view_logs():
     print("\n" + "="*60)
     print("📊 KB DAEMON - LOG VIEWER")
@@ -66,32 +68,35 @@ def view_logs():
                 print(f"    • [{importance}/10] {category}: {desc}")
     
     # Show shell events
-    shell_events = capture_dir / "shell_events.jsonl"
-    if shell_events.exists():
+    shell_log = SegmentedLog(capture_dir, "shell_events")
+    shell_stats = shell_log.stats()
+    if shell_stats['lines'] or shell_log.active_path.exists():
         print(f"\n🐚 Shell Events:")
-        with open(shell_events) as f:
-            lines = f.readlines()
-        print(f"  Total events: {len(lines)}")
+        print(f"  Total events: {shell_stats['lines']}")
+        if shell_stats['segments']:
+            print(f"  Archived segments: {shell_stats['segments']} "
+                  f"({shell_stats['compressed_bytes']} bytes compressed)")
         
-        if lines:
+        recent = shell_log.last(5)
+        if recent:
             print("  Recent commands:")
-            for line in lines[-5:]:
+            for line in recent:
                 try:
-                    event = json.loads(line)
+                    event = json.loads(line, strict=False)
                     if event['type'] == 'dir_change':
                         print(f"    • Changed to: {event['data']['to']}")
                     elif event['type'] == 'shell_command':
-                        print(f"    • Command: {event['data'].get('command', 'unknown')}")
+                        data = event['data']
+                        print(f"    • Command: {data.get('cmdline') or data.get('command', 'unknown')}")
                 except:
                     pass
     
     # Show git events
-    git_events = capture_dir / "git_events.jsonl"
-    if git_events.exists():
+    git_log = SegmentedLog(capture_dir, "git_events")
+    git_stats = git_log.stats()
+    if git_stats['lines'] or git_log.active_path.exists():
         print(f"\n🔧 Git Events:")
-        with open(git_events) as f:
-            lines = f.readlines()
-        print(f"  Total events: {len(lines)}")
+        print(f"  Total events: {git_stats['lines']}")
     
     print("\n" + "="*60)
     print("💡 To review and approve entries:")